@@ -3,6 +3,7 @@ from typing import Mapping
 from aiohttp import web
 
 from aiohttp_rest_framework.fields import patch_marshmallow_fields
+from aiohttp_rest_framework.filters import check_views_indexes
 from aiohttp_rest_framework.settings import Config, set_global_config
 from aiohttp_rest_framework.utils import create_connection  # noqa
 
@@ -25,3 +26,4 @@ def setup_rest_framework(app: web.Application, conf: Mapping = None) -> None:
 
     set_global_config(app_settings)
     patch_marshmallow_fields()
+    app.on_startup.append(check_views_indexes)
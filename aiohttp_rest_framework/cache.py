@@ -0,0 +1,168 @@
+import asyncio
+import time
+import typing
+from collections import OrderedDict
+
+__all__ = (
+    "CacheEntry",
+    "ResponseCache",
+    "SingleFlight",
+)
+
+T = typing.TypeVar("T")
+
+# tag of all entries of a table, of its list responses, of a single object
+# and of responses including objects of the table fetched as related ones
+_TABLE = "table"
+_LIST = "list"
+_OBJECT = "object"
+_RELATED = "related"
+
+
+class CacheEntry(typing.NamedTuple):
+    body: bytes
+    headers: typing.Mapping[str, str]
+    expires_at: float
+    tags: typing.Tuple[typing.Hashable, ...]
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of encoded responses.
+
+    Size is bounded by total length of cached bodies, least recently used entries
+    are evicted first, every entry expires after `ttl` seconds.
+    Entries are tagged by table and object they are built from, so writes can invalidate them.
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[typing.Hashable, CacheEntry]" = OrderedDict()
+        self._keys_by_tag: typing.Dict[typing.Hashable, typing.Set[typing.Hashable]] = {}
+
+    def get(self, key: typing.Hashable) -> typing.Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set_list(self, key: typing.Hashable, body: bytes, headers: typing.Mapping[str, str],
+                 table: str, ttl: typing.Optional[float] = None, related_tables: typing.Iterable[str] = ()) -> None:
+        tags = ((_TABLE, table), (_LIST, table), *((_RELATED, related) for related in related_tables))
+        self._set(key, body, headers, tags, ttl)
+
+    def set_object(self, key: typing.Hashable, body: bytes, headers: typing.Mapping[str, str],
+                   table: str, pk: typing.Any, ttl: typing.Optional[float] = None,
+                   related_tables: typing.Iterable[str] = ()) -> None:
+        tags = ((_TABLE, table), (_OBJECT, table, str(pk)), *((_RELATED, related) for related in related_tables))
+        self._set(key, body, headers, tags, ttl)
+
+    def invalidate(self, table: str, pks: typing.Optional[typing.Iterable[typing.Any]] = None) -> None:
+        """
+        Remove list responses of the table, responses of objects with passed primary keys
+        and responses including objects of the table as related ones, all responses of the table if `pks` is `None`
+        """
+        self._remove_tag((_RELATED, table))
+        if pks is None:
+            self._remove_tag((_TABLE, table))
+            return
+        self._remove_tag((_LIST, table))
+        for pk in pks:
+            self._remove_tag((_OBJECT, table, str(pk)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self.size = 0
+
+    def stats(self) -> typing.Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def _set(self, key: typing.Hashable, body: bytes, headers: typing.Mapping[str, str],
+             tags: typing.Tuple[typing.Hashable, ...], ttl: typing.Optional[float]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if len(body) > self.max_size:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = CacheEntry(body, headers, time.monotonic() + ttl, tags)
+        self.size += len(body)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove_tag(self, tag: typing.Hashable) -> None:
+        for key in list(self._keys_by_tag.get(tag, ())):
+            self._remove(key)
+
+    def _remove(self, key: typing.Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run one call per key at a time, concurrent callers with the same key await result of the call in flight.
+    Exception of the call is raised for all of them. Cancelled caller doesn't cancel the call for others,
+    the call is cancelled only when all its callers are. Should be used within one event loop
+    """
+
+    def __init__(self):
+        self._calls: typing.Dict[typing.Hashable, _Call] = {}
+
+    async def do(self, key: typing.Hashable, func: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # nobody else waits for the result, next caller starts a new call
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: typing.Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
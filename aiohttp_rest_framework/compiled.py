@@ -0,0 +1,318 @@
+import datetime
+import typing
+import uuid
+from collections.abc import Mapping
+
+import marshmallow as ma
+from marshmallow.error_store import ErrorStore
+from marshmallow.utils import is_collection
+
+from aiohttp_rest_framework import fields
+
+__all__ = (
+    "compile_dump",
+    "compile_load",
+)
+
+# max amount of generated functions, they are shared by serializers with the same fields
+COMPILED_CACHE_SIZE = 1024
+
+# errors marshmallow treats as missing key when it gets value of an object
+_LOOKUP_ERRORS = (KeyError, IndexError, TypeError, AttributeError)
+
+# value conversions of dump fields, `{value}` is converted with fast path,
+# if it's of the expected type (`{extra}`), or with `_serialize` of the field (`{serialize}`) otherwise
+_CONVERSIONS = {
+    "raw": "{value}",
+    "exact": "{value} if {value}.__class__ is {extra} else {serialize}({value}, {name}, obj)",
+    "instance": "{value} if isinstance({value}, {extra}) else {serialize}({value}, {name}, obj)",
+    "uuid": (
+        "{value} if {value}.__class__ is str else "
+        "(str({value}) if isinstance({value}, UUID) else {serialize}({value}, {name}, obj))"
+    ),
+    "isoformat": "{value}.isoformat() if {value}.__class__ is {extra} else {serialize}({value}, {name}, obj)",
+    "enum_value": "{value}.value if {value}.__class__ is {extra} else {serialize}({value}, {name}, obj)",
+    "enum_name": "{value}.name if {value}.__class__ is {extra} else {serialize}({value}, {name}, obj)",
+    "call": "{serialize}({value}, {name}, obj)",
+}
+
+_ISO_FORMATS = (None, "iso", "iso8601")
+
+# methods of marshmallow schema used to dump objects, serializers overriding them aren't compiled
+_DUMP_METHODS = ("dump", "_serialize", "get_attribute")
+
+# methods of marshmallow schema used to load data, serializers overriding them aren't compiled
+_LOAD_METHODS = ("load", "_do_load", "_deserialize", "_invoke_field_validators", "handle_error")
+_LOAD_HOOKS = (ma.decorators.PRE_LOAD, ma.decorators.POST_LOAD, ma.decorators.VALIDATES_SCHEMA)
+
+_dump_factories: typing.Dict[tuple, typing.Callable] = {}
+_load_factories: typing.Dict[tuple, typing.Callable] = {}
+
+
+def compile_dump(serializer: ma.Schema) -> typing.Optional[typing.Callable[[typing.Iterable], typing.List[dict]]]:
+    """
+    Generate function dumping list of objects with dump fields of the serializer, like `dump(objs, many=True)`.
+    Values are read from objects by keys and converted by the field types, objects missing some key are dumped
+    by the serializer itself. `None` is returned if the serializer has dump hooks or customizes dumping
+    """
+    if serializer._has_processors(ma.decorators.PRE_DUMP) or serializer._has_processors(ma.decorators.POST_DUMP):  # noqa
+        return None
+    if any(getattr(type(serializer), name) is not getattr(ma.Schema, name) for name in _DUMP_METHODS):
+        return None
+
+    native_fields = serializer._native_fields  # noqa
+    plan = []
+    field_objs = []
+    extras = []
+    for field_name, field_obj in serializer.dump_fields.items():
+        key = field_obj.attribute or field_name
+        if "." in key or not getattr(field_obj, "_CHECK_ATTRIBUTE", True):
+            conversion, extra = None, None  # the field gets its value itself
+        else:
+            conversion, extra = _get_conversion(field_obj, native_fields.get(field_name))
+        data_key = field_obj.data_key if field_obj.data_key is not None else field_name
+        plan.append((field_name, data_key, key, conversion))
+        field_objs.append(field_obj)
+        extras.append(extra)
+
+    signature = tuple(plan)
+    factory = _dump_factories.get(signature)
+    if factory is None:
+        factory = _generate_dump_factory(plan)
+        if len(_dump_factories) < COMPILED_CACHE_SIZE:
+            _dump_factories[signature] = factory
+    return factory(serializer._serialize, serializer.get_attribute, field_objs, extras)  # noqa
+
+
+def _get_conversion(field_obj: ma.fields.Field, native_type: typing.Optional[type]) -> typing.Tuple[str, typing.Any]:
+    if native_type is not None:  # `_serialize` of the field returns values of the type as is
+        # `datetime` is `date` too, but isn't dumped as is by `Date` field
+        return ("exact" if native_type is datetime.date else "instance"), native_type
+    field_class = type(field_obj)
+    serialize = field_class._serialize  # noqa
+    if serialize is ma.fields.Field._serialize:  # noqa
+        return "raw", None
+    if isinstance(field_obj, ma.fields.UUID) and serialize is ma.fields.UUID._serialize:  # noqa
+        return "uuid", None
+    if serialize is ma.fields.String._serialize:  # noqa
+        return "exact", str
+    if serialize is ma.fields.Boolean._serialize:  # noqa
+        return "exact", bool
+    if serialize is ma.fields.Number._serialize and field_class._format_num is ma.fields.Number._format_num:  # noqa
+        if not field_obj.as_string and field_obj.num_type in (int, float):
+            return "exact", field_obj.num_type
+    if serialize is ma.fields.DateTime._serialize and field_obj.format in _ISO_FORMATS:  # noqa
+        if isinstance(field_obj, ma.fields.Date):
+            if field_obj.SERIALIZATION_FUNCS is ma.fields.Date.SERIALIZATION_FUNCS:
+                return "isoformat", datetime.date
+        elif field_obj.SERIALIZATION_FUNCS is ma.fields.DateTime.SERIALIZATION_FUNCS:
+            return "isoformat", datetime.datetime
+    if serialize is fields.Enum._serialize:  # noqa
+        return ("enum_value" if field_obj.by_value else "enum_name"), field_obj.enum
+    return "call", None
+
+
+def _generate_dump_factory(plan: typing.Sequence[tuple]) -> typing.Callable:
+    """
+    Generate source of `make(serialize, get_attribute, fields, extras)`, which returns `dump_many` function
+    bound to fields of one serializer instance
+    """
+    lines = ["def make(serialize, get_attribute, fields, extras):"]
+    for i in range(len(plan)):
+        lines.append(f"    f{i} = fields[{i}]")
+        lines.append(f"    s{i} = fields[{i}]._serialize")
+        lines.append(f"    e{i} = extras[{i}]")
+
+    lines.extend((
+        "    def dump_many(objs):",
+        "        result = []",
+        "        append = result.append",
+        "        for obj in objs:",
+        "            try:",
+    ))
+    direct = [(i, item) for i, item in enumerate(plan) if item[3] is not None]
+    for i, (_, _, key, _) in direct:
+        lines.append(f"                v{i} = obj[{key!r}]")
+    if not direct:
+        lines.append("                pass")
+    lines.extend((
+        "            except LOOKUP_ERRORS:",
+        "                append(serialize(obj))",
+        "                continue",
+    ))
+
+    def convert(i: int, field_name: str, conversion: str) -> str:
+        return _CONVERSIONS[conversion].format(
+            value=f"v{i}", serialize=f"s{i}", extra=f"e{i}", name=repr(field_name),
+        )
+
+    if len(direct) == len(plan):
+        items = ", ".join(
+            f"{data_key!r}: {convert(i, field_name, conversion)}"
+            for i, (field_name, data_key, _, conversion) in enumerate(plan)
+        )
+        lines.append(f"            append({{{items}}})")
+    else:
+        # some fields may be skipped, keep order of keys by adding them one by one
+        lines.append("            ret = {}")
+        for i, (field_name, data_key, _, conversion) in enumerate(plan):
+            if conversion is not None:
+                lines.append(f"            ret[{data_key!r}] = {convert(i, field_name, conversion)}")
+                continue
+            lines.extend((
+                f"            value = f{i}.serialize({field_name!r}, obj, accessor=get_attribute)",
+                "            if value is not missing:",
+                f"                ret[{data_key!r}] = value",
+            ))
+        lines.append("            append(ret)")
+    lines.extend((
+        "        return result",
+        "    return dump_many",
+    ))
+
+    namespace = {"LOOKUP_ERRORS": _LOOKUP_ERRORS, "UUID": uuid.UUID, "missing": ma.missing}
+    exec(compile("\n".join(lines), "<compiled dump>", "exec"), namespace)  # noqa
+    return namespace["make"]
+
+
+def compile_load(serializer: ma.Schema) -> typing.Optional[typing.Callable[[typing.Any], typing.Any]]:
+    """
+    Generate function loading data with load fields of the serializer, like `serializer.load(data)`.
+    Required and null values are checked and missing defaults are set in one pass over the fields,
+    values of the type a field expects are taken as is, others are deserialized by the field.
+    Errors are stored by marshmallow's `ErrorStore` and raised with `ma.ValidationError`, the same way `load` does.
+    `None` is returned if the serializer has load hooks, customizes loading, includes unknown fields
+    or is partial for some of the fields only
+    """
+    if any(serializer._has_processors(tag) for tag in _LOAD_HOOKS):  # noqa
+        return None
+    if serializer._hooks[ma.decorators.VALIDATES]:  # field validators are stored without `pass_many`  # noqa
+        return None
+    if any(getattr(type(serializer), name) is not getattr(ma.Schema, name) for name in _LOAD_METHODS):
+        return None
+    if serializer.unknown != ma.EXCLUDE or serializer.partial not in (None, False, True):
+        return None
+
+    plan = []
+    field_objs = []
+    for field_name, field_obj in serializer.load_fields.items():
+        key = field_obj.attribute or field_name
+        if "." in key:
+            return None
+        data_key = field_obj.data_key if field_obj.data_key is not None else field_name
+        plan.append((
+            key,
+            data_key,
+            bool(field_obj.required),
+            field_obj.allow_none is True,
+            field_obj.missing is not ma.missing,
+            _get_load_type(field_obj),
+        ))
+        field_objs.append(field_obj)
+
+    signature = tuple(plan)
+    factory = _load_factories.get(signature)
+    if factory is None:
+        factory = _generate_load_factory(plan)
+        if len(_load_factories) < COMPILED_CACHE_SIZE:
+            _load_factories[signature] = factory
+    load_many = factory(field_objs, serializer.error_messages["type"], serializer.opts.index_errors)
+    many = serializer.many
+    partial = bool(serializer.partial)
+
+    def load(data):
+        error_store = ErrorStore()
+        if not many:
+            result = load_many((data,), partial, error_store, False)[0]
+        elif is_collection(data):
+            result = load_many(data, partial, error_store, True)
+        else:
+            error_store.store_error([serializer.error_messages["type"]])
+            result = []
+        if error_store.errors:
+            raise ma.ValidationError(error_store.errors, data=data, valid_data=result)
+        return result
+
+    return load
+
+
+def _get_load_type(field_obj: ma.fields.Field) -> typing.Optional[type]:
+    """Type of input values the field returns as is, `None` if all values are deserialized by the field"""
+    if field_obj.validators:
+        return None
+    field_class = type(field_obj)
+    deserialize = field_class._deserialize  # noqa
+    if deserialize is ma.fields.String._deserialize:  # noqa
+        return str
+    if deserialize is ma.fields.Boolean._deserialize:  # noqa
+        return bool
+    if deserialize is ma.fields.Number._deserialize and field_class._validated is ma.fields.Integer._validated:  # noqa
+        if field_class._format_num is ma.fields.Number._format_num and field_obj.num_type is int:  # noqa
+            return int
+    return None
+
+
+def _generate_load_factory(plan: typing.Sequence[tuple]) -> typing.Callable:
+    """
+    Generate source of `make(fields, type_message, index_errors)`, which returns `load_many` function
+    bound to fields of one serializer instance
+    """
+    lines = ["def make(fields, type_message, index_errors):"]
+    for i in range(len(plan)):
+        lines.extend((
+            f"    f{i} = fields[{i}]",
+            f"    m{i} = fields[{i}].missing",
+            f"    required{i} = fields[{i}].make_error('required').messages",
+            f"    null{i} = fields[{i}].make_error('null').messages",
+        ))
+    lines.extend((
+        "    def load_many(items, partial, error_store, is_many):",
+        "        result = []",
+        "        append = result.append",
+        "        for position, data in enumerate(items):",
+        "            index = position if is_many and index_errors else None",
+        "            ret = {}",
+        "            append(ret)",
+        "            if not isinstance(data, Mapping):",
+        "                error_store.store_error([type_message], index=index)",
+        "                continue",
+    ))
+    for i, (key, data_key, required, allow_none, has_missing, load_type) in enumerate(plan):
+        lines.extend((
+            f"            raw = data.get({data_key!r}, missing)",
+            "            if raw is missing:",
+            "                if partial is not True:",
+        ))
+        if required:
+            lines.append(f"                    error_store.store_error(required{i}, {data_key!r}, index=index)")
+        elif has_missing:
+            lines.append(f"                    ret[{key!r}] = m{i}() if callable(m{i}) else m{i}")
+        else:
+            lines.append("                    pass")
+        lines.append("            elif raw is None:")
+        if allow_none:
+            lines.append(f"                ret[{key!r}] = None")
+        else:
+            lines.append(f"                error_store.store_error(null{i}, {data_key!r}, index=index)")
+        if load_type is not None:
+            lines.extend((
+                f"            elif raw.__class__ is {load_type.__name__}:",
+                f"                ret[{key!r}] = raw",
+            ))
+        lines.extend((
+            "            else:",
+            "                try:",
+            f"                    ret[{key!r}] = f{i}.deserialize(raw, {data_key!r}, data, partial=partial)",
+            "                except ValidationError as error:",
+            f"                    error_store.store_error(error.messages, {data_key!r}, index=index)",
+            "                    if error.valid_data:",
+            f"                        ret[{key!r}] = error.valid_data",
+        ))
+    lines.extend((
+        "        return result",
+        "    return load_many",
+    ))
+
+    namespace = {"Mapping": Mapping, "ValidationError": ma.ValidationError, "missing": ma.missing}
+    exec(compile("\n".join(lines), "<compiled load>", "exec"), namespace)  # noqa
+    return namespace["make"]
@@ -0,0 +1,43 @@
+import typing
+import zlib
+
+from aiohttp_rest_framework.utils import parse_accept_header
+
+__all__ = (
+    "GZIP",
+    "DEFLATE",
+    "CODINGS",
+    "select_coding",
+    "compress",
+)
+
+GZIP = "gzip"
+DEFLATE = "deflate"
+# in order of preference
+CODINGS = (GZIP, DEFLATE)
+
+_WBITS = {
+    GZIP: 16 + zlib.MAX_WBITS,
+    DEFLATE: zlib.MAX_WBITS,  # "deflate" of http is zlib format
+}
+
+
+def select_coding(accept_encoding: typing.Optional[str]) -> typing.Optional[str]:
+    """Pick the most preferred supported coding of `Accept-Encoding` header value, `None` if none is accepted"""
+    codings = parse_accept_header(accept_encoding)
+    listed = {coding for coding, _ in codings}
+    for coding, quality in codings:
+        if quality <= 0:
+            break
+        if coding == "*":
+            # any coding which isn't listed explicitly
+            return next((name for name in CODINGS if name not in listed), None)
+        if coding in CODINGS:
+            # prefer gzip among codings of the same quality
+            return min((name for name, q in codings if q == quality and name in CODINGS), key=CODINGS.index)
+    return None
+
+
+def compress(body: bytes, coding: str, level: int = 6) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[coding])
+    return compressor.compress(body) + compressor.flush()
@@ -1,7 +1,7 @@
-from typing import Any, Generic, List, Optional, TypeVar
+from typing import Any, AsyncIterator, Generic, List, Mapping, Optional, Sequence, TypeVar
 
 from databases import Database
-from sqlalchemy import Table
+from sqlalchemy import Table, bindparam, cast, column, values
 from sqlalchemy.sql.elements import BooleanClauseList
 from sqlalchemy.sql.expression import ColumnElement, Delete, Insert, Select, Update, delete, insert, select, update
 
@@ -28,14 +28,17 @@ class CommonQueryBuilderMixin:
     def pk_column(self) -> ColumnElement:
         return self.table.columns[self.pk_key]
 
-    def get_by_id_query(self, id_: Any) -> Select:
-        return self.get_all_query().where(self.pk_column == id_)
+    def get_by_id_query(self, id_: Any, columns: Optional[Sequence[str]] = None) -> Select:
+        return self.get_all_query(columns).where(self.pk_column == id_)
 
     def delete_by_id_query(self, id_: Any) -> Delete:
         return delete(self.table).where(self.pk_column == id_)
 
-    def get_all_query(self) -> Select:
-        return select([self.table])
+    def get_all_query(self, columns: Optional[Sequence[str]] = None) -> Select:
+        """Select all columns of the table or only the ones which names are passed"""
+        if columns is None:
+            return select([self.table])
+        return select([self.table.columns[name] for name in columns])
 
     def insert_query(self, values, with_returning: bool = False) -> Insert:
         query = insert(self.table, values)
@@ -44,6 +47,33 @@ class CommonQueryBuilderMixin:
             query = query.returning(*self.table.columns)
         return query
 
+    def insert_many_query(self, values: Sequence[Mapping], with_returning: bool = False) -> Insert:
+        """Multi-row `INSERT ... VALUES (...), (...)`, all rows have to have the same keys"""
+        query = insert(self.table).values(list(values))
+        if with_returning:
+            query = query.returning(*self.table.columns)
+        return query
+
+    def update_many_query(self, rows: Sequence[Mapping], key: str, with_returning: bool = False) -> Update:
+        """
+        `UPDATE ... FROM (VALUES (...), (...)) AS data WHERE table.key = data.key` updating
+        every row matched by `key` with its own values, all rows have to have the same keys
+        """
+        columns = [self.table.columns[name] for name in rows[0]]
+        # values are casted to column types, otherwise database treats them as text
+        data = values(*(column(c.key, c.type) for c in columns), name="data").data([
+            tuple(cast(bindparam(None, row[c.key], type_=c.type), c.type) for c in columns)
+            for row in rows
+        ])
+        query = (
+            update(self.table)
+            .where(self.table.columns[key] == data.columns[key])
+            .values({c.key: data.columns[c.key] for c in columns if c.key != key})
+        )
+        if with_returning:
+            query = query.returning(*self.table.columns)
+        return query
+
     def update_query(self, whereclause: Optional[BooleanClauseList] = None, with_returning: bool = False) -> Update:
         query = update(self.table, whereclause)
         if with_returning:
@@ -54,6 +84,12 @@ class CommonQueryBuilderMixin:
         query = delete(self.table, whereclause)
         return query
 
+    def get_returning_columns(self, columns: Optional[Sequence[str]] = None) -> List[ColumnElement]:
+        """Columns for RETURNING clause, all of them if `columns` is `None`"""
+        if columns is None:
+            return list(self.table.columns)
+        return [self.table.columns[name] for name in columns]
+
     def delete_all_query(self) -> Delete:
         return delete(self.table)
 
@@ -80,6 +116,9 @@ class BaseSARepository(Generic[T], CommonQueryBuilderMixin):
     async def _execute(self, *args, **kwargs):
         raise NotImplementedError()
 
+    def _iterate(self, *args, **kwargs) -> AsyncIterator[T]:
+        raise NotImplementedError()
+
     async def get_connection(self) -> Database:
         if self._connection:
             return self._connection
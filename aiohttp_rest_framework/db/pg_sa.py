@@ -1,10 +1,16 @@
-from typing import Any, List, Mapping, MutableMapping, Optional, Union
+import asyncio
+import json
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Mapping, MutableMapping, Optional, Sequence, Set, Tuple, Union
 
 from asyncpg import exceptions
 from databases import Database
-from sqlalchemy import Table, and_, func, select
-from sqlalchemy.sql import Select
-from sqlalchemy.sql.elements import BooleanClauseList
+from sqlalchemy import Table, and_, any_, bindparam, delete, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Delete, Select
+from sqlalchemy.sql.elements import BooleanClauseList, ColumnElement, TextClause
 
 from aiohttp_rest_framework.db.base_sa import BaseSARepository
 from aiohttp_rest_framework.exceptions import (
@@ -17,10 +23,25 @@ from aiohttp_rest_framework.exceptions import (
 __all__ = [
     "PGSAService",
     "PGSARepository",
+    "BatchLoader",
+    "any_of",
 ]
 
 
+def any_of(column: ColumnElement, values: Sequence) -> ColumnElement:
+    """
+    `column = ANY(:values)` with values passed as single array parameter,
+    unlike `IN` the statement stays the same for any amount of values
+    """
+    return column == any_(bindparam(None, list(values), type_=postgresql.ARRAY(column.type)))
+
+
 class PGSARepository(BaseSARepository[Mapping]):
+    # (table name, statement) -> (expiration time, estimated count), shared between repositories,
+    # least recently used counts are evicted when there are more than `estimated_counts_max_size` of them
+    _estimated_counts: "OrderedDict[Tuple[str, str], Tuple[float, int]]" = OrderedDict()
+    estimated_counts_max_size: int = 1024
+
     async def _fetchone(self, query: str, params: Optional[dict] = None) -> Optional[Mapping]:
         connection = await self.get_connection()
         try:
@@ -42,8 +63,18 @@ class PGSARepository(BaseSARepository[Mapping]):
         except exceptions.PostgresError as exc:
             raise self._get_exception(exc)
 
-    async def get_by_id(self, instance_id: Any) -> Optional[Mapping]:
-        query = self.get_by_id_query(instance_id)
+    async def _iterate(self, query: str, params: Optional[dict] = None) -> AsyncIterator[Mapping]:
+        # `databases` runs `iterate` in a transaction with a server-side cursor,
+        # so rows are fetched from the database in small batches
+        connection = await self.get_connection()
+        try:
+            async for row in connection.iterate(query, params):
+                yield row
+        except exceptions.PostgresError as exc:
+            raise self._get_exception(exc)
+
+    async def get_by_id(self, instance_id: Any, columns: Optional[Sequence[str]] = None) -> Optional[Mapping]:
+        query = self.get_by_id_query(instance_id, columns)
         return await self._fetchone(query)
 
     async def get_or_raise_by_id(self, instance_id: Any) -> Mapping:
@@ -52,10 +83,25 @@ class PGSARepository(BaseSARepository[Mapping]):
             raise self.not_found_exception_cls()
         return result
 
-    async def get_all(self) -> List[Mapping]:
-        query = self.get_all_query()
+    async def get_all(self, query: Optional[Select] = None) -> List[Mapping]:
+        if query is None:
+            query = self.get_all_query()
         return await self._fetchall(query, {})
 
+    def get_many_query(self, values: Sequence, key: str) -> Select:
+        return self.get_all_query().where(any_of(self.table.columns[key], values))
+
+    async def get_many(self, values: Sequence, key: Optional[str] = None) -> List[Mapping]:
+        """Rows which `key` (primary key by default) is one of `values`, in no particular order"""
+        if not values:
+            return []
+        return await self._fetchall(self.get_many_query(values, key or self.pk_key))
+
+    def iterate_all(self, query: Optional[Select] = None) -> AsyncIterator[Mapping]:
+        if query is None:
+            query = self.get_all_query()
+        return self._iterate(query, {})
+
     async def update(
         self,
         instance: Union[Mapping, MutableMapping],
@@ -96,6 +142,21 @@ class PGSARepository(BaseSARepository[Mapping]):
 
         await self._execute(query)
 
+    async def delete_returning(
+        self,
+        params: Optional[MutableMapping] = None,
+        whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Optional[Mapping]:
+        """
+        Delete row with single `DELETE ... RETURNING` query and return requested columns of it
+        (all by default), `None` if nothing was deleted
+        """
+        if whereclause is None:
+            whereclause = self._construct_whereclause(params)
+        query = self.delete_query(whereclause).returning(*self.get_returning_columns(columns))
+        return await self._fetchone(query)
+
     async def insert(self, params: MutableMapping, with_returning: bool = True) -> Union[int, Mapping]:
         query = self.insert_query(params, with_returning)
         if with_returning:
@@ -105,6 +166,122 @@ class PGSARepository(BaseSARepository[Mapping]):
         result = await self._execute(query)
         return result
 
+    async def insert_many(self, values: Sequence[MutableMapping], batch_size: Optional[int] = None) -> List[Mapping]:
+        """
+        Insert rows with one multi-row `INSERT ... RETURNING` statement per batch of `batch_size` rows,
+        all batches are inserted in single transaction. Inserted rows are returned in the order of `values`
+        """
+        if not values:
+            return []
+        rows = [self._with_defaults(row) for row in values]
+        batch_size = batch_size or len(rows)
+        connection = await self.get_connection()
+        inserted = []
+        async with connection.transaction():
+            for start in range(0, len(rows), batch_size):
+                inserted.extend(await self._insert_rows(rows[start:start + batch_size]))
+        return inserted
+
+    async def _insert_rows(self, rows: List[dict]) -> List[Mapping]:
+        # rows with different keys can't share VALUES list, missing keys would override server defaults with NULLs
+        groups: Dict[frozenset, List[int]] = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(frozenset(row), []).append(index)
+        inserted: List[Optional[Mapping]] = [None] * len(rows)
+        for indexes in groups.values():
+            query = self.insert_many_query([rows[index] for index in indexes], with_returning=True)
+            # `databases` can't execute multi-row insert construct, so it's passed as text.
+            # Postgres returns rows in the order of VALUES list
+            result = await self._fetchall(self._as_text(query).columns(*self.table.columns))
+            for index, row in zip(indexes, result):
+                inserted[index] = row
+        return inserted
+
+    async def copy_rows(self, rows: Sequence[Mapping]) -> int:
+        """
+        Insert rows with `COPY ... FROM STDIN` through asyncpg connection underneath `databases` one,
+        it's much faster than INSERT for big amounts of rows. Rows are grouped by their keys like in `insert_many()`,
+        all groups are copied in single transaction. Nothing is returned, but amount of inserted rows
+        """
+        if not rows:
+            return 0
+        groups: Dict[frozenset, List[dict]] = {}
+        for row in rows:
+            row = self._with_defaults(row)
+            groups.setdefault(frozenset(row), []).append(row)
+        database = await self.get_connection()
+        async with database.connection() as connection:
+            try:
+                async with connection.transaction():
+                    for group in groups.values():
+                        keys = list(group[0])
+                        await connection.raw_connection.copy_records_to_table(
+                            self.table.name,
+                            schema_name=self.table.schema,
+                            columns=[self.table.columns[key].name for key in keys],
+                            records=self._get_copy_records(group, keys),
+                        )
+            except exceptions.PostgresError as exc:
+                raise self._get_exception(exc)
+        return len(rows)
+
+    def _get_copy_records(self, rows: List[dict], keys: List[str]) -> List[tuple]:
+        # COPY bypasses sqlalchemy, so values are converted by column types (e.g. enum to its name) here
+        dialect = postgresql.dialect()
+        processors = [self.table.columns[key].type.bind_processor(dialect) for key in keys]
+        return [
+            tuple(value if process is None or value is None else process(value)
+                  for process, value in zip(processors, (row[key] for key in keys)))
+            for row in rows
+        ]
+
+    def _with_defaults(self, row: Mapping) -> dict:
+        """Evaluate python side column defaults missing in the row, `databases` does it only for single row insert"""
+        row = dict(row)
+        for column in self.table.columns:
+            default = column.default
+            if default is None or column.key in row:
+                continue
+            if default.is_callable:
+                row[column.key] = default.arg(None)
+            elif default.is_sequence:
+                row[column.key] = default.next_value()
+            else:
+                row[column.key] = default.arg
+        return row
+
+    async def update_many(self, rows: Sequence[Mapping], key: Optional[str] = None) -> List[Mapping]:
+        """
+        Update rows matched by `key` (primary key by default) each with its own values,
+        one `UPDATE ... FROM (VALUES ...)` statement per set of updated columns, all in single transaction.
+        Return updated rows, rows which weren't found or have no values to update are skipped
+        """
+        key = key or self.pk_key
+        groups: Dict[frozenset, List[Mapping]] = {}
+        for row in rows:
+            if len(row) > 1:  # nothing to update otherwise
+                groups.setdefault(frozenset(row), []).append(row)
+        if not groups:
+            return []
+        connection = await self.get_connection()
+        updated = []
+        async with connection.transaction():
+            for group in groups.values():
+                updated.extend(await self._fetchall(self.update_many_query(group, key, with_returning=True)))
+        return updated
+
+    def delete_many_query(self, values: Sequence, key: str) -> Delete:
+        column = self.table.columns[key]
+        return delete(self.table).where(any_of(column, values)).returning(column)
+
+    async def delete_many(self, values: Sequence, key: Optional[str] = None) -> List[Any]:
+        """Delete rows which `key` (primary key by default) is one of `values`, return keys of deleted rows"""
+        if not values:
+            return []
+        key = key or self.pk_key
+        deleted = await self._fetchall(self.delete_many_query(values, key))
+        return [row[key] for row in deleted]
+
     async def delete_all(self):
         query = self.delete_all_query()
         return await self._execute(query)
@@ -115,20 +292,90 @@ class PGSARepository(BaseSARepository[Mapping]):
         if result == 0:
             raise self.not_found_exception_cls()
 
-    def get_all_count_query(self) -> Select:
-        return select([func.count(self.pk_column).label("count")])
+    def get_all_count_query(self, query: Optional[Select] = None) -> Select:
+        if query is None:
+            return select([func.count(self.pk_column).label("count")])
+        subquery = query.order_by(None).limit(None).offset(None).subquery()
+        return select([func.count().label("count")]).select_from(subquery)
 
-    async def get_all_count(self) -> int:
-        query = self.get_all_count_query()
+    async def get_all_count(self, query: Optional[Select] = None) -> int:
+        query = self.get_all_count_query(query)
         result = await self._fetchone(query)
         return int(result["count"])
 
+    def get_table_stats_query(self):
+        # rows count as seen by planner, it's updated by VACUUM, ANALYZE and autovacuum
+        query = text(
+            "SELECT c.reltuples AS count FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = COALESCE(:schema, current_schema())"
+        )
+        return query.bindparams(name=self.table.name, schema=self.table.schema)
+
+    def get_explain_query(self, query: Select):
+        query = query.order_by(None).limit(None).offset(None)
+        return self._as_text(query, prefix="EXPLAIN (FORMAT JSON) ")
+
+    @staticmethod
+    def _as_text(query, prefix: str = "") -> TextClause:
+        """Compile the query to textual sql keeping its parameters with their types"""
+        compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"))
+        params = [bindparam(key, value, type_=compiled.binds[key].type) for key, value in compiled.params.items()]
+        return text(f"{prefix}{compiled}").bindparams(*params)
+
+    async def get_estimated_count(self, query: Optional[Select] = None, cache_ttl: float = 0) -> int:
+        """
+        Get rows count estimated by postgres planner, it's cheap, but isn't exact.
+        For whole table statistics from `pg_class` are used, otherwise row estimate of EXPLAIN.
+        """
+        if query is not None and query.whereclause is None:
+            query = None  # not filtered, the same as whole table
+        cache_key = (self.table.fullname, "" if query is None else self._get_statement_key(query))
+        cached = self._estimated_counts.get(cache_key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._estimated_counts.move_to_end(cache_key)
+                return cached[1]
+            del self._estimated_counts[cache_key]
+
+        count = -1
+        if query is None:
+            result = await self._fetchone(self.get_table_stats_query())
+            if result is not None:
+                count = int(result["count"])
+        if count < 0:  # filtered query or table has never been analyzed yet
+            result = await self._fetchone(self.get_explain_query(query if query is not None else self.get_all_query()))
+            plan = result["QUERY PLAN"]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            count = int(plan[0]["Plan"]["Plan Rows"])
+
+        if cache_ttl > 0:
+            self._set_estimated_count(cache_key, count, cache_ttl)
+        return count
+
+    def _set_estimated_count(self, cache_key: Tuple[str, str], count: int, cache_ttl: float) -> None:
+        counts = self._estimated_counts
+        counts[cache_key] = (time.monotonic() + cache_ttl, count)
+        counts.move_to_end(cache_key)
+        while len(counts) > self.estimated_counts_max_size:
+            counts.popitem(last=False)
+
+    @staticmethod
+    def _get_statement_key(query: Select) -> str:
+        compiled = query.compile(dialect=postgresql.dialect())
+        return f"{compiled}{sorted(compiled.params.items())!r}"
+
     async def get(
         self,
         params: Optional[MutableMapping] = None,
         whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
+        query: Optional[Select] = None,
     ) -> Mapping:
-        query = select([self.table])
+        """Get row matching params or whereclause from `query` (select of `columns` by default)"""
+        if query is None:
+            query = self.get_all_query(columns)
         if whereclause is not None:
             query = query.where(whereclause)
             return await self._fetchone(query)
@@ -143,8 +390,9 @@ class PGSARepository(BaseSARepository[Mapping]):
         self,
         params: Optional[MutableMapping] = None,
         whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Mapping]:
-        query = select([self.table])
+        query = self.get_all_query(columns)
         if whereclause:
             query = query.where(whereclause)
             return await self._fetchall(query)
@@ -170,14 +418,129 @@ class PGSARepository(BaseSARepository[Mapping]):
         return DatabaseException(str(exc))
 
 
+class BatchLoader:
+    """
+    Merge lookups of rows by unique key made within one event loop iteration (or `window` seconds)
+    into one `WHERE key = ANY(:values)` query, every caller gets its row or `ObjectNotFound`.
+    Batch is sent as soon as it has `max_batch_size` distinct values. Should be used within one event loop.
+    Repository is passed by callers, so loader doesn't keep database connection alive between batches.
+    Rows are matched to lookups by string form of values, so values have to be of the column's python type
+    (e.g. `UUID`, not its upper-case string), deserialize raw values with the column's field first
+    """
+
+    def __init__(self, key: str, window: float = 0, max_batch_size: int = 1000):
+        self.key = key
+        self.window = window
+        self.max_batch_size = max_batch_size
+        # value as string -> (value, futures of callers waiting for its row)
+        self._pending: Dict[str, Tuple[Any, List[asyncio.Future]]] = {}
+        self._repo: Optional[PGSARepository] = None
+        self._handle: Optional[asyncio.Handle] = None
+        # event loop keeps only weak references to tasks, batches in flight mustn't be garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, repo: PGSARepository, value: Any) -> Mapping:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._repo = self._repo or repo
+        self._pending.setdefault(str(value), (value, []))[1].append(future)
+        if len(self._pending) >= self.max_batch_size:
+            self.dispatch()
+        elif self._handle is None:
+            if self.window > 0:
+                self._handle = loop.call_later(self.window, self.dispatch)
+            else:
+                self._handle = loop.call_soon(self.dispatch)
+        return await future
+
+    def dispatch(self) -> None:
+        """Send pending lookups to the database right now"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        repo, self._repo = self._repo, None
+        if batch:
+            task = asyncio.ensure_future(self._load_batch(repo, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, repo: PGSARepository, batch: Dict[str, Tuple[Any, List[asyncio.Future]]]) -> None:
+        try:
+            rows = await repo.get_many([value for value, _ in batch.values()], self.key)
+        except FieldValidationError:
+            # invalid value fails the whole query, so lookups of the batch are made one by one
+            await asyncio.gather(*(self._load_one(repo, value, futures) for value, futures in batch.values()))
+            return
+        except Exception as exc:
+            for _, futures in batch.values():
+                _set_result(futures, exception=exc)
+            return
+        rows_by_key = {str(row[self.key]): row for row in rows}
+        for key, (_, futures) in batch.items():
+            row = rows_by_key.get(key)
+            if row is None:
+                _set_result(futures, exception=ObjectNotFound())
+            else:
+                _set_result(futures, result=row)
+
+    async def _load_one(self, repo: PGSARepository, value: Any, futures: List[asyncio.Future]) -> None:
+        try:
+            rows = await repo.get_many([value], self.key)
+        except FieldValidationError:
+            rows = []
+        except Exception as exc:
+            _set_result(futures, exception=exc)
+            return
+        if rows:
+            _set_result(futures, result=rows[0])
+        else:
+            _set_result(futures, exception=ObjectNotFound())
+
+
+def _set_result(futures: List[asyncio.Future], result: Any = None, exception: Optional[BaseException] = None) -> None:
+    for future in futures:
+        if future.done():  # caller was cancelled
+            continue
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
 class PGSAService:
+    # `load()` merges lookups made within `batch_window` seconds, one event loop iteration by default
+    batch_window: float = 0
+    batch_max_size: int = 1000
+
+    # event loop -> (table, id of connection, key) -> loader
+    _loaders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, BatchLoader]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
     def __init__(self, model: Table, connection: Optional[Database] = None):
         self.model = model
         self.connection = connection
         self.repo = PGSARepository(model, connection)
 
-    async def get_by_id(self, instance_id: Any) -> Optional[Mapping]:
-        return await self.repo.get_by_id(instance_id)
+    def get_loader(self, key: Optional[str] = None) -> BatchLoader:
+        """Batch loader of the table rows by unique `key` (primary key by default) shared within event loop"""
+        key = key or self.repo.pk_key
+        loaders = self._loaders.setdefault(asyncio.get_running_loop(), {})
+        loader_key = (self.model.fullname, id(self.connection), key)
+        if loader_key not in loaders:
+            loaders[loader_key] = BatchLoader(key, self.batch_window, self.batch_max_size)
+        return loaders[loader_key]
+
+    async def load(self, value: Any, key: Optional[str] = None) -> Mapping:
+        """
+        Get row by unique `key` (primary key by default) value, concurrent calls are merged into one query.
+        Raise `ObjectNotFound` if there is no such row
+        """
+        return await self.get_loader(key).load(self.repo, value)
+
+    async def get_by_id(self, instance_id: Any, columns: Optional[Sequence[str]] = None) -> Optional[Mapping]:
+        return await self.repo.get_by_id(instance_id, columns)
 
     async def get_or_raise_by_id(self, instance_id: Any) -> Mapping:
         return await self.repo.get_or_raise_by_id(instance_id)
@@ -186,25 +549,52 @@ class PGSAService:
         self,
         params: Optional[MutableMapping] = None,
         whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
+        query: Optional[Select] = None,
     ) -> Mapping:
         try:
-            return await self.repo.get(params, whereclause)
+            return await self.repo.get(params, whereclause, columns, query)
         except FieldValidationError:
             raise ObjectNotFound()
 
-    async def all(self) -> List[Mapping]:
-        return await self.repo.get_all()
+    def get_all_query(self, columns: Optional[Sequence[str]] = None) -> Select:
+        return self.repo.get_all_query(columns)
+
+    async def all(self, query: Optional[Select] = None) -> List[Mapping]:
+        return await self.repo.get_all(query)
+
+    def iterate(self, query: Optional[Select] = None) -> AsyncIterator[Mapping]:
+        return self.repo.iterate_all(query)
+
+    async def count(self, query: Optional[Select] = None) -> int:
+        return await self.repo.get_all_count(query)
+
+    async def estimate_count(self, query: Optional[Select] = None, cache_ttl: float = 0) -> int:
+        return await self.repo.get_estimated_count(query, cache_ttl)
 
     async def filter(
         self,
         filter_params: Optional[MutableMapping] = None,
         whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Mapping]:
-        return await self.repo.filter(filter_params, whereclause)
+        return await self.repo.filter(filter_params, whereclause, columns)
 
     async def create(self, params: MutableMapping, with_returning: bool = True) -> Mapping:
         return await self.repo.insert(params, with_returning=with_returning)
 
+    async def create_many(self, params: Sequence[MutableMapping], batch_size: Optional[int] = None) -> List[Mapping]:
+        return await self.repo.insert_many(params, batch_size)
+
+    async def copy_many(self, params: Sequence[Mapping]) -> int:
+        return await self.repo.copy_rows(params)
+
+    async def update_many(self, params: Sequence[Mapping], key: Optional[str] = None) -> List[Mapping]:
+        return await self.repo.update_many(params, key)
+
+    async def delete_many(self, ids: Sequence, key: Optional[str] = None) -> List[Any]:
+        return await self.repo.delete_many(ids, key)
+
     async def update(
         self,
         instance: Union[Mapping, MutableMapping],
@@ -231,3 +621,17 @@ class PGSAService:
             return await self.repo.delete(instance, filter_params, whereclause)
         except FieldValidationError:
             raise ObjectNotFound()
+
+    async def delete_returning(
+        self,
+        filter_params: Optional[MutableMapping] = None,
+        whereclause: Optional[BooleanClauseList] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Mapping:
+        try:
+            instance = await self.repo.delete_returning(filter_params, whereclause, columns)
+        except FieldValidationError:
+            raise ObjectNotFound()
+        if instance is None:
+            raise ObjectNotFound()
+        return instance
@@ -11,6 +11,7 @@ __all__ = [
     "UniqueViolationError",
     "ValidationError",
     "HTTPNotFound",
+    "HTTPServiceUnavailable",
 ]
 
 
@@ -61,6 +62,7 @@ class ValidationError(web.HTTPBadRequest):
 
     def __init__(self, detail=None, **kwargs):
         super().__init__(**kwargs)
+        self.detail = detail
         self._headers[hdrs.CONTENT_TYPE] = "application/json"
         self.text = json.dumps(detail)
 
@@ -70,3 +72,11 @@ class HTTPNotFound(web.HTTPNotFound):
         super().__init__(**kwargs)
         self._headers[hdrs.CONTENT_TYPE] = "application/json"
         self.text = json.dumps({"error": detail or "Not found"})
+
+
+class HTTPServiceUnavailable(web.HTTPServiceUnavailable):
+    def __init__(self, detail: str = None, retry_after: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self._headers[hdrs.CONTENT_TYPE] = "application/json"
+        self._headers[hdrs.RETRY_AFTER] = str(retry_after)
+        self.text = json.dumps({"error": detail or "Service unavailable"})
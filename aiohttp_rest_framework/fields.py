@@ -15,7 +15,7 @@ from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from aiohttp_rest_framework.types import SASerializerFieldMapping
 from aiohttp_rest_framework.utils import ClassLookupDict, safe_issubclass
 
-__all__ = ["Enum", "UUID", "Interval"] + ma_fields_all
+__all__ = ["Enum", "UUID", "Interval", "register_field_mapping"] + ma_fields_all
 
 # A flag to mark that marshamallow fields were patched by aiohttp-rest-framework
 # i.e. `read_only` and `write_only` were mapped to `dump_only` and `load_only`,
@@ -52,7 +52,7 @@ def patch_marshmallow_fields():
     # also update mapping with patched classes
     for key, value in sa_ma_pg_field_mapping.items():
         if value.__name__ in ma_fields:
-            sa_ma_pg_field_mapping[key] = ma_fields[value.__name__]  # noqa
+            sa_ma_pg_field_lookup[key] = ma_fields[value.__name__]  # noqa
 
     _MA_FIELDS_PATCHED = True
 
@@ -195,6 +195,17 @@ sa_ma_pg_field_mapping: SASerializerFieldMapping = {
     JSON: ma.fields.Dict,
 }
 
+# shared by field builders, resolved field class is cached per column type class
+sa_ma_pg_field_lookup: ClassLookupDict = ClassLookupDict(sa_ma_pg_field_mapping)
+
+
+def register_field_mapping(sa_type: typing.Type[sa.types.TypeEngine], field_cls: typing.Type[ma.fields.Field]) -> None:
+    """
+    Build fields of `sa_type` columns (or of its subclasses, if they aren't registered themselves) with `field_cls`.
+    Call it at startup, before serializers are used
+    """
+    sa_ma_pg_field_lookup[sa_type] = field_cls
+
 
 class FieldBuilderABC(metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -207,6 +218,8 @@ class FieldBuilderABC(metaclass=abc.ABCMeta):
 
 
 class SAFieldBuilder(FieldBuilderABC):
+    field_lookup: ClassLookupDict = sa_ma_pg_field_lookup
+
     def build(
         self,
         name: str,
@@ -220,8 +233,7 @@ class SAFieldBuilder(FieldBuilderABC):
             f"in {model.name} model"
         )
 
-        mapping = ClassLookupDict(sa_ma_pg_field_mapping)
-        field_cls = mapping.get(column.type, ma.fields.Inferred)
+        field_cls = self.field_lookup.get(column.type, ma.fields.Inferred)
 
         self._set_db_specific_kwargs(kwargs, column)
         self._set_field_specific_kwargs(kwargs, field_cls, column)
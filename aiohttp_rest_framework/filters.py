@@ -0,0 +1,214 @@
+import logging
+import operator
+import typing
+
+import marshmallow as ma
+import sqlalchemy as sa
+from aiohttp import web
+from sqlalchemy.sql import Select
+
+from aiohttp_rest_framework.db.pg_sa import any_of
+from aiohttp_rest_framework.exceptions import ValidationError
+from aiohttp_rest_framework.types import Ordering
+from aiohttp_rest_framework.utils import is_column_indexed
+
+__all__ = (
+    "LOOKUP_SEP",
+    "LOOKUPS",
+    "BaseFilterBackend",
+    "FilterTemplate",
+    "FieldsFilter",
+    "OrderingFilter",
+    "parse_ordering",
+    "get_order_by",
+    "check_views_indexes",
+)
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_SEP = "__"
+
+# lookup name -> function which builds predicate for the column and coerced value
+LOOKUPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": any_of,
+    "isnull": lambda column, value: column.is_(None) if value else column.isnot(None),
+    "startswith": lambda column, value: column.startswith(value, autoescape=True),
+}
+# lookups which take comma separated list of values, e.g. `?id__in=1,2,3`
+MULTIPLE_VALUES_LOOKUPS = ("in",)
+# lookups which take boolean value regardless of the column type
+BOOLEAN_LOOKUPS = ("isnull",)
+
+_boolean_field = ma.fields.Boolean()
+
+
+class BaseFilterBackend:
+    def filter_query(self, query: Select, request: web.Request, view) -> Select:
+        """
+        Return filtered query
+        """
+        raise NotImplementedError()
+
+
+class FilterTemplate(typing.NamedTuple):
+    column: sa.Column
+    lookup: str
+    field: ma.fields.Field
+
+    def coerce(self, raw_value: str) -> typing.Any:
+        if self.lookup in MULTIPLE_VALUES_LOOKUPS:
+            return [self.field.deserialize(value) for value in raw_value.split(",")]
+        if self.lookup in BOOLEAN_LOOKUPS:
+            return _boolean_field.deserialize(raw_value)
+        return self.field.deserialize(raw_value)
+
+    def get_clause(self, value: typing.Any) -> sa.sql.ClauseElement:
+        return LOOKUPS[self.lookup](self.column, value)
+
+
+class FieldsFilter(BaseFilterBackend):
+    """
+    Filter by query params declared in view's `filter_fields`, e.g.
+    `filter_fields = {"email": ["eq", "in"], "created_at": ["gte", "lt"]}`
+    allows `?email=...`, `?email__in=a,b` and `?created_at__gte=...&created_at__lt=...`.
+    Sequence of column names can be used for equality lookups only.
+
+    Values are coerced with fields built by config's field builder for the model columns.
+    Templates are compiled once per view class.
+    """
+
+    # view class -> query param -> template
+    _templates: typing.Dict[type, typing.Dict[str, FilterTemplate]] = {}
+
+    def filter_query(self, query: Select, request: web.Request, view) -> Select:
+        templates = self.get_templates(view)
+        clauses = []
+        errors = {}
+        for query_param, template in templates.items():
+            for raw_value in request.query.getall(query_param, ()):
+                try:
+                    value = template.coerce(raw_value)
+                except ma.ValidationError as exc:
+                    errors[query_param] = exc.messages
+                    break
+                clauses.append(template.get_clause(value))
+        if errors:
+            raise ValidationError(errors)
+        if clauses:
+            query = query.where(sa.and_(*clauses))
+        return query
+
+    def get_templates(self, view) -> typing.Dict[str, FilterTemplate]:
+        view_class = view.__class__
+        if view_class not in self._templates:
+            self._templates[view_class] = self.compile_templates(view)
+        return self._templates[view_class]
+
+    def compile_templates(self, view) -> typing.Dict[str, FilterTemplate]:
+        filter_fields = get_filter_fields(view)
+        if not filter_fields:
+            return {}
+        model: sa.Table = view.model
+        serializer = view.get_serializer()
+        field_builder = view.rest_config.field_builder()
+        templates = {}
+        for field_name, lookups in filter_fields.items():
+            assert field_name in model.columns, (
+                f"`{field_name}` from {view.__class__.__name__}'s `filter_fields` "
+                f"was not found in {model.name} model"
+            )
+            field = field_builder.build(name=field_name, serializer=serializer)
+            for lookup in lookups:
+                assert lookup in LOOKUPS, (
+                    f"Unknown lookup `{lookup}` for `{field_name}`, has to be one of {', '.join(LOOKUPS)}"
+                )
+                query_param = field_name if lookup == "eq" else f"{field_name}{LOOKUP_SEP}{lookup}"
+                templates[query_param] = FilterTemplate(model.columns[field_name], lookup, field)
+        return templates
+
+
+class OrderingFilter(BaseFilterBackend):
+    """
+    Order by `?ordering=-created_at,id` query param (prefix "-" means descending order).
+    Only columns listed in view's `ordering_fields` are allowed,
+    view's `ordering` is used when the param isn't passed, and primary key otherwise.
+    Primary key is always added as the last key to break ties, so the order is stable.
+    """
+
+    ordering_param = "ordering"
+
+    def filter_query(self, query: Select, request: web.Request, view) -> Select:
+        ordering = self.get_ordering(request, view) or [(get_pk_column(view.model), False)]
+        return query.order_by(None).order_by(*get_order_by(ordering))
+
+    def get_ordering(self, request: web.Request, view) -> typing.Optional[Ordering]:
+        """Get ordering requested by client or view's default one, `None` if neither of them is set"""
+        field_names = self.get_requested_field_names(request, view) or getattr(view, "ordering", None)
+        if not field_names:
+            return None
+        return parse_ordering(field_names, view.model)
+
+    def get_requested_field_names(self, request: web.Request, view) -> typing.Optional[typing.List[str]]:
+        ordering_fields = getattr(view, "ordering_fields", None)
+        if not ordering_fields or not request.query.get(self.ordering_param):
+            return None
+        field_names = [name.strip() for name in request.query[self.ordering_param].split(",") if name.strip()]
+        invalid_names = [name for name in field_names if name.lstrip("-") not in ordering_fields]
+        if invalid_names:
+            raise ValidationError({"error": f"Invalid fields in `{self.ordering_param}`: {', '.join(invalid_names)}"})
+        return field_names
+
+
+def parse_ordering(field_names: typing.Sequence[str], model: sa.Table) -> Ordering:
+    """Convert column names (prefixed with "-" for descending order) to ordering with primary key tie-breaker"""
+    ordering = []
+    for field_name in field_names:
+        ordering.append((model.columns[field_name.lstrip("-")], field_name.startswith("-")))
+    pk_column = get_pk_column(model)
+    if not any(column is pk_column for column, _ in ordering):
+        ordering.append((pk_column, False))
+    return ordering
+
+
+def get_order_by(ordering: Ordering) -> typing.List[sa.sql.ClauseElement]:
+    return [column.desc() if desc else column.asc() for column, desc in ordering]
+
+
+def get_pk_column(model: sa.Table) -> sa.Column:
+    # the same as `CommonQueryBuilderMixin.pk_column`, first primary key
+    return model.columns[model.primary_key.columns.keys()[0]]
+
+
+def get_filter_fields(view) -> typing.Dict[str, typing.Sequence[str]]:
+    filter_fields = getattr(view, "filter_fields", None) or {}
+    if not isinstance(filter_fields, typing.Mapping):
+        filter_fields = {field_name: ("eq",) for field_name in filter_fields}
+    return filter_fields
+
+
+async def check_views_indexes(app: web.Application) -> None:
+    """Warn about the app's views filter and ordering fields which columns have no index"""
+    views = {route.handler for route in app.router.routes()}
+    for view in views:
+        serializer_class = getattr(view, "serializer_class", None)
+        model = getattr(getattr(serializer_class, "opts", None), "model", None)
+        if model is None:
+            continue
+        checks = (
+            ("filters", get_filter_fields(view)),
+            ("orders", getattr(view, "ordering_fields", None) or ()),
+        )
+        for action, field_names in checks:
+            for field_name in field_names:
+                column = model.columns.get(field_name)
+                if column is not None and not is_column_indexed(column):
+                    logger.warning(
+                        "%s %s by `%s` column of `%s` table, which has no index",
+                        view.__name__, action, field_name, model.name,
+                    )
@@ -0,0 +1,62 @@
+import asyncio
+import typing
+
+__all__ = (
+    "ConcurrencyLimiter",
+)
+
+
+class ConcurrencyLimiter:
+    """
+    Admit up to `max_concurrency` concurrent requests, up to `max_queue` more requests wait for a free slot
+    for `queue_timeout` seconds at most (without limit if it's `None`), the rest are shed.
+    Should be used within one event loop
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0, queue_timeout: typing.Optional[float] = None):
+        assert max_concurrency > 0, "`max_concurrency` has to be positive"
+        assert max_queue >= 0, "`max_queue` has to be non negative"
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # totals: admitted requests, admitted ones which were queued first and shed ones
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        """Wait for a free slot, return `False` if the request has to be shed"""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.waiting -= 1
+            self.queued += 1
+        else:
+            await self._semaphore.acquire()  # doesn't block
+        self.admitted += 1
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> typing.Dict[str, int]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
@@ -1,6 +1,13 @@
-from aiohttp import web
+import typing
 
+import marshmallow as ma
+from aiohttp import hdrs, web
+
+from aiohttp_rest_framework.exceptions import DatabaseException, HTTPNotFound, ObjectNotFound, ValidationError
+from aiohttp_rest_framework.parsers import BaseParser, CSVParser, NDJSONParser
+from aiohttp_rest_framework.renderers import BaseRenderer
 from aiohttp_rest_framework.serializers import Serializer
+from aiohttp_rest_framework.utils import add_vary
 
 __all__ = (
     "CreateModelMixin",
@@ -8,64 +15,449 @@ __all__ = (
     "RetrieveModelMixin",
     "UpdateModelMixin",
     "DestroyModelMixin",
+    "BulkUpdateModelMixin",
+    "BulkDestroyModelMixin",
 )
 
 
 class CreateModelMixin:
+    # accept json array of objects and create them in bulk
+    allow_bulk_create: bool = False
+    # objects are inserted with one multi-row INSERT per batch
+    bulk_create_batch_size: int = 500
+    # reject all objects if any of them is invalid or can't be inserted,
+    # otherwise valid objects are created and errors are reported per item
+    bulk_create_atomic: bool = False
+    # load NDJSON or CSV body incrementally and insert objects with COPY, see `ingest()`
+    allow_ingest: bool = False
+    ingest_parsers: typing.Sequence[BaseParser] = (NDJSONParser(), CSVParser())
+    # objects are validated and copied by batches, memory consumption depends on batch size only
+    ingest_batch_size: int = 5000
+    # max amount of rejected objects reported with their errors, `0` to report just the count
+    ingest_max_rejection_details: int = 1000
+
     async def create(self):
-        data = await self.request.text()
-        serializer = self.get_serializer(data=data, as_text=True)
+        if self.allow_ingest:
+            parser = self.get_ingest_parser()
+            if parser is not None:
+                return await self.ingest(parser)
+        data = await self.get_request_data()
+        if self.allow_bulk_create and isinstance(data, list):
+            return await self.bulk_create(data)
+        serializer = self.get_serializer(data=data, copy_data=False)
         serializer.is_valid(raise_exception=True)
 
         await self.perform_create(serializer)
-        return web.json_response(serializer.data, status=201)
+        return self.render(serializer.data, status=201)
 
     async def perform_create(self, serializer: Serializer):
-        return await serializer.save()
+        instance = await serializer.save()
+        self.invalidate_cache()
+        return instance
+
+    async def bulk_create(self, data: typing.List):
+        """
+        Respond with 201 and list of created objects if all of them are created,
+        with 207 and `{"results": [...], "errors": {index: errors}}` if some of them are
+        (`results` keep positions of objects in request, `null` for failed ones)
+        and with 400 and errors by index if none of them are.
+        """
+        serializer = self.get_serializer(data=data, many=True, copy_data=False)
+        serializer.is_valid(raise_exception=self.bulk_create_atomic)
+        errors = dict(serializer.errors)
+        items = [(index, item) for index, item in enumerate(serializer.validated_data) if item is not None]
+
+        instances = await self.perform_bulk_create(serializer, items, errors)
+        if not instances:
+            raise ValidationError(errors)
+        self.invalidate_cache()
+        created = dict(zip(
+            (index for index, _ in items if index not in errors),
+            serializer.to_representation(instances),
+        ))
+        if not errors:
+            return self.render(list(created.values()), status=201)
+        results = [created.get(index) for index in range(len(serializer.validated_data))]
+        return self.render({"results": results, "errors": errors}, status=207)
+
+    async def perform_bulk_create(self, serializer: Serializer, items: typing.List[typing.Tuple[int, dict]],
+                                  errors: typing.Dict[int, typing.Any]) -> typing.List:
+        """Create objects from `(index, validated_data)` items, store errors of failed ones by index"""
+        batch_size = self.bulk_create_batch_size
+        if self.bulk_create_atomic:
+            return await serializer.create_many([item for _, item in items], batch_size)
+
+        instances = []
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            try:
+                instances.extend(await serializer.create_many([item for _, item in batch]))
+            except ValidationError:
+                # insert objects of failed batch one by one to find out which of them are failed
+                for index, item in batch:
+                    try:
+                        instances.append(await serializer.create(item))
+                    except ValidationError as exc:
+                        errors[index] = exc.detail
+        return instances
+
+    def get_ingest_parser(self) -> typing.Optional[BaseParser]:
+        for parser in self.ingest_parsers:
+            if parser.media_type == self.request.content_type:
+                return parser
+        return None
+
+    async def ingest(self, parser: BaseParser):
+        """
+        Read objects from request body as they arrive, validate them by batches
+        and insert valid ones with COPY batch by batch, so big loads aren't kept in memory.
+        Respond with `{"inserted": n, "rejected": n, "errors": {index: errors}}`,
+        index is position of object in the body (CSV header isn't counted).
+        Objects of a batch which COPY failed are rejected all together
+        """
+        summary = {"inserted": 0, "rejected": 0, "errors": {}}
+        batch = []
+        start = 0
+        async for item in parser.iter_parse(self.request.content):
+            batch.append(item)
+            if len(batch) >= self.ingest_batch_size:
+                await self.ingest_batch(batch, start, summary)
+                start += len(batch)
+                batch = []
+        if batch:
+            await self.ingest_batch(batch, start, summary)
+        if summary["inserted"]:
+            self.invalidate_cache()
+        return self.render(summary)
+
+    async def ingest_batch(self, items: typing.List, start: int, summary: typing.Dict[str, typing.Any]) -> None:
+        """Validate and copy parsed objects, `start` is index of the first one in the body"""
+        errors = {}
+        parsed = []
+        for index, item in enumerate(items, start):
+            if isinstance(item, ValidationError):
+                errors[index] = item.detail
+            else:
+                parsed.append((index, item))
+
+        valid = []
+        if parsed:
+            serializer = self.get_serializer(data=[item for _, item in parsed], many=True, copy_data=False)
+            serializer.is_valid()
+            for position, item_errors in serializer.errors.items():
+                errors[parsed[position][0]] = item_errors
+            valid = [(index, data) for (index, _), data in zip(parsed, serializer.validated_data) if data is not None]
+
+        if valid:
+            try:
+                summary["inserted"] += await self.perform_ingest(serializer, [data for _, data in valid])
+            except ValidationError as exc:
+                for index, _ in valid:
+                    errors[index] = exc.detail
+
+        summary["rejected"] += len(errors)
+        details = summary["errors"]
+        for index in sorted(errors)[:max(self.ingest_max_rejection_details - len(details), 0)]:
+            details[index] = errors[index]
+
+    async def perform_ingest(self, serializer: Serializer, validated_data: typing.List[dict]) -> int:
+        return await serializer.copy_many(validated_data)
 
 
 class ListModelMixin:
+    # stream response as chunked json array, fetching objects from database with cursor,
+    # so memory consumption doesn't depend on amount of objects
+    streaming: bool = False
+    streaming_chunk_size: int = 500
+    # renderers of list in addition to view's ones, chosen by `Accept` header, e.g. `(NDJSONRenderer(), CSVRenderer())`.
+    # Streaming renderers always stream whole list ignoring pagination, caching and etags, so they are opt-in
+    export_renderers: typing.Sequence[BaseRenderer] = ()
+
+    def get_renderers(self) -> typing.Sequence[BaseRenderer]:
+        renderers = super().get_renderers()
+        if self.request.method == hdrs.METH_GET:
+            return (*renderers, *self.export_renderers)
+        return renderers
+
     async def list(self):
-        instances = await self.get_list()
-        serializer = self.get_serializer(instances, many=True)
-        return web.json_response(serializer.data)
+        if self.streaming or self.get_renderer().streaming:
+            return await self.stream_list()
+        # version is queried only to answer conditional request, otherwise etag is derived from fetched objects
+        etag = await self.get_version_etag() if hdrs.IF_NONE_MATCH in self.request.headers else None
+        if etag is not None and self.is_not_modified(etag):
+            return self.get_not_modified_response(etag)
+        response = self.get_cached_response()
+        if response is not None:
+            return self.get_conditional_response(response, etag)
+        response = await self.coalesce(lambda: self.get_list_response(etag))
+        return self.get_conditional_response(response)
+
+    async def get_list_response(self, etag: typing.Optional[str] = None) -> web.Response:
+        page = await self.paginate_list()
+        if page is not None:
+            page = await self.prefetch(page)
+            serializer = self.get_render_serializer(page, many=True, **self.get_sparse_fields_kwargs())
+            response = self.get_paginated_response(serializer.data)
+        else:
+            instances = await self.prefetch(await self.get_list())
+            serializer = self.get_render_serializer(instances, many=True, **self.get_sparse_fields_kwargs())
+            response = self.render(serializer.data)
+            if etag is None:
+                etag = self.get_fetched_version_etag(instances)
+        # compressed form is cached, so it isn't compressed again on every hit
+        response = await self.compress_response(response)
+        self.set_etag(response, etag)
+        self.cache_response(response)
+        return response
+
+    async def stream_list(self):
+        renderer = self.get_renderer()
+        kwargs = self.get_sparse_fields_kwargs()
+        relations = tuple(prefetch.to_attr for prefetch in self.get_prefetches())
+        if relations:
+            # cursor holds the connection while streaming, so related objects can't be fetched
+            kwargs["exclude"] = kwargs.get("exclude", ()) + relations
+        serializer = self.get_render_serializer(many=True, **kwargs)
+        field_names = [field.data_key or name for name, field in serializer.dump_fields.items()]
+        chunks = self.iter_list(self.streaming_chunk_size)
+        try:
+            # fetch first chunk before sending headers, so early errors get proper http response
+            instances = await chunks.__anext__()
+        except StopAsyncIteration:
+            instances = None
+
+        response = web.StreamResponse(headers={hdrs.CONTENT_TYPE: renderer.content_type})
+        if self.is_negotiated():
+            # headers can't be changed by `finalize_response()` after streaming
+            add_vary(response.headers, hdrs.ACCEPT)
+        response.enable_chunked_encoding()
+        coding = self.get_content_coding()
+        if coding is not None:
+            response.enable_compression(web.ContentCoding(coding))
+        await response.prepare(self.request)
+        try:
+            await _write(response, renderer.render_stream_start(field_names))
+            if instances is not None:
+                data = serializer.to_representation(instances)
+                await _write(response, renderer.render_stream_chunk(data, field_names, first=True))
+                async for instances in chunks:
+                    data = serializer.to_representation(instances)
+                    await _write(response, renderer.render_stream_chunk(data, field_names, first=False))
+        finally:
+            # close cursor (and its transaction) even if client went away in the middle
+            await chunks.aclose()
+        await response.write_eof(renderer.render_stream_end())
+        return response
 
 
 class RetrieveModelMixin:
     async def retrieve(self):
-        instance = await self.get_object()
-        serializer = self.get_serializer(instance)
-        return web.json_response(serializer.data)
+        # version is queried only to answer conditional request, otherwise etag is derived from fetched objects
+        etag = await self.get_version_etag() if hdrs.IF_NONE_MATCH in self.request.headers else None
+        if etag is not None and self.is_not_modified(etag):
+            return self.get_not_modified_response(etag)
+        response = self.get_cached_response()
+        if response is not None:
+            return self.get_conditional_response(response, etag)
+        response = await self.coalesce(lambda: self.get_retrieve_response(etag))
+        return self.get_conditional_response(response)
+
+    async def get_retrieve_response(self, etag: typing.Optional[str] = None) -> web.Response:
+        columns = self.get_sparse_columns()
+        # `columns` are passed only if they are needed, so overridden `get_object(self)` keeps working
+        instance = await (self.get_object() if columns is None else self.get_object(columns=columns))
+        [instance] = await self.prefetch([instance])
+        if etag is None:
+            etag = self.get_fetched_version_etag([instance])
+        serializer = self.get_render_serializer(instance, **self.get_sparse_fields_kwargs())
+        response = self.render(serializer.data)
+        # compressed form is cached, so it isn't compressed again on every hit
+        response = await self.compress_response(response)
+        self.set_etag(response, etag)
+        self.cache_response(response, instance)
+        return response
 
 
 class UpdateModelMixin:
+    # update object with single `UPDATE ... WHERE <lookup> = :value RETURNING *` query
+    # instead of fetching it first. Serializers with `requires_instance` Meta option
+    # are always given the current object, so they are updated the usual way
+    single_query_update: bool = False
+
     async def update(self):
+        partial = self.kwargs.pop("partial", False)
+        if self.single_query_update and not self.get_serializer_class().opts.requires_instance:
+            return await self.update_by_lookup(partial)
+
         instance = await self.get_object()
 
-        data = await self.request.text()
-        partial = self.kwargs.pop("partial", False)
-        serializer = self.get_serializer(instance, data=data, as_text=True,
-                                         partial=partial)
+        data = await self.get_request_data()
+        serializer = self.get_serializer(instance, data=data, partial=partial, copy_data=False)
         serializer.is_valid(raise_exception=True)
 
         await self.perform_update(serializer)
 
-        return web.json_response(serializer.data)
+        return self.render(serializer.data)
 
     def partial_update(self):
         self.kwargs["partial"] = True
         return self.update()
 
     async def perform_update(self, serializer: Serializer):
-        return await serializer.save()
+        instance = await serializer.save()
+        self.invalidate_cache(instance)
+        return instance
+
+    async def update_by_lookup(self, partial: bool):
+        lookup_params = self.get_lookup_params()
+        try:
+            # invalid lookup value can't match any object
+            self.build_lookup_field().deserialize(lookup_params[self.lookup_field])
+        except ma.ValidationError:
+            raise HTTPNotFound()
+
+        data = await self.get_request_data()
+        serializer = self.get_serializer(data=data, partial=partial, copy_data=False)
+        serializer.is_valid(raise_exception=True)
+
+        instance = await self.perform_single_query_update(serializer, lookup_params)
+        if instance is None:
+            raise HTTPNotFound()
+        return self.render(serializer.data)
+
+    async def perform_single_query_update(self, serializer: Serializer, lookup_params: typing.Dict[str, typing.Any]):
+        """Update object found by `lookup_params`, return `None` if there is no such object"""
+        instance = await serializer.update_by_lookup(lookup_params, serializer.validated_data)
+        if instance is not None:
+            self.invalidate_cache(instance)
+        return instance
 
 
 class DestroyModelMixin:
+    # delete object with single `DELETE ... WHERE <lookup> = :value RETURNING ...` query
+    # instead of fetching it first, `perform_destroy()` isn't called then
+    single_query_destroy: bool = False
+    # columns of deleted object passed to `post_destroy()` with `single_query_destroy`,
+    # primary key is always returned, `None` means all columns
+    destroy_returning_columns: typing.Optional[typing.Sequence[str]] = ()
+
     async def destroy(self):
-        instance = await self.get_object()
-        await self.perform_destroy(instance)
+        if self.single_query_destroy:
+            instance = await self.perform_single_query_destroy()
+        else:
+            instance = await self.get_object()
+            await self.perform_destroy(instance)
+        await self.post_destroy(instance)
         return web.HTTPNoContent()
 
     async def perform_destroy(self, instance):
         db_service = await self.get_db_service()
         await db_service.delete(instance)
+        self.invalidate_cache(instance)
+
+    async def perform_single_query_destroy(self):
+        """Delete object by url lookup and return its `destroy_returning_columns`"""
+        columns = self.destroy_returning_columns
+        if columns is not None:
+            pk_names = self.model.primary_key.columns.keys()
+            columns = [*pk_names, *(name for name in columns if name not in pk_names)]
+        db_service = await self.get_db_service()
+        try:
+            instance = await db_service.delete_returning(self.get_lookup_params(), columns=columns)
+        except ObjectNotFound:
+            raise HTTPNotFound()
+        self.invalidate_cache(instance)
+        return instance
+
+    async def post_destroy(self, instance):
+        """Called with deleted object, override it to do something after deletion"""
+
+
+class BulkUpdateModelMixin:
+    async def bulk_update(self):
+        """
+        Partially update objects from json array of `{<lookup field>: value, ...changes}`,
+        respond with amount of updated objects, lookup values which weren't found and updated objects
+        """
+        items = await self.get_request_data()
+        serializer = self.get_serializer(data=items, many=True, partial=True, copy_data=False)
+        serializer.is_valid(raise_exception=True)
+        self.check_bulk_lookups(serializer.validated_data)
+
+        instances = await self.perform_bulk_update(serializer)
+        updated = {str(instance[self.lookup_field]) for instance in instances}
+        not_found = [
+            item[self.lookup_field] for item, validated in zip(items, serializer.validated_data)
+            if str(validated[self.lookup_field]) not in updated
+        ]
+        return self.render({
+            "updated": len(instances),
+            "not_found": not_found,
+            "results": serializer.to_representation(instances),
+        })
+
+    def check_bulk_lookups(self, items: typing.List[dict]) -> None:
+        """Every item has to have unique lookup value and at least one field to update"""
+        errors = {}
+        seen = set()
+        for index, item in enumerate(items):
+            value = item.get(self.lookup_field)
+            if value is None:
+                errors[index] = {self.lookup_field: ["Missing data for required field."]}
+            elif str(value) in seen:
+                errors[index] = {self.lookup_field: ["Duplicate value."]}
+            elif len(item) == 1:
+                # such item wouldn't be updated and would be reported as not found
+                errors[index] = {"error": ["No fields to update."]}
+            seen.add(str(value))
+        if errors:
+            raise ValidationError(errors)
+
+    async def perform_bulk_update(self, serializer: Serializer) -> typing.List:
+        instances = await serializer.update_many(serializer.validated_data, self.lookup_field)
+        self.invalidate_cache(*instances)
+        return instances
+
+
+class BulkDestroyModelMixin:
+    async def bulk_destroy(self):
+        """
+        Delete objects by lookup values passed as `{"ids": [...]}`,
+        respond with amount of deleted objects and lookup values which weren't found
+        """
+        data = await self.get_request_data()
+        ids = data.get("ids") if isinstance(data, dict) else None
+        if not ids or not isinstance(ids, list):
+            raise ValidationError({"ids": ["Not a valid non-empty list."]})
+
+        field = self.build_lookup_field()
+        values = []
+        errors = {}
+        for index, value in enumerate(ids):
+            try:
+                values.append(field.deserialize(value))
+            except ma.ValidationError as exc:
+                errors[index] = exc.messages
+        if errors:
+            raise ValidationError({"ids": errors})
+
+        deleted = {str(value) for value in await self.perform_bulk_destroy(values)}
+        not_found = [raw for raw, value in zip(ids, values) if str(value) not in deleted]
+        return self.render({"deleted": len(deleted), "not_found": not_found})
+
+    async def perform_bulk_destroy(self, ids: typing.List) -> typing.List:
+        """Delete objects and return lookup values of deleted ones"""
+        db_service = await self.get_db_service()
+        try:
+            deleted = await db_service.delete_many(ids, self.lookup_field)
+        except DatabaseException as e:
+            raise ValidationError({"error": e.message})
+        # lookup values aren't necessarily primary keys
+        self.invalidate_cache(all_objects=True)
+        return deleted
+
+
+async def _write(response: web.StreamResponse, data: bytes) -> None:
+    # empty chunk would end chunked response
+    if data:
+        await response.write(data)
@@ -0,0 +1,267 @@
+import base64
+import binascii
+import enum
+import json
+import typing
+
+import sqlalchemy as sa
+from aiohttp import hdrs, web
+from sqlalchemy.sql import Select
+
+from aiohttp_rest_framework.exceptions import FieldValidationError, ValidationError
+from aiohttp_rest_framework.filters import OrderingFilter, get_order_by, parse_ordering
+from aiohttp_rest_framework.types import Ordering
+
+__all__ = (
+    "COUNT_EXACT",
+    "COUNT_ESTIMATE",
+    "BasePagination",
+    "KeysetPagination",
+    "LimitOffsetPagination",
+)
+
+# ways to get total count of objects for `LimitOffsetPagination`, `None` means don't count at all
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, None)
+
+
+class BasePagination:
+    async def paginate_query(self, query: Select, request: web.Request, view) -> typing.List:
+        """
+        Apply pagination to the query, execute it and return objects of current page
+        """
+        raise NotImplementedError()
+
+    def get_paginated_response(self, data) -> web.StreamResponse:
+        raise NotImplementedError()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (also known as seek or cursor) pagination.
+
+    Instead of OFFSET the ordering key of the last object on the page is encoded
+    into opaque cursor and next page continues from it with `WHERE (key) > (:last)`,
+    so every page costs the same no matter how deep the client goes.
+    Ordering columns should be not nullable and have an index.
+    """
+
+    page_size: int = 50
+    page_size_query_param: typing.Optional[str] = "page_size"
+    max_page_size: int = 1000
+    cursor_query_param: str = "cursor"
+    # column names, prefix with "-" for descending order, primary key is used by default.
+    # Ordering of view's `OrderingFilter` takes precedence over it
+    ordering: typing.Sequence[str] = ()
+    # put link to the next page into `Link` header instead of response body
+    link_header: bool = False
+
+    invalid_cursor_message = "Invalid cursor"
+
+    request: web.Request = None
+    view = None
+    next_cursor: typing.Optional[str] = None
+
+    async def paginate_query(self, query: Select, request: web.Request, view) -> typing.List:
+        self.request = request
+        self.view = view
+        db_service = await view.get_db_service()
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, view)
+
+        # ordering values are needed for the next cursor, even if they are not requested
+        selected_names = query.selected_columns.keys()
+        missing_columns = [column for column, _ in ordering if column.name not in selected_names]
+        if missing_columns:
+            query = query.add_columns(*missing_columns)
+
+        cursor = self.decode_cursor(request, ordering)
+        if cursor is not None:
+            query = query.where(self.get_seek_clause(ordering, cursor))
+        # fetch one extra row to find out whether there is a next page
+        query = query.order_by(None).order_by(*get_order_by(ordering)).limit(page_size + 1)
+
+        try:
+            instances = await db_service.all(query)
+        except FieldValidationError:
+            # cursor values can't be converted to the column types
+            raise ValidationError({"error": self.invalid_cursor_message})
+        has_next = len(instances) > page_size
+        instances = instances[:page_size]
+        self.next_cursor = self.encode_cursor(instances[-1], ordering) if has_next else None
+        return instances
+
+    def get_paginated_response(self, data) -> web.StreamResponse:
+        next_link = self.get_next_link()
+        if self.link_header:
+            headers = {hdrs.LINK: f'<{next_link}>; rel="next"'} if next_link else None
+            return self.view.render(data, headers=headers)
+        return self.view.render({"next": next_link, "results": data})
+
+    def get_next_link(self) -> typing.Optional[str]:
+        if self.next_cursor is None:
+            return None
+        return str(self.request.url.update_query({self.cursor_query_param: self.next_cursor}))
+
+    def get_page_size(self, request: web.Request) -> int:
+        if self.page_size_query_param:
+            page_size = _get_positive_int(request, self.page_size_query_param)
+            if page_size:
+                return min(page_size, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, request: web.Request, view) -> Ordering:
+        for backend_class in getattr(view, "filter_backends", ()):
+            if issubclass(backend_class, OrderingFilter):
+                ordering = backend_class().get_ordering(request, view)
+                if ordering is not None:
+                    return ordering
+        # primary key breaks ties between equal keys, so the order is always stable
+        return parse_ordering(self.ordering, view.model)
+
+    def get_seek_clause(self, ordering: Ordering, values: typing.List) -> sa.sql.ClauseElement:
+        columns = [column for column, _ in ordering]
+        params = [self._get_typed_param(column, value) for column, value in zip(columns, values)]
+        directions = {desc for _, desc in ordering}
+        if len(directions) == 1:
+            # row values comparison `(a, b) > (:a, :b)` can be served by composite index
+            left, right = sa.tuple_(*columns), sa.tuple_(*params)
+            return left < right if directions.pop() else left > right
+
+        # mixed directions: `a > :a OR (a = :a AND b < :b) OR ...`
+        clauses = []
+        for i, (column, desc) in enumerate(ordering):
+            equals = [columns[j] == params[j] for j in range(i)]
+            compare = column < params[i] if desc else column > params[i]
+            clauses.append(sa.and_(*equals, compare))
+        return sa.or_(*clauses)
+
+    @staticmethod
+    def _get_typed_param(column: sa.Column, value: str):
+        # cursor keeps values as text, let database convert them to the column type
+        return sa.cast(sa.cast(sa.literal(value), sa.Text), column.type)
+
+    def encode_cursor(self, instance: typing.Mapping, ordering: Ordering) -> str:
+        values = [self._to_cursor_value(instance[column.name]) for column, _ in ordering]
+        # padding is stripped to keep cursor url friendly
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _to_cursor_value(value) -> str:
+        if isinstance(value, enum.Enum):
+            return value.name
+        return str(value)
+
+    def decode_cursor(self, request: web.Request, ordering: Ordering) -> typing.Optional[typing.List[str]]:
+        encoded = request.query.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode((encoded + padding).encode()))
+        except (binascii.Error, ValueError):
+            raise ValidationError({"error": self.invalid_cursor_message})
+        is_valid = isinstance(values, list) and all(isinstance(value, str) for value in values)
+        if not is_valid or len(values) != len(ordering):
+            raise ValidationError({"error": self.invalid_cursor_message})
+        return values
+
+
+class LimitOffsetPagination(BasePagination):
+    """
+    Classic `?limit=&offset=` pagination.
+
+    Total count is reported depending on `count_mode`:
+    `COUNT_EXACT` runs `COUNT(*)`, which is a full scan on large tables,
+    `COUNT_ESTIMATE` takes planner's estimate cached for `count_cache_ttl` seconds
+    and `None` doesn't count at all. View may choose the mode with its own `count_mode` attribute.
+    """
+
+    default_limit: int = 50
+    limit_query_param: str = "limit"
+    offset_query_param: str = "offset"
+    max_limit: int = 1000
+    count_mode: typing.Optional[str] = COUNT_EXACT
+    count_cache_ttl: float = 60
+
+    request: web.Request = None
+    view = None
+    count: typing.Optional[int] = None
+    limit: int = None
+    offset: int = None
+    has_next: bool = False
+
+    async def paginate_query(self, query: Select, request: web.Request, view) -> typing.List:
+        self.request = request
+        self.view = view
+        db_service = await view.get_db_service()
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+
+        count_mode = self.get_count_mode(view)
+        if count_mode == COUNT_EXACT:
+            self.count = await db_service.count(query)
+        elif count_mode == COUNT_ESTIMATE:
+            self.count = await db_service.estimate_count(query, cache_ttl=self.count_cache_ttl)
+        else:
+            self.count = None
+
+        if not self.is_ordered(view):
+            # offset makes sense only for stable order
+            query = query.order_by(db_service.repo.pk_column)
+        # fetch one extra row to find out whether there is a next page without count
+        query = query.limit(self.limit + 1).offset(self.offset)
+        instances = await db_service.all(query)
+        self.has_next = len(instances) > self.limit
+        return instances[:self.limit]
+
+    def get_paginated_response(self, data) -> web.StreamResponse:
+        return self.view.render({
+            "count": self.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def is_ordered(self, view) -> bool:
+        """Whether view's filter backends order the query, `OrderingFilter` always ends ordering with primary key"""
+        return any(issubclass(backend_class, OrderingFilter) for backend_class in getattr(view, "filter_backends", ()))
+
+    def get_count_mode(self, view) -> typing.Optional[str]:
+        count_mode = getattr(view, "count_mode", self.count_mode)
+        assert count_mode in COUNT_MODES, (
+            f"`count_mode` has to be one of {', '.join(map(str, COUNT_MODES))}"
+        )
+        return count_mode
+
+    def get_limit(self, request: web.Request) -> int:
+        limit = _get_positive_int(request, self.limit_query_param)
+        if limit:
+            return min(limit, self.max_limit)
+        return self.default_limit
+
+    def get_offset(self, request: web.Request) -> int:
+        return _get_positive_int(request, self.offset_query_param)
+
+    def get_next_link(self) -> typing.Optional[str]:
+        if not self.has_next:
+            return None
+        query = {self.limit_query_param: self.limit, self.offset_query_param: self.offset + self.limit}
+        return str(self.request.url.update_query(query))
+
+    def get_previous_link(self) -> typing.Optional[str]:
+        if self.offset <= 0:
+            return None
+        offset = max(self.offset - self.limit, 0)
+        query = {self.limit_query_param: self.limit, self.offset_query_param: offset}
+        return str(self.request.url.update_query(query))
+
+
+def _get_positive_int(request: web.Request, query_param: str) -> int:
+    """Get positive integer from query string, return 0 for missing or invalid value"""
+    try:
+        value = int(request.query.get(query_param, 0))
+    except ValueError:
+        return 0
+    return max(value, 0)
@@ -0,0 +1,121 @@
+import csv
+import json
+import typing
+
+from aiohttp import StreamReader
+
+from aiohttp_rest_framework.exceptions import ValidationError
+
+__all__ = (
+    "BaseParser",
+    "JSONParser",
+    "NDJSONParser",
+    "CSVParser",
+)
+
+
+class BaseParser:
+    media_type: str = None
+
+    def parse(self, body: bytes) -> typing.Any:
+        raise NotImplementedError()
+
+    def iter_parse(self, stream: StreamReader) -> typing.AsyncIterator[typing.Any]:
+        """
+        Parse request body incrementally yielding objects one by one.
+        Objects which can't be parsed are yielded as `ValidationError`s, so the rest of the body is still parsed
+        """
+        raise NotImplementedError()
+
+
+class JSONParser(BaseParser):
+    """Parse request body with `loads` callable accepting bytes, like `orjson.loads`"""
+
+    media_type = "application/json"
+
+    def __init__(self, loads: typing.Callable[[bytes], typing.Any] = json.loads):
+        self.loads = loads
+
+    def parse(self, body: bytes) -> typing.Any:
+        try:
+            return self.loads(body)
+        except ValueError:  # decode errors of json, orjson, ujson and invalid utf-8 are value errors
+            raise ValidationError({"error": "invalid json"})
+
+
+class NDJSONParser(JSONParser):
+    """Newline delimited json, one object per line, empty lines are skipped"""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, body: bytes) -> typing.List:
+        parse_line = super().parse
+        return [parse_line(line) for line in body.splitlines() if line.strip()]
+
+    async def iter_parse(self, stream: StreamReader) -> typing.AsyncIterator[typing.Any]:
+        async for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield self.loads(line)
+            except ValueError:
+                yield ValidationError({"error": "invalid json"})
+
+
+class CSVParser(BaseParser):
+    """
+    CSV with header row of field names, every next row is parsed to dict.
+    Empty values are skipped, so they are treated as missing ones
+    """
+
+    media_type = "text/csv"
+
+    def __init__(self, delimiter: str = ",", encoding: str = "utf-8"):
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def parse(self, body: bytes) -> typing.List:
+        try:
+            lines = body.decode(self.encoding).splitlines(keepends=True)
+        except UnicodeDecodeError:
+            raise ValidationError({"error": "invalid encoding"})
+        rows = csv.reader(lines, delimiter=self.delimiter)
+        field_names = next(rows, [])
+        items = []
+        for values in rows:
+            item = self.to_dict(field_names, values)
+            if isinstance(item, ValidationError):
+                raise item
+            items.append(item)
+        return items
+
+    async def iter_parse(self, stream: StreamReader) -> typing.AsyncIterator[typing.Any]:
+        field_names = None
+        async for record in self._iter_records(stream):
+            try:
+                values = next(csv.reader([record.decode(self.encoding)], delimiter=self.delimiter), [])
+            except (UnicodeDecodeError, csv.Error):
+                yield ValidationError({"error": "invalid csv row"})
+                continue
+            if field_names is None:
+                field_names = values
+            elif values:
+                yield self.to_dict(field_names, values)
+
+    @staticmethod
+    async def _iter_records(stream: StreamReader) -> typing.AsyncIterator[bytes]:
+        # quoted values may contain line breaks, record is complete when its quotes are balanced
+        record = b""
+        async for line in stream:
+            record += line
+            if record.count(b'"') % 2 == 0:
+                yield record
+                record = b""
+        if record:
+            yield record
+
+    @staticmethod
+    def to_dict(field_names: typing.List[str], values: typing.List[str]) -> typing.Union[dict, ValidationError]:
+        if len(values) != len(field_names):
+            return ValidationError({"error": f"expected {len(field_names)} values, got {len(values)}"})
+        return {name: value for name, value in zip(field_names, values) if value != ""}
@@ -0,0 +1,118 @@
+import typing
+
+import marshmallow as ma
+import sqlalchemy as sa
+
+from aiohttp_rest_framework.db.pg_sa import any_of
+
+__all__ = (
+    "Prefetch",
+    "SelectRelated",
+)
+
+
+class Prefetch:
+    """
+    Reverse relation, e.g. `Prefetch("users", users)` for users of companies.
+
+    Rows of `table` referencing the dumped objects are fetched with one `WHERE fk = ANY(:parent_keys)` query
+    and put into `to_attr` list of every object, so nested field with the same name can dump them.
+    Foreign key is found in `table` metadata, pass name of its column as `fk` if there are several of them
+    """
+
+    def __init__(self, to_attr: str, table: sa.Table, fk: typing.Optional[str] = None):
+        self.to_attr = to_attr
+        self.table = table
+        self.fk = fk
+
+    def get_foreign_key(self, parent: sa.Table) -> sa.ForeignKey:
+        foreign_keys = [
+            foreign_key for foreign_key in self.table.foreign_keys
+            if foreign_key.column.table is parent and (self.fk is None or foreign_key.parent.key == self.fk)
+        ]
+        assert len(foreign_keys) == 1, (
+            f"`{self.to_attr}` relation requires exactly one foreign key of {self.table.name} "
+            f"to {parent.name}, found {len(foreign_keys)}, pass `fk` to choose one"
+        )
+        return foreign_keys[0]
+
+    def get_query(self, parent_keys: typing.Sequence, foreign_key: sa.ForeignKey) -> sa.sql.Select:
+        """Query of related rows, override it to filter or order them differently"""
+        order_by = [self.table.columns[name] for name in self.table.primary_key.columns.keys()]
+        return sa.select([self.table]).where(any_of(foreign_key.parent, parent_keys)).order_by(*order_by)
+
+    async def attach(self, instances: typing.List[dict], parent: sa.Table, db_service) -> None:
+        """Put related rows into `to_attr` of every instance, `db_service` has to be the one of related table"""
+        foreign_key = self.get_foreign_key(parent)
+        parent_key = foreign_key.column.key
+        # keys are compared as strings, so values of different python types (e.g. uuid and str) match
+        values = (instance[parent_key] for instance in instances)
+        keys = {str(value): value for value in values if value is not None}
+        rows = await db_service.all(self.get_query(list(keys.values()), foreign_key)) if keys else []
+
+        groups: typing.Dict[str, typing.List] = {}
+        for row in rows:
+            groups.setdefault(str(row[foreign_key.parent.key]), []).append(row)
+        for instance in instances:
+            instance[self.to_attr] = groups.get(str(instance[parent_key]), [])
+
+
+class SelectRelated:
+    """
+    Forward relation, e.g. `SelectRelated("company", companies)` for company of users.
+
+    Related table is joined to the query of dumped objects with `LEFT JOIN`, its columns are selected
+    with `<name>__<column>` labels and split from every row into `name` mapping (`None` if there is no related row),
+    so nested field with the same name can dump it. Foreign key is found in parent table metadata,
+    pass name of its column as `fk` if there are several of them
+    """
+
+    def __init__(self, name: str, table: sa.Table, fk: typing.Optional[str] = None):
+        self.name = name
+        self.table = table
+        self.fk = fk
+
+    @classmethod
+    def from_field(cls, serializer_class: typing.Type[ma.Schema], name: str) -> "SelectRelated":
+        """Relation dumped by `name` nested field of the serializer, its table is the model of nested serializer"""
+        field = serializer_class._declared_fields.get(name)  # noqa
+        assert isinstance(field, ma.fields.Nested), (
+            f"`{name}` of {serializer_class.__name__} `select_related` has to be a nested field"
+        )
+        nested = field.nested
+        if isinstance(nested, str):
+            nested = ma.class_registry.get_class(nested)
+        elif callable(nested) and not isinstance(nested, type):
+            nested = nested()
+        if not isinstance(nested, type):
+            nested = type(nested)
+        table = getattr(nested.opts, "model", None)
+        assert table is not None, f"`{name}` of {serializer_class.__name__} has to be nested model serializer"
+        return cls(name, table)
+
+    def get_foreign_key(self, parent: sa.Table) -> sa.ForeignKey:
+        foreign_keys = [
+            foreign_key for foreign_key in parent.foreign_keys
+            if foreign_key.column.table is self.table and (self.fk is None or foreign_key.parent.key == self.fk)
+        ]
+        assert len(foreign_keys) == 1, (
+            f"`{self.name}` relation requires exactly one foreign key of {parent.name} "
+            f"to {self.table.name}, found {len(foreign_keys)}, pass `fk` to choose one"
+        )
+        return foreign_keys[0]
+
+    def join(self, query: sa.sql.Select, parent: sa.Table) -> sa.sql.Select:
+        foreign_key = self.get_foreign_key(parent)
+        # aliased, so the table may be joined several times or to itself
+        related = self.table.alias(f"{parent.name}_{self.name}")
+        onclause = related.columns[foreign_key.column.key] == foreign_key.parent
+        columns = [column.label(f"{self.name}__{column.key}") for column in related.columns]
+        return query.outerjoin(related, onclause).add_columns(*columns)
+
+    def split(self, instance: dict) -> None:
+        """Move labeled columns of related row into `name` of the instance"""
+        prefix = f"{self.name}__"
+        related = {key[len(prefix):]: instance.pop(key) for key in list(instance) if key.startswith(prefix)}
+        pk_names = self.table.primary_key.columns.keys()
+        missing = all(related.get(name) is None for name in pk_names)
+        instance[self.name] = None if missing else related
@@ -0,0 +1,187 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import typing
+import uuid
+
+from aiohttp_rest_framework.utils import parse_accept_header
+
+__all__ = (
+    "NATIVE_TYPES",
+    "encode_default",
+    "json_dumps",
+    "select_renderer",
+    "BaseRenderer",
+    "JSONRenderer",
+    "NDJSONRenderer",
+    "CSVRenderer",
+)
+
+# types encoded by renderers themselves, so serializer fields don't have to stringify them
+NATIVE_TYPES = (uuid.UUID, datetime.datetime, datetime.date, datetime.time, decimal.Decimal, datetime.timedelta)
+
+
+def encode_default(value: typing.Any) -> typing.Any:
+    """`default` for json encoders, the same representation marshmallow fields give"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds())
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def json_dumps(data: typing.Any) -> bytes:
+    return json.dumps(data, default=encode_default, separators=(",", ":")).encode()
+
+
+def select_renderer(accept: typing.Optional[str], renderers: typing.Sequence["BaseRenderer"]) -> "BaseRenderer":
+    """
+    Pick renderer for `Accept` header value preferring media ranges with higher quality and more specific ones,
+    the first renderer is used if the header is missing or none of the renderers is acceptable
+    """
+    media_ranges = [media_range for media_range in parse_accept_header(accept) if media_range[1] > 0]
+    # more specific media ranges go first among ones of the same quality
+    media_ranges.sort(key=lambda item: (-item[1], item[0].count("*")))
+    for media_type, _ in media_ranges:
+        for renderer in renderers:
+            if _media_type_matches(media_type, renderer.media_type):
+                return renderer
+    return renderers[0]
+
+
+def _media_type_matches(media_range: str, media_type: str) -> bool:
+    if media_range in ("*/*", media_type):
+        return True
+    return media_range.endswith("/*") and media_type.startswith(media_range[:-1])
+
+
+class BaseRenderer:
+    media_type: str = None
+    charset: typing.Optional[str] = "utf-8"
+    # types of values the renderer can encode as is
+    native_types: typing.Tuple[type, ...] = ()
+    # list responses are always streamed from database cursor, when the renderer is chosen
+    streaming: bool = False
+
+    def render(self, data: typing.Any) -> bytes:
+        raise NotImplementedError()
+
+    # streamed list response is `start + chunk + ... + chunk + end`,
+    # `field_names` are keys of serialized objects in order of serializer fields
+    def render_stream_start(self, field_names: typing.Sequence[str]) -> bytes:
+        return b""
+
+    def render_stream_chunk(self, data: typing.List[dict], field_names: typing.Sequence[str], first: bool) -> bytes:
+        raise NotImplementedError()
+
+    def render_stream_end(self) -> bytes:
+        return b""
+
+    @property
+    def content_type(self) -> str:
+        if self.charset is None:
+            return self.media_type
+        return f"{self.media_type}; charset={self.charset}"
+
+
+class JSONRenderer(BaseRenderer):
+    """
+    Render data with `dumps` callable, which may return bytes (like `orjson.dumps`) or str.
+    Pass `native_types` the `dumps` can encode, e.g. with `default=encode_default`,
+    only default `json_dumps` encodes all of `NATIVE_TYPES` out of the box
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        dumps: typing.Callable[[typing.Any], typing.Union[bytes, str]] = json_dumps,
+        native_types: typing.Optional[typing.Tuple[type, ...]] = None,
+    ):
+        self.dumps = dumps
+        if native_types is None:
+            native_types = NATIVE_TYPES if dumps is json_dumps else ()
+        self.native_types = native_types
+
+    def render(self, data: typing.Any) -> bytes:
+        rendered = self.dumps(data)
+        if isinstance(rendered, str):
+            return rendered.encode()
+        return rendered
+
+    def render_stream_start(self, field_names: typing.Sequence[str]) -> bytes:
+        return b"["
+
+    def render_stream_chunk(self, data: typing.List[dict], field_names: typing.Sequence[str], first: bool) -> bytes:
+        # dump the whole chunk at once and strip array brackets, chunks are joined by hand
+        chunk = self.render(data)[1:-1]
+        return chunk if first else b"," + chunk
+
+    def render_stream_end(self) -> bytes:
+        return b"]"
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Newline delimited json, one object per line. `dumps` shouldn't indent the output"""
+
+    media_type = "application/x-ndjson"
+    streaming = True
+
+    def render(self, data: typing.Any) -> bytes:
+        items = data if isinstance(data, list) else [data]
+        render_item = super().render
+        return b"".join(render_item(item) + b"\n" for item in items)
+
+    def render_stream_start(self, field_names: typing.Sequence[str]) -> bytes:
+        return b""
+
+    def render_stream_chunk(self, data: typing.List[dict], field_names: typing.Sequence[str], first: bool) -> bytes:
+        return self.render(data)
+
+    def render_stream_end(self) -> bytes:
+        return b""
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with header row of field names and one row per object.
+    Missing and `null` values are empty, nested objects and lists are written as json
+    """
+
+    media_type = "text/csv"
+    native_types = NATIVE_TYPES
+    streaming = True
+
+    def __init__(self, delimiter: str = ","):
+        self.delimiter = delimiter
+
+    def render(self, data: typing.Any) -> bytes:
+        items = data if isinstance(data, list) else [data]
+        field_names = list(items[0]) if items else []
+        return self.render_stream_start(field_names) + self.render_stream_chunk(items, field_names, first=True)
+
+    def render_stream_start(self, field_names: typing.Sequence[str]) -> bytes:
+        return self._write_rows([field_names])
+
+    def render_stream_chunk(self, data: typing.List[dict], field_names: typing.Sequence[str], first: bool) -> bytes:
+        return self._write_rows([self.format_value(item.get(name)) for name in field_names] for item in data)
+
+    def format_value(self, value: typing.Any) -> typing.Any:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=encode_default)
+        if isinstance(value, NATIVE_TYPES):
+            return encode_default(value)
+        return value
+
+    def _write_rows(self, rows: typing.Iterable[typing.Sequence]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=self.delimiter).writerows(rows)
+        return buffer.getvalue().encode(self.charset)
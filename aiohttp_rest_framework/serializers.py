@@ -1,10 +1,15 @@
 import copy
+import datetime
+import decimal
 import typing
+import uuid
+from functools import partial
 from itertools import chain
 from json import JSONDecodeError
 
 import marshmallow as ma
 
+from aiohttp_rest_framework.compiled import compile_dump, compile_load
 from aiohttp_rest_framework.exceptions import DatabaseException, ValidationError
 from aiohttp_rest_framework.settings import Config, get_global_config
 
@@ -19,6 +24,9 @@ __all__ = (
     "ModelSerializer",
 )
 
+# max amount of cached field sets per serializer class, e.g. for different `?fields=` of requests
+FIELDS_CACHE_SIZE = 128
+
 
 class empty:
     """
@@ -38,6 +46,10 @@ class SerializerOpts(ma.SchemaOpts):
         if not hasattr(meta, "unknown"):
             meta.unknown = ma.EXCLUDE  # by default exclude unknown fields, like in drf
         super().__init__(meta, ordered)
+        # validation uses current `instance`, so views have to fetch it before update
+        self.requires_instance = getattr(meta, "requires_instance", False)
+        # load data with function generated for the fields, see `compiled.compile_load`
+        self.compile_load = getattr(meta, "compile_load", False)
 
 
 class SerializerMeta(ma.schema.SchemaMeta):
@@ -67,19 +79,52 @@ class Serializer(ma.Schema):
     opts: SerializerOpts = None
 
     instance: typing.Any = None
-
-    def __init__(self, instance=None, data: typing.Any = empty, as_text: bool = False, **kwargs):
+    # names of dump fields returning values of native types as is -> the type, see `_set_native_types`
+    _native_fields: typing.Dict[str, type] = {}
+    _compiled_load: typing.Optional[typing.Callable] = None
+
+    def __init__(
+        self,
+        instance=None,
+        data: typing.Any = empty,
+        as_text: bool = False,
+        native_types: typing.Collection[type] = (),
+        copy_data: bool = True,
+        **kwargs,
+    ):
         self.instance = instance
         if data is not empty:
             self.initial_data = data
         self.as_text = as_text
+        # `data` isn't copied, if nothing else refers to it, e.g. it's parsed from request body
+        self.copy_data = copy_data
         self._serializer_context = kwargs.pop("serializer_context", {})
         super().__init__(**kwargs)
+        if native_types:
+            self._set_native_types(native_types)
+
+    def _set_native_types(self, native_types: typing.Collection[type]) -> None:
+        """
+        Dump values of `native_types` as is, if fields would give the same representation
+        as the renderer, which is going to encode them itself
+        """
+        self._native_fields = {}
+        for field_name, field in self.dump_fields.items():
+            native_type = get_native_type(field)
+            if native_type is not None and native_type in native_types:
+                field._serialize = partial(_serialize_native, native_type, field._serialize)
+                self._native_fields[field_name] = native_type
 
     def to_internal_value(self, data):
         try:
             if self.as_text:
                 return self.loads(data)
+            if self.opts.compile_load:
+                if self._compiled_load is None:
+                    # `False` if serializer can't be compiled
+                    self._compiled_load = compile_load(self) or False
+                if self._compiled_load:
+                    return self._compiled_load(data)
             return self.load(data)
         except JSONDecodeError:
             raise ValidationError({"error": "invalid json"})
@@ -88,6 +133,8 @@ class Serializer(ma.Schema):
         return self.dump(instance)
 
     def get_initial(self):
+        if not self.copy_data:
+            return self.initial_data
         return copy.deepcopy(self.initial_data)
 
     async def update(self, instance, validated_data):
@@ -96,6 +143,18 @@ class Serializer(ma.Schema):
     async def create(self, validated_data):
         raise NotImplementedError("`create()` must be implemented.")
 
+    async def create_many(self, validated_data: typing.Sequence, batch_size: typing.Optional[int] = None):
+        raise NotImplementedError("`create_many()` must be implemented.")
+
+    async def copy_many(self, validated_data: typing.Sequence) -> int:
+        raise NotImplementedError("`copy_many()` must be implemented.")
+
+    async def update_many(self, validated_data: typing.Sequence, key: typing.Optional[str] = None):
+        raise NotImplementedError("`update_many()` must be implemented.")
+
+    async def update_by_lookup(self, lookup_params: typing.Mapping, validated_data):
+        raise NotImplementedError("`update_by_lookup()` must be implemented.")
+
     async def save(self, **kwargs):
         assert hasattr(self, "_errors"), (
             "You must call `.is_valid()` before calling `.save()`."
@@ -171,7 +230,7 @@ class Serializer(ma.Schema):
             try:
                 self._validated_data = self.to_internal_value(initial_data)
             except ma.ValidationError as exc:
-                self._validated_data = {}
+                self._validated_data = self._get_valid_data(exc)
                 self._errors = exc.messages
             else:
                 self._errors = {}
@@ -181,6 +240,12 @@ class Serializer(ma.Schema):
 
         return not bool(self._errors)
 
+    def _get_valid_data(self, exc: ma.ValidationError):
+        if self.many and isinstance(exc.valid_data, list) and isinstance(exc.messages, dict):
+            # keep positions of items, so valid ones can still be used, invalid ones are `None`
+            return [None if index in exc.messages else item for index, item in enumerate(exc.valid_data)]
+        return {}
+
     @property
     def serializer_context(self):
         return self._serializer_context
@@ -195,11 +260,59 @@ class Serializer(ma.Schema):
         return self._config
 
 
+def get_native_type(field: ma.fields.Field) -> typing.Optional[type]:
+    """
+    Type of values which field stringifies the same way as `renderers.encode_default` does,
+    `None` for fields customizing serialization of marshmallow ones
+    """
+    field_class = type(field)
+    serialize = field_class._serialize  # noqa
+    if isinstance(field, ma.fields.DateTime):  # base class of `Date`, `Time` and others
+        if serialize is not ma.fields.DateTime._serialize or field.format not in (None, "iso", "iso8601"):  # noqa
+            return None
+        if isinstance(field, ma.fields.Date):
+            native_type, stock_class = datetime.date, ma.fields.Date
+        elif isinstance(field, ma.fields.Time):
+            native_type, stock_class = datetime.time, ma.fields.Time
+        elif isinstance(field, (ma.fields.NaiveDateTime, ma.fields.AwareDateTime)):
+            return None  # convert timezone
+        else:
+            native_type, stock_class = datetime.datetime, ma.fields.DateTime
+        return native_type if field.SERIALIZATION_FUNCS is stock_class.SERIALIZATION_FUNCS else None
+    if isinstance(field, ma.fields.UUID):
+        return uuid.UUID if serialize is ma.fields.UUID._serialize else None  # noqa
+    if isinstance(field, ma.fields.Decimal):
+        if serialize is not ma.fields.Decimal._serialize or field_class._format_num is not ma.fields.Decimal._format_num:  # noqa
+            return None
+        return decimal.Decimal if field.places is None and not field.as_string else None
+    if isinstance(field, ma.fields.TimeDelta):
+        if serialize is not ma.fields.TimeDelta._serialize:  # noqa
+            return None
+        return datetime.timedelta if field.precision == ma.fields.TimeDelta.SECONDS else None
+    return None
+
+
+def _serialize_native(native_type: type, serialize: typing.Callable, value, attr, obj, **kwargs):
+    # exact check for dates, `datetime` is subclass of `date`, but is dumped differently by `Date` field.
+    # Subclasses of other types are fine, e.g. asyncpg returns its own subclass of `UUID`
+    if type(value) is native_type or (native_type is not datetime.date and isinstance(value, native_type)):
+        return value
+    return serialize(value, attr, obj, **kwargs)
+
+
 class ModelSerializerOpts(SerializerOpts):
     def __init__(self, meta, ordered: bool = True):
         super().__init__(meta, ordered)
         self.model = getattr(meta, "model", None)
         self.abstract = getattr(meta, "abstract", False)
+        # reverse relations fetched by views for nested fields, see `relations.Prefetch`
+        self.prefetch_related = getattr(meta, "prefetch_related", ())
+        # names of nested fields (or `relations.SelectRelated`) joined by views to the query of dumped objects
+        self.select_related = getattr(meta, "select_related", ())
+        # fields built for the first instance are reused by next ones with the same options
+        self.cache_fields = getattr(meta, "cache_fields", True)
+        # dump objects with function generated for the fields, see `compiled.compile_dump`
+        self.compile_dump = getattr(meta, "compile_dump", False)
 
 
 class ModelSerializerMeta(SerializerMeta):
@@ -213,6 +326,7 @@ class ModelSerializerMeta(SerializerMeta):
                 f"{name} has to include `model` attribute in it's Meta"
             )
             klass._is_fields_all = is_fields_all
+        klass._fields_cache = {}  # own for every class, not inherited
         return klass
 
     @classmethod
@@ -234,7 +348,23 @@ class ModelSerializer(Serializer, metaclass=ModelSerializerMeta):
     OPTIONS_CLASS = ModelSerializerOpts
     opts: ModelSerializerOpts = None
 
+    # options of instance -> prototypes of its fields and names of dump and load ones, see `_init_fields`
+    _fields_cache: typing.Dict[tuple, tuple] = None
+    _has_nested_options = False
+    _compiled_dump: typing.Optional[typing.Callable] = None
+
     def _init_fields(self) -> None:
+        cache_key = self._get_fields_cache_key()
+        cached = self._fields_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            self._set_cached_fields(*cached)
+            return
+        prototypes = self._build_fields()
+        if cache_key is not None and len(self._fields_cache) < FIELDS_CACHE_SIZE:
+            self._fields_cache[cache_key] = (prototypes, tuple(self.dump_fields), tuple(self.load_fields))
+
+    def _build_fields(self) -> typing.Tuple[typing.Tuple[str, ma.fields.Field], ...]:
+        """Init fields of the serializer, return their unbound prototypes to be copied by next instances"""
         if self._is_fields_all:  # is set in meta class
             # add model fields to declared on serializer fields
             combined_fields = chain(self._get_model_field_names(), self.declared_fields.keys())
@@ -242,11 +372,14 @@ class ModelSerializer(Serializer, metaclass=ModelSerializerMeta):
         super()._init_fields()
         # replace marshmallow inferred fields with database/schema specific fields
         field_builder = self.config.field_builder()
+        prototypes = []
         for field_name, field_obj in self.fields.items():
             if isinstance(field_obj, ma.fields.Inferred):
                 new_field = field_builder.build(
                     name=field_name, serializer=self, model=self.opts.model
                 )
+                prototypes.append((field_name, new_field))
+                new_field = copy.copy(new_field)  # prototype is kept unbound
                 self._bind_field(field_name, new_field)
                 self.fields[field_name] = new_field
 
@@ -254,6 +387,55 @@ class ModelSerializer(Serializer, metaclass=ModelSerializerMeta):
                     self.dump_fields[field_name] = new_field
                 if field_name in self.load_fields:
                     self.load_fields[field_name] = new_field
+            else:
+                prototypes.append((field_name, self._declared_fields[field_name]))
+        return tuple(prototypes)
+
+    def _set_cached_fields(
+        self,
+        prototypes: typing.Tuple[typing.Tuple[str, ma.fields.Field], ...],
+        dump_names: typing.Tuple[str, ...],
+        load_names: typing.Tuple[str, ...],
+    ) -> None:
+        # shallow copy is what marshmallow's `Field.__deepcopy__` does for declared fields anyway
+        fields = self.dict_class()
+        for field_name, prototype in prototypes:
+            field_obj = copy.copy(prototype)
+            self._bind_field(field_name, field_obj)
+            fields[field_name] = field_obj
+        self.fields = fields
+        self.dump_fields = self.dict_class((field_name, fields[field_name]) for field_name in dump_names)
+        self.load_fields = self.dict_class((field_name, fields[field_name]) for field_name in load_names)
+
+    def _get_fields_cache_key(self) -> typing.Optional[tuple]:
+        """Options the fields depend on, `None` if fields of this instance can't be cached"""
+        if not self.opts.cache_fields or self._has_nested_options:
+            return None
+        only = tuple(self.only) if self.only is not None else None
+        return (
+            only,
+            frozenset(self.exclude),
+            frozenset(self.load_only),
+            frozenset(self.dump_only),
+            self.config.field_builder,
+        )
+
+    def _normalize_nested_options(self) -> None:
+        # dotted `only` and `exclude` change nested fields of this very instance
+        self._has_nested_options = any("." in name for name in chain(self.only or (), self.exclude))
+        super()._normalize_nested_options()
+
+    def to_representation(self, instance):
+        if not self.opts.compile_dump or instance is None:
+            return super().to_representation(instance)
+        if self._compiled_dump is None:
+            # `False` if serializer can't be compiled
+            self._compiled_dump = compile_dump(self) or False
+        if not self._compiled_dump:
+            return super().to_representation(instance)
+        if self.many:
+            return self._compiled_dump(instance)
+        return self._compiled_dump((instance,))[0]
 
     def _get_model_field_names(self) -> typing.Sequence[str]:
         """
@@ -269,6 +451,18 @@ class ModelSerializer(Serializer, metaclass=ModelSerializerMeta):
         except DatabaseException as e:
             raise ValidationError({"error": e.message})
 
+    async def update_by_lookup(self, lookup_params: typing.Mapping, validated_data: typing.OrderedDict):
+        """Update object found by `lookup_params` without fetching it first, `None` if it's not found"""
+        db_service = await self.get_db_service()
+        try:
+            if validated_data:
+                self.instance = await db_service.update(None, validated_data, filter_params=dict(lookup_params))
+            else:  # nothing to update
+                self.instance = (await db_service.filter(dict(lookup_params)) or [None])[0]
+        except DatabaseException as e:
+            raise ValidationError({"error": e.message})
+        return self.instance
+
     async def create(self, validated_data: typing.OrderedDict):
         db_service = await self.get_db_service()
         try:
@@ -276,6 +470,32 @@ class ModelSerializer(Serializer, metaclass=ModelSerializerMeta):
         except DatabaseException as e:
             raise ValidationError({"error": e.message})
 
+    async def create_many(
+        self,
+        validated_data: typing.Sequence[typing.OrderedDict],
+        batch_size: typing.Optional[int] = None,
+    ):
+        db_service = await self.get_db_service()
+        try:
+            return await db_service.create_many(validated_data, batch_size)
+        except DatabaseException as e:
+            raise ValidationError({"error": e.message})
+
+    async def copy_many(self, validated_data: typing.Sequence[typing.OrderedDict]) -> int:
+        """Insert objects with COPY, return amount of inserted ones"""
+        db_service = await self.get_db_service()
+        try:
+            return await db_service.copy_many(validated_data)
+        except DatabaseException as e:
+            raise ValidationError({"error": e.message})
+
+    async def update_many(self, validated_data: typing.Sequence[typing.OrderedDict], key: typing.Optional[str] = None):
+        db_service = await self.get_db_service()
+        try:
+            return await db_service.update_many(validated_data, key)
+        except DatabaseException as e:
+            raise ValidationError({"error": e.message})
+
     async def get_db_service(self):
         connection = await self.config.get_connection()
         return self.config.db_service_class(self.opts.model, connection)
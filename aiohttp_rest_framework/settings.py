@@ -4,8 +4,12 @@ import typing
 
 from aiohttp import web
 
+from aiohttp_rest_framework.cache import ResponseCache, SingleFlight
 from aiohttp_rest_framework.db.pg_sa import PGSAService
 from aiohttp_rest_framework.fields import SAFieldBuilder
+from aiohttp_rest_framework.limits import ConcurrencyLimiter
+from aiohttp_rest_framework.parsers import BaseParser, JSONParser
+from aiohttp_rest_framework.renderers import BaseRenderer, JSONRenderer
 from aiohttp_rest_framework.types import DbOrmMapping
 from aiohttp_rest_framework.utils import get_model_fields_sa
 
@@ -41,6 +45,14 @@ class Config:
         get_connection: typing.Callable[[], typing.Awaitable] = None,
         db_service=None,
         schema_type: str = PG_SA,
+        cache_max_size: int = 64 * 1024 * 1024,
+        cache_ttl: float = 60,
+        renderers: typing.Sequence[BaseRenderer] = None,
+        parsers: typing.Sequence[BaseParser] = None,
+        compression: bool = False,
+        compression_min_size: int = 1024,
+        compression_level: int = 6,
+        compression_executor_size: int = 64 * 1024,
     ):
         assert isinstance(app_connection_property, str), (
             "`app_connection_property` has to be a string"
@@ -68,6 +80,39 @@ class Config:
         self.field_builder = self._db_orm_mapping["field_builder"]
         self.get_model_fields = self._db_orm_mapping["model_fields_getter"]
 
+        assert cache_max_size >= 0 and cache_ttl >= 0, (
+            "`cache_max_size` and `cache_ttl` have to be non negative"
+        )
+        # shared by all views of the app, so writes in one view invalidate responses cached by others
+        self.response_cache = ResponseCache(cache_max_size, cache_ttl)
+        # in-flight responses of GET requests coalesced by cache key, see `GenericAPIView.coalesce_requests`
+        self.single_flight = SingleFlight()
+
+        # the first renderer and parser are used by default
+        self.renderers = tuple(renderers or (JSONRenderer(),))
+        assert all(isinstance(renderer, BaseRenderer) for renderer in self.renderers), (
+            "`renderers` have to be instances of `BaseRenderer`"
+        )
+        self.parsers = tuple(parsers or (JSONParser(),))
+        assert all(isinstance(parser, BaseParser) for parser in self.parsers), (
+            "`parsers` have to be instances of `BaseParser`"
+        )
+
+        # compress response bodies of at least `compression_min_size` bytes with coding accepted by client,
+        # bodies of `compression_executor_size` bytes and bigger are compressed in thread pool
+        assert 0 <= compression_level <= 9, "`compression_level` has to be between 0 and 9"
+        self.compression = compression
+        self.compression_min_size = compression_min_size
+        self.compression_level = compression_level
+        self.compression_executor_size = compression_executor_size
+
+        # view class -> limiter of its concurrent requests, see `APIView.max_concurrency`
+        self.concurrency_limiters: typing.Dict[type, ConcurrencyLimiter] = {}
+
+    def get_concurrency_stats(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        """Counts of active, waiting, admitted, queued and shed requests by view name"""
+        return {view.__name__: limiter.stats() for view, limiter in self.concurrency_limiters.items()}
+
 
 _config: typing.Optional[Config] = None
 
@@ -1,6 +1,7 @@
 import typing
 
 import marshmallow as ma
+import sqlalchemy as sa
 from sqlalchemy.sql.type_api import TypeEngine
 
 __all__ = (
@@ -8,6 +9,7 @@ __all__ = (
     "SASerializerFieldMapping",
     "DbOrmMappingEntity",
     "DbOrmMapping",
+    "Ordering",
 )
 
 Fetch = typing.Literal["one", "all"]
@@ -16,3 +18,6 @@ SASerializerFieldMapping = typing.Dict[typing.Type[TypeEngine], typing.Type[ma.f
 
 DbOrmMappingEntity = typing.Mapping[str, typing.Any]
 DbOrmMapping = typing.Mapping[str, DbOrmMappingEntity]
+
+# columns to order by and whether order is descending
+Ordering = typing.List[typing.Tuple[sa.Column, bool]]
@@ -1,5 +1,5 @@
 import inspect
-from typing import Dict, Generic, Optional, Tuple, TypeVar
+from typing import AsyncIterable, AsyncIterator, Dict, Generic, List, MutableMapping, Optional, Tuple, TypeVar
 
 import sqlalchemy as sa
 from databases import Database
@@ -9,7 +9,11 @@ from sqlalchemy.ext.asyncio import create_async_engine
 __all__ = (
     "ClassLookupDict",
     "get_model_fields_sa",
+    "is_column_indexed",
     "safe_issubclass",
+    "chunked",
+    "parse_accept_header",
+    "add_vary",
     "create_connection",
     "create_tables",
     "drop_tables",
@@ -17,6 +21,9 @@ __all__ = (
 
 C1 = TypeVar("C1")
 C2 = TypeVar("C2")
+T = TypeVar("T")
+
+_NOT_FOUND = object()
 
 
 class ClassLookupDict(Generic[C1, C2]):
@@ -29,16 +36,32 @@ class ClassLookupDict(Generic[C1, C2]):
 
     def __init__(self, mapping: Dict[C1, C2]):
         self.mapping = mapping
+        # class of looked up object -> found value (or `_NOT_FOUND`), so mro is walked once per class
+        self._cache: Dict[type, C2] = {}
 
     def __getitem__(self, key) -> C2:
         base_class = key.__class__
+        try:
+            value = self._cache[base_class]
+        except KeyError:
+            value = self._cache[base_class] = self._lookup(base_class)
+        if value is _NOT_FOUND:
+            raise KeyError(f"Class {base_class.__name__} not found in lookup.")
+        return value
+
+    def _lookup(self, base_class: type):
         for cls in inspect.getmro(base_class):
             if cls in self.mapping:
                 return self.mapping[cls]
-        raise KeyError(f"Class {key.__name__} not found in lookup.")
+        return _NOT_FOUND
 
     def __setitem__(self, key, value) -> None:
         self.mapping[key] = value
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """Call it if `mapping` is changed directly, not with `__setitem__`"""
+        self._cache.clear()
 
     def get(self, key: C1, default=None) -> Optional[C2]:
         try:
@@ -61,6 +84,21 @@ def get_model_fields_sa(model: sa.Table) -> Tuple[str]:
     return tuple(str(column.name) for column in model.columns)
 
 
+def is_column_indexed(column: sa.Column) -> bool:
+    """Check if column can be looked up by index, i.e. it's the leading column of some index"""
+    if column.primary_key or column.index or column.unique:
+        return True
+    table: sa.Table = column.table
+    for index in table.indexes:
+        if list(index.columns)[:1] == [column]:
+            return True
+    for constraint in table.constraints:
+        if isinstance(constraint, (sa.PrimaryKeyConstraint, sa.UniqueConstraint)):
+            if list(constraint.columns)[:1] == [column]:
+                return True
+    return False
+
+
 def safe_issubclass(first, other) -> bool:
     try:
         return issubclass(first, other)
@@ -68,6 +106,19 @@ def safe_issubclass(first, other) -> bool:
         return False
 
 
+async def chunked(iterable: AsyncIterable[T], size: int) -> AsyncIterator[List[T]]:
+    """Group items of async iterable into lists of `size` length (the last one may be shorter)"""
+    assert size > 0, "chunk `size` has to be positive"
+    chunk = []
+    async for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 async def create_connection(dsn: str, **kwargs) -> Database:
     from aiohttp_rest_framework.settings import PG_SA, get_global_config
 
@@ -89,3 +140,33 @@ async def drop_tables(db_url: str, metadata: MetaData) -> None:
     engine = create_async_engine(db_url)
     async with engine.begin() as conn:
         await conn.run_sync(metadata.drop_all)
+
+
+def parse_accept_header(value: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Parse `Accept`-like header to lowercased values with their quality,
+    sorted by quality preserving order of equal ones. Not acceptable values have zero quality
+    """
+    values = []
+    for item in (value or "").split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            param_name, _, param_value = param.partition("=")
+            if param_name.strip() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0
+        if name:
+            values.append((name.lower(), quality))
+    return sorted(values, key=lambda item: -item[1])
+
+
+def add_vary(headers: MutableMapping[str, str], name: str) -> None:
+    """Add request header the response depends on to its `Vary` header, unless it's there already"""
+    vary = headers.get("Vary")
+    if not vary:
+        headers["Vary"] = name
+    elif name.lower() not in (value.strip().lower() for value in vary.split(",")) and vary.strip() != "*":
+        headers["Vary"] = f"{vary}, {name}"
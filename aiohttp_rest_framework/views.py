@@ -1,19 +1,34 @@
+import asyncio
+import hashlib
 import typing
 
-from aiohttp import web
+import marshmallow as ma
+import sqlalchemy as sa
+from aiohttp import hdrs, web
 from aiohttp_cors import CorsViewMixin
+from multidict import CIMultiDict
 
 from aiohttp_rest_framework import APP_CONFIG_KEY
-from aiohttp_rest_framework.exceptions import HTTPNotFound, ObjectNotFound
+from aiohttp_rest_framework.compression import compress, select_coding
+from aiohttp_rest_framework.exceptions import HTTPNotFound, HTTPServiceUnavailable, ObjectNotFound, ValidationError
+from aiohttp_rest_framework.filters import BaseFilterBackend, FieldsFilter, OrderingFilter, get_pk_column
+from aiohttp_rest_framework.limits import ConcurrencyLimiter
 from aiohttp_rest_framework.mixins import (
+    BulkDestroyModelMixin,
+    BulkUpdateModelMixin,
     CreateModelMixin,
     DestroyModelMixin,
     ListModelMixin,
     RetrieveModelMixin,
     UpdateModelMixin,
 )
+from aiohttp_rest_framework.pagination import BasePagination
+from aiohttp_rest_framework.parsers import BaseParser
+from aiohttp_rest_framework.relations import Prefetch, SelectRelated
+from aiohttp_rest_framework.renderers import BaseRenderer, select_renderer
 from aiohttp_rest_framework.serializers import Serializer
 from aiohttp_rest_framework.settings import Config
+from aiohttp_rest_framework.utils import add_vary, chunked
 
 __all__ = (
     "APIView",
@@ -27,6 +42,7 @@ __all__ = (
     "RetrieveUpdateAPIView",
     "RetrieveDestroyAPIView",
     "RetrieveUpdateDestroyAPIView",
+    "ListCreateBulkUpdateDestroyAPIView",
 )
 
 
@@ -37,6 +53,52 @@ class APIView(CorsViewMixin, web.View):
     for particular view.
     """
 
+    # config's renderers and parsers are used by default, the first ones are preferred
+    renderers: typing.Sequence[BaseRenderer] = None
+    parsers: typing.Sequence[BaseParser] = None
+    # compress responses, config's settings are used if they are `None`
+    compression: typing.Optional[bool] = None
+    compression_min_size: typing.Optional[int] = None
+    # limit amount of concurrently handled requests, `None` means no limit.
+    # Up to `max_queue` more requests wait for `queue_timeout` seconds at most (`None` - until admitted),
+    # the rest are shed with 503 and `Retry-After: <retry_after>`
+    max_concurrency: typing.Optional[int] = None
+    max_queue: int = 0
+    queue_timeout: typing.Optional[float] = None
+    retry_after: int = 1
+
+    _renderer: BaseRenderer = None
+
+    async def _iter(self) -> web.StreamResponse:
+        limiter = self.get_concurrency_limiter()
+        if limiter is None:
+            response = await super()._iter()
+        else:
+            if not await limiter.acquire():
+                raise HTTPServiceUnavailable(retry_after=self.retry_after)
+            try:
+                response = await super()._iter()
+            finally:
+                limiter.release()
+        return await self.finalize_response(response)
+
+    def get_concurrency_limiter(self) -> typing.Optional[ConcurrencyLimiter]:
+        """Limiter shared by all requests of the view class, `None` for unlimited view and preflight requests"""
+        if self.max_concurrency is None or self.request.method == hdrs.METH_OPTIONS:
+            return None
+        limiters = self.rest_config.concurrency_limiters
+        limiter = limiters.get(self.__class__)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(self.max_concurrency, self.max_queue, self.queue_timeout)
+            limiters[self.__class__] = limiter
+        return limiter
+
+    async def finalize_response(self, response: web.StreamResponse) -> web.StreamResponse:
+        """Called with response of every handled request"""
+        if self.is_negotiated() and not response.prepared:
+            add_vary(response.headers, hdrs.ACCEPT)
+        return await self.compress_response(response)
+
     @property
     def rest_config(self) -> Config:
         try:
@@ -48,6 +110,77 @@ class APIView(CorsViewMixin, web.View):
             )
             raise AssertionError(msg)
 
+    def get_renderers(self) -> typing.Sequence[BaseRenderer]:
+        return self.renderers or self.rest_config.renderers
+
+    def get_renderer(self) -> BaseRenderer:
+        """Renderer negotiated by `Accept` header"""
+        if self._renderer is None:
+            self._renderer = select_renderer(self.request.headers.get(hdrs.ACCEPT), self.get_renderers())
+        return self._renderer
+
+    def is_negotiated(self) -> bool:
+        """Whether renderer of the response was chosen by `Accept` header among several ones"""
+        return self._renderer is not None and len(self.get_renderers()) > 1
+
+    def get_parsers(self) -> typing.Sequence[BaseParser]:
+        return self.parsers or self.rest_config.parsers
+
+    def get_parser(self) -> BaseParser:
+        """Parser of request's content type, the first one if there is no such parser"""
+        parsers = self.get_parsers()
+        for parser in parsers:
+            if parser.media_type == self.request.content_type:
+                return parser
+        return parsers[0]
+
+    async def get_request_data(self) -> typing.Any:
+        """Parse request body, it's read as bytes to skip decoding"""
+        return self.get_parser().parse(await self.request.read())
+
+    def get_content_coding(self) -> typing.Optional[str]:
+        """Coding to compress response with, `None` if compression is disabled or client doesn't accept any"""
+        compression = self.compression if self.compression is not None else self.rest_config.compression
+        if not compression:
+            return None
+        return select_coding(self.request.headers.get(hdrs.ACCEPT_ENCODING))
+
+    async def compress_response(self, response: web.StreamResponse) -> web.StreamResponse:
+        """
+        Compress body of the response, if it's big enough. Big bodies are compressed
+        in thread pool, so event loop isn't blocked. Already encoded responses are left as is
+        """
+        body = getattr(response, "body", None)
+        if not isinstance(body, bytes) or hdrs.CONTENT_ENCODING in response.headers:
+            return response
+        min_size = self.compression_min_size
+        if min_size is None:
+            min_size = self.rest_config.compression_min_size
+        coding = self.get_content_coding() if len(body) >= min_size else None
+        if coding is None:
+            return response
+
+        config = self.rest_config
+        if len(body) >= config.compression_executor_size:
+            loop = asyncio.get_running_loop()
+            response.body = await loop.run_in_executor(None, compress, body, coding, config.compression_level)
+        else:
+            response.body = compress(body, coding, config.compression_level)
+        response.headers[hdrs.CONTENT_ENCODING] = coding
+        add_vary(response.headers, hdrs.ACCEPT_ENCODING)
+        return response
+
+    def render(self, data: typing.Any, status: int = 200,
+               headers: typing.Optional[typing.Mapping[str, str]] = None) -> web.Response:
+        renderer = self.get_renderer()
+        return web.Response(
+            body=renderer.render(data),
+            status=status,
+            headers=headers,
+            content_type=renderer.media_type,
+            charset=renderer.charset,
+        )
+
 
 class GenericAPIView(APIView):
     """
@@ -58,9 +191,52 @@ class GenericAPIView(APIView):
     lookup_url_kwarg: str = None
 
     serializer_class: typing.Type[Serializer] = None
+    pagination_class: typing.Type[BasePagination] = None
+    filter_backends: typing.Sequence[typing.Type[BaseFilterBackend]] = (FieldsFilter, OrderingFilter)
+    # e.g. `{"email": ["eq", "in"], "created_at": ["gte", "lt"]}`, see `FieldsFilter`
+    filter_fields: typing.Union[typing.Mapping[str, typing.Sequence[str]], typing.Sequence[str]] = None
+    # columns allowed in `?ordering=` and default ordering, e.g. `("-created_at",)`, see `OrderingFilter`
+    ordering_fields: typing.Sequence[str] = None
+    ordering: typing.Sequence[str] = None
+
+    # query params to dump (and select from database) only some fields: `?fields=id,name`,
+    # or all but some fields: `?exclude=email`. Set to `None` to disable
+    fields_query_param: typing.Optional[str] = "fields"
+    exclude_query_param: typing.Optional[str] = "exclude"
+
+    # reverse relations fetched for dumped objects with one query per relation,
+    # serializer's Meta `prefetch_related` is used if it's `None`, see `Prefetch`
+    prefetch_related: typing.Optional[typing.Sequence[Prefetch]] = None
+    # forward relations joined to the query of dumped objects, names of nested fields or `SelectRelated`,
+    # serializer's Meta `select_related` is used if it's `None`
+    select_related: typing.Optional[typing.Sequence[typing.Union[str, SelectRelated]]] = None
+
+    # cache encoded responses of retrieve and list in app's `ResponseCache`,
+    # writes of any view invalidate responses of the affected objects and lists
+    cache_responses: bool = False
+    # seconds to keep cached responses, config's `cache_ttl` by default
+    cache_ttl: typing.Optional[float] = None
+    # concurrent retrieve and list requests with the same cache key
+    # share one database query, serialization and encoding of the response
+    coalesce_requests: bool = False
+    # get objects with db service's batch loader, so lookups of concurrent requests are merged into one query.
+    # `lookup_field` has to be primary key or unique column. Loader fetches whole rows of the model only,
+    # so lookups with joined `select_related` relations or sparse columns are made with their own query
+    batch_lookups: bool = False
+
+    # set `ETag` header of retrieve and list responses and respond with 304 to matching `If-None-Match`
+    use_etags: bool = False
+    # columns which change on every write, e.g. `updated_at`, the first one the model has
+    # is used to get ETag with cheap version-only query, otherwise serialized body is hashed.
+    # Bodies of responses with prefetched or joined related objects are always hashed, their versions aren't tracked
+    etag_version_fields: typing.Sequence[str] = ("version", "updated_at")
 
     # TODO(ckkz-it): type annotation
     _db_service = None
+    _paginator: BasePagination = None
+    _sparse_fields: typing.Tuple[typing.Optional[typing.Tuple[str, ...]], typing.Tuple[str, ...]] = None
+    # serializer class -> names of fields it dumps
+    _dump_field_names: typing.Dict[type, typing.FrozenSet[str]] = {}
 
     def __init__(self, request: web.Request) -> None:
         super().__init__(request)
@@ -74,8 +250,10 @@ class GenericAPIView(APIView):
 
     async def get_db_service(self):
         """Get database service applicable for current engine """
-        connection = await self.rest_config.get_connection()
-        return self.rest_config.db_service_class(self.model, connection)
+        if self._db_service is None:
+            connection = await self.rest_config.get_connection()
+            self._db_service = self.rest_config.db_service_class(self.model, connection)
+        return self._db_service
 
     @property
     def model(self):
@@ -94,6 +272,14 @@ class GenericAPIView(APIView):
         kwargs.setdefault("serializer_context", self.get_serializer_context())
         return serializer_class(*args, **kwargs)
 
+    def get_render_serializer(self, *args, **kwargs) -> Serializer:
+        """
+        Serializer of data rendered by the negotiated renderer, values of types the renderer encodes itself
+        are dumped as is, so its `data` isn't suitable for other encoders
+        """
+        kwargs.setdefault("native_types", self.get_renderer().native_types)
+        return self.get_serializer(*args, **kwargs)
+
     def get_serializer_context(self):
         return {
             "request": self.request,
@@ -101,19 +287,357 @@ class GenericAPIView(APIView):
             "config": self.rest_config,
         }
 
-    async def get_object(self):
-        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
-        where = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+    async def get_object(self, columns: typing.Optional[typing.Sequence[str]] = None):
         db_service = await self.get_db_service()
+        lookup_params = self.get_lookup_params()
+        relations = self.get_select_related()
         try:
-            obj = await db_service.get(where)
+            if relations:
+                # joined lookups aren't batched, see `batch_lookups`
+                query = self.join_related(db_service.get_all_query(columns), relations)
+                obj = self.split_related([await db_service.get(lookup_params, query=query)], relations)[0]
+            elif self.batch_lookups and columns is None:
+                column = self.model.columns[self.lookup_field]
+                assert column.primary_key or column.unique, (
+                    f"`batch_lookups` of {self.__class__.__name__} requires unique `lookup_field`"
+                )
+                try:
+                    # loader matches rows by canonical values, e.g. of upper-case uuid or zero-padded integer
+                    value = self.build_lookup_field().deserialize(lookup_params[self.lookup_field])
+                except ma.ValidationError:
+                    raise HTTPNotFound()
+                obj = await db_service.load(value, self.lookup_field)
+            else:
+                obj = await db_service.get(lookup_params, columns=columns)
         except ObjectNotFound:
             raise HTTPNotFound()
         return obj
 
+    def get_lookup_params(self) -> typing.Dict[str, typing.Any]:
+        """Filter params of the object requested by url"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def build_lookup_field(self) -> ma.fields.Field:
+        """Field to validate values of `lookup_field`"""
+        return self.rest_config.field_builder().build(name=self.lookup_field, serializer=self.get_serializer())
+
+    async def get_list_query(self):
+        """Get query for list of objects, override it to customize the query"""
+        db_service = await self.get_db_service()
+        query = db_service.get_all_query(self.get_sparse_columns())
+        query = self.join_related(query, self.get_select_related())
+        return self.filter_query(query)
+
+    def filter_query(self, query):
+        for backend_class in self.filter_backends:
+            query = backend_class().filter_query(query, self.request, self)
+        return query
+
+    def get_sparse_fields(self) -> typing.Tuple[typing.Optional[typing.Tuple[str, ...]], typing.Tuple[str, ...]]:
+        """Get fields requested with `?fields=` (`None` if all of them) and with `?exclude=` query params"""
+        if self._sparse_fields is None:
+            only = self._parse_fields_param(self.fields_query_param)
+            exclude = self._parse_fields_param(self.exclude_query_param) or ()
+            self._sparse_fields = (only, exclude)
+        return self._sparse_fields
+
+    def get_sparse_fields_kwargs(self) -> typing.Dict[str, typing.Tuple[str, ...]]:
+        """Get `only` and `exclude` kwargs for serializer"""
+        only, exclude = self.get_sparse_fields()
+        kwargs = {}
+        if only is not None:
+            kwargs["only"] = only
+        if exclude:
+            kwargs["exclude"] = exclude
+        return kwargs
+
+    def get_sparse_columns(self) -> typing.Optional[typing.List[str]]:
+        """Get names of columns to select from database, `None` means all of them"""
+        only, exclude = self.get_sparse_fields()
+        if only is None and not exclude:
+            return None
+        # primary key is always selected, pagination and lookups may rely on it
+        pk_names = set(self.model.primary_key.columns.keys())
+        # and keys referenced by prefetched relations
+        pk_names.update(prefetch.get_foreign_key(self.model).column.key for prefetch in self.get_prefetches())
+        # and version column etags are derived from
+        version_column = self.get_etag_version_column()
+        if version_column is not None:
+            pk_names.add(version_column.key)
+        return [
+            name for name in self.model.columns.keys()
+            if name in pk_names or ((only is None or name in only) and name not in exclude)
+        ]
+
+    def _parse_fields_param(self, query_param: typing.Optional[str]) -> typing.Optional[typing.Tuple[str, ...]]:
+        if not query_param or not self.request.query.get(query_param):
+            return None
+        names = tuple(dict.fromkeys(  # remove duplicates, but keep order
+            name.strip() for name in self.request.query[query_param].split(",") if name.strip()
+        ))
+        readable_names = self._get_dump_field_names()
+        relation_names = {prefetch.to_attr for prefetch in self.get_declared_prefetches()}
+        relation_names.update(relation.name for relation in self.get_declared_select_related())
+        invalid_names = [
+            name for name in names
+            if (name not in self.model.columns and name not in relation_names) or name not in readable_names
+        ]
+        if invalid_names:
+            raise ValidationError({"error": f"Unknown fields in `{query_param}`: {', '.join(invalid_names)}"})
+        return names or None
+
+    def _get_dump_field_names(self) -> typing.FrozenSet[str]:
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self._dump_field_names:
+            self._dump_field_names[serializer_class] = frozenset(self.get_serializer().dump_fields)
+        return self._dump_field_names[serializer_class]
+
+    def get_declared_prefetches(self) -> typing.Sequence[Prefetch]:
+        if self.prefetch_related is not None:
+            return self.prefetch_related
+        return getattr(self.get_serializer_class().opts, "prefetch_related", ())
+
+    def get_prefetches(self) -> typing.List[Prefetch]:
+        """Relations to prefetch, ones left out by sparse fields are skipped"""
+        only, exclude = self.get_sparse_fields()
+        return [
+            prefetch for prefetch in self.get_declared_prefetches()
+            if (only is None or prefetch.to_attr in only) and prefetch.to_attr not in exclude
+        ]
+
+    def get_declared_select_related(self) -> typing.List[SelectRelated]:
+        select_related = self.select_related
+        if select_related is None:
+            select_related = getattr(self.get_serializer_class().opts, "select_related", ())
+        return [
+            SelectRelated.from_field(self.get_serializer_class(), relation) if isinstance(relation, str) else relation
+            for relation in select_related
+        ]
+
+    def get_select_related(self) -> typing.List[SelectRelated]:
+        """Relations to join, ones left out by sparse fields are skipped"""
+        only, exclude = self.get_sparse_fields()
+        return [
+            relation for relation in self.get_declared_select_related()
+            if (only is None or relation.name in only) and relation.name not in exclude
+        ]
+
+    def join_related(self, query, relations: typing.Sequence[SelectRelated]):
+        for relation in relations:
+            query = relation.join(query, self.model)
+        return query
+
+    def split_related(self, instances: typing.Sequence[typing.Mapping],
+                      relations: typing.Sequence[SelectRelated]) -> typing.List:
+        """Split joined rows into objects with related ones nested. Instances are copied into dicts"""
+        if not relations:
+            return list(instances)
+        instances = [dict(instance) for instance in instances]
+        for instance in instances:
+            for relation in relations:
+                relation.split(instance)
+        return instances
+
+    def get_related_tables(self) -> typing.List[str]:
+        """Full names of tables of related objects included in the response"""
+        tables = [prefetch.table.fullname for prefetch in self.get_prefetches()]
+        tables.extend(relation.table.fullname for relation in self.get_select_related())
+        return tables
+
+    async def prefetch(self, instances: typing.Sequence[typing.Mapping]) -> typing.List:
+        """Fetch related objects of the instances, one query per relation. Instances are copied into dicts"""
+        prefetches = self.get_prefetches()
+        if not prefetches or not instances:
+            return list(instances)
+        instances = [dict(instance) for instance in instances]
+        connection = await self.rest_config.get_connection()
+        for prefetch in prefetches:
+            db_service = self.rest_config.db_service_class(prefetch.table, connection)
+            await prefetch.attach(instances, self.model, db_service)
+        return instances
+
     async def get_list(self):
+        query = await self.get_list_query()
+        db_service = await self.get_db_service()
+        return self.split_related(await db_service.all(query), self.get_select_related())
+
+    async def iter_list(self, chunk_size: int) -> typing.AsyncIterator[typing.List]:
+        """Iterate over objects with database cursor yielding lists of `chunk_size` objects"""
+        query = await self.get_list_query()
+        db_service = await self.get_db_service()
+        relations = self.get_select_related()
+        # closing this generator doesn't close generators it iterates over,
+        # so database cursor is closed explicitly when iteration stops early
+        rows = db_service.iterate(query)
+        chunks = chunked(rows, chunk_size)
+        try:
+            async for instances in chunks:
+                yield self.split_related(instances, relations)
+        finally:
+            await chunks.aclose()
+            await rows.aclose()
+
+    @property
+    def paginator(self) -> typing.Optional[BasePagination]:
+        if self._paginator is None and self.pagination_class is not None:
+            self._paginator = self.pagination_class()
+        return self._paginator
+
+    async def paginate_list(self) -> typing.Optional[typing.List]:
+        """Return a page of objects or `None` if pagination is disabled"""
+        if self.paginator is None:
+            return None
+        query = await self.get_list_query()
+        instances = await self.paginator.paginate_query(query, self.request, self)
+        return self.split_related(instances, self.get_select_related())
+
+    def get_paginated_response(self, data) -> web.StreamResponse:
+        assert self.paginator is not None
+        return self.paginator.get_paginated_response(data)
+
+    def get_cache_key(self) -> typing.Hashable:
+        """Route, its url params (including lookup value), normalized query string, negotiated media type and coding"""
+        resource = self.request.match_info.route.resource
+        route = resource.canonical if resource is not None else self.request.path
+        return (
+            route,
+            tuple(sorted(self.request.match_info.items())),
+            tuple(sorted(self.request.query.items())),
+            self.get_renderer().media_type,
+            self.get_content_coding(),
+        )
+
+    async def coalesce(self, handler: typing.Callable[[], typing.Awaitable[web.Response]]) -> web.Response:
+        """
+        Get response from the handler shared with concurrent requests of the same cache key.
+        Every request gets its own copy of the response, http errors are raised for every request as well
+        """
+        if not self.coalesce_requests:
+            return await handler()
+
+        async def get_response() -> web.Response:
+            try:
+                return await handler()
+            except web.HTTPException as exc:
+                return exc
+
+        response = await self.rest_config.single_flight.do(self.get_cache_key(), get_response)
+        if isinstance(response, web.HTTPException):
+            raise _copy_http_exception(response)
+        return web.Response(status=response.status, reason=response.reason, body=response.body,
+                            headers=_copy_headers(response.headers))
+
+    def get_cached_response(self) -> typing.Optional[web.Response]:
+        if not self.cache_responses:
+            return None
+        entry = self.rest_config.response_cache.get(self.get_cache_key())
+        if entry is None:
+            return None
+        return web.Response(body=entry.body, headers=entry.headers)
+
+    def cache_response(self, response: web.StreamResponse, instance: typing.Optional[typing.Mapping] = None) -> None:
+        """Cache response of the object or list response if `instance` isn't passed"""
+        if not self.cache_responses or response.status != 200 or not isinstance(response.body, bytes):
+            return
+        cache = self.rest_config.response_cache
+        key = self.get_cache_key()
+        headers = {name: value for name, value in response.headers.items() if name != hdrs.CONTENT_LENGTH}
+        # writes to tables of related objects invalidate the response too
+        related_tables = self.get_related_tables()
+        if instance is None:
+            cache.set_list(key, response.body, headers, self.model.fullname, self.cache_ttl, related_tables)
+        else:
+            pk = instance[get_pk_column(self.model).key]
+            cache.set_object(key, response.body, headers, self.model.fullname, pk, self.cache_ttl, related_tables)
+
+    def get_version_column(self) -> typing.Optional[sa.Column]:
+        for field_name in self.etag_version_fields:
+            if field_name in self.model.columns:
+                return self.model.columns[field_name]
+        return None
+
+    def get_etag_version_column(self) -> typing.Optional[sa.Column]:
+        """Column etags are built from, `None` if etags are disabled or are hashes of response bodies"""
+        if not self.use_etags or self.get_related_tables():
+            # version column doesn't change with related objects, but body does
+            return None
+        return self.get_version_column()
+
+    async def get_version_etag(self) -> typing.Optional[str]:
+        """
+        Get ETag from version column without fetching the data,
+        last version and count of listed objects for list. `None` if etags are disabled,
+        the model has no version column, response includes related objects, object isn't found
+        or list is paginated (etag of a page is hash of its body, so it's the same for fresh and cached pages)
+        """
+        version_column = self.get_etag_version_column()
+        if version_column is None or (not self.detail and self.paginator is not None):
+            return None
         db_service = await self.get_db_service()
-        return await db_service.all()
+        if self.detail:
+            try:
+                instance = await db_service.get(self.get_lookup_params(), columns=[version_column.key])
+            except ObjectNotFound:
+                return None
+            return make_etag(self.get_cache_key(), instance[version_column.key])
+        query = await self.get_list_query()
+        query = query.with_only_columns([
+            sa.func.count().label("count"),
+            sa.func.max(version_column).label("version"),
+        ]).order_by(None)
+        result, = await db_service.all(query)
+        return make_etag(self.get_cache_key(), result["count"], result["version"])
+
+    def get_fetched_version_etag(self, instances: typing.Sequence[typing.Mapping]) -> typing.Optional[str]:
+        """
+        Get the same ETag `get_version_etag()` gives from already fetched object or whole list of objects.
+        `None` if etags are disabled, the model has no version column or it isn't fetched
+        """
+        version_column = self.get_etag_version_column()
+        if version_column is None or any(version_column.key not in instance for instance in instances):
+            return None
+        if self.detail:
+            return make_etag(self.get_cache_key(), instances[0][version_column.key])
+        # the same as count and max aggregates of the list query, which ignore nulls
+        versions = [instance[version_column.key] for instance in instances]
+        version = max((version for version in versions if version is not None), default=None)
+        return make_etag(self.get_cache_key(), len(instances), version)
+
+    def is_not_modified(self, etag: str) -> bool:
+        """Whether client already has representation with the etag, weak comparison is used"""
+        if_none_match = self.request.headers.get(hdrs.IF_NONE_MATCH)
+        if not if_none_match:
+            return False
+        client_etags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in client_etags or etag in client_etags or f"W/{etag}" in client_etags
+
+    def get_not_modified_response(self, etag: str) -> web.Response:
+        return web.Response(status=304, headers={hdrs.ETAG: etag})
+
+    def set_etag(self, response: web.StreamResponse, etag: typing.Optional[str] = None) -> None:
+        """Set passed etag or hash of response body if response has no etag yet"""
+        if not self.use_etags or response.status != 200:
+            return
+        if etag is None and hdrs.ETAG not in response.headers and isinstance(response.body, bytes):
+            etag = make_etag(response.body)
+        if etag is not None:
+            response.headers[hdrs.ETAG] = etag
+
+    def get_conditional_response(self, response: web.StreamResponse,
+                                 etag: typing.Optional[str] = None) -> web.StreamResponse:
+        """Set etag of the response and replace it with 304 if client has the same representation"""
+        self.set_etag(response, etag)
+        etag = response.headers.get(hdrs.ETAG)
+        if etag is not None and self.is_not_modified(etag):
+            return self.get_not_modified_response(etag)
+        return response
+
+    def invalidate_cache(self, *instances: typing.Mapping, all_objects: bool = False) -> None:
+        """Invalidate cached list responses and responses of passed objects or of all objects"""
+        pk_key = get_pk_column(self.model).key
+        pks = None if all_objects else [instance[pk_key] for instance in instances]
+        self.rest_config.response_cache.invalidate(self.model.fullname, pks)
 
 
 class CreateAPIView(CreateModelMixin,
@@ -197,3 +721,46 @@ class RetrieveUpdateDestroyAPIView(RetrieveModelMixin,
 
     async def delete(self):
         return await self.destroy()
+
+
+class ListCreateBulkUpdateDestroyAPIView(ListModelMixin,
+                                         CreateModelMixin,
+                                         BulkUpdateModelMixin,
+                                         BulkDestroyModelMixin,
+                                         GenericAPIView):
+    async def get(self):
+        return await self.list()
+
+    async def post(self):
+        return await self.create()
+
+    async def patch(self):
+        return await self.bulk_update()
+
+    async def delete(self):
+        return await self.bulk_destroy()
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from hash of response body or of values representing its version"""
+    data = parts[0] if len(parts) == 1 and isinstance(parts[0], bytes) else repr(parts).encode()
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def _copy_headers(headers: typing.Mapping[str, str]) -> CIMultiDict:
+    """Copy of headers keeping repeated ones, body length is set by the response itself"""
+    headers = CIMultiDict(headers)
+    headers.popall(hdrs.CONTENT_LENGTH, None)
+    return headers
+
+
+def _copy_http_exception(exc: web.HTTPException) -> web.HTTPException:
+    """New exception of the same class and response, so error middlewares of every request can handle it"""
+    copied = exc.__class__.__new__(exc.__class__)
+    web.HTTPException.__init__(copied, headers=_copy_headers(exc.headers), reason=exc.reason)
+    copied.body = exc.body
+    # attributes of the exception class, e.g. `detail` of `ValidationError`
+    for name, value in vars(exc).items():
+        if not name.startswith("_"):
+            setattr(copied, name, value)
+    return copied
@@ -0,0 +1,73 @@
+"""
+Measure dumping of a list of rows with `ModelSerializer(many=True)`, the main cost of list responses.
+Compares marshmallow's dump with compiled one (`compile_dump = True`), with and without renderer's native types.
+
+    python -m benchmarks.serializer_dump [--rows 10000] [--number 5]
+"""
+import argparse
+import datetime
+import timeit
+import uuid
+
+import sqlalchemy as sa
+from aiohttp import web
+from sqlalchemy.dialects.postgresql import UUID
+
+from aiohttp_rest_framework import setup_rest_framework
+from aiohttp_rest_framework.renderers import NATIVE_TYPES
+from aiohttp_rest_framework.serializers import ModelSerializer
+
+model = sa.Table(
+    "benchmark", sa.MetaData(),
+    sa.Column("id", UUID, primary_key=True),
+    sa.Column("name", sa.Text, nullable=False),
+    sa.Column("email", sa.Text, nullable=False),
+    sa.Column("age", sa.Integer, nullable=True),
+    sa.Column("rating", sa.Float, nullable=True),
+    sa.Column("is_active", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("birthday", sa.Date, nullable=True),
+)
+
+
+def get_serializer_class(compile_dump: bool) -> type:
+    meta = type("Meta", (), {"model": model, "fields": "__all__", "compile_dump": compile_dump})
+    return type("BenchmarkSerializer", (ModelSerializer,), {"Meta": meta})
+
+
+def get_rows(amount: int):
+    now = datetime.datetime.now()
+    return [
+        {
+            "id": uuid.uuid4(), "name": f"name {i}", "email": f"{i}@mail.com", "age": i % 100,
+            "rating": i / 7, "is_active": bool(i % 2), "created_at": now, "birthday": now.date(),
+        }
+        for i in range(amount)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_rest_framework(web.Application())
+    rows = get_rows(args.rows)
+    for native_types in ((), NATIVE_TYPES):
+        results = {}
+        for compile_dump in (False, True):
+            serializer_class = get_serializer_class(compile_dump)
+            seconds = timeit.timeit(
+                lambda: serializer_class(rows, many=True, native_types=native_types).data, number=args.number,
+            )
+            results[compile_dump] = seconds / args.number * 1e3
+            print(
+                f"native_types={bool(native_types)!s:<5} compile_dump={compile_dump!s:<5} "
+                f"{results[compile_dump]:8.1f} ms per {args.rows} rows"
+            )
+        print(f"speedup: {results[False] / results[True]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
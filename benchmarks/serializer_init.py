@@ -0,0 +1,50 @@
+"""
+Measure instantiation cost of `ModelSerializer`, which happens on every request.
+Compares serializers reusing built fields (default) with ones building them every time (`cache_fields = False`).
+
+    python -m benchmarks.serializer_init [--columns 50] [--number 2000]
+"""
+import argparse
+import timeit
+
+import sqlalchemy as sa
+from aiohttp import web
+
+from aiohttp_rest_framework import setup_rest_framework
+from aiohttp_rest_framework.serializers import ModelSerializer
+
+
+def get_model(columns: int) -> sa.Table:
+    types = (sa.Integer, sa.Text, sa.DateTime, sa.Boolean, sa.Numeric)
+    return sa.Table(
+        "benchmark", sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        *(sa.Column(f"column_{i}", types[i % len(types)], nullable=bool(i % 2)) for i in range(columns)),
+    )
+
+
+def get_serializer_class(model: sa.Table, cache_fields: bool) -> type:
+    meta = type("Meta", (), {"model": model, "fields": "__all__", "cache_fields": cache_fields})
+    return type("BenchmarkSerializer", (ModelSerializer,), {"Meta": meta})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_rest_framework(web.Application())
+    model = get_model(args.columns)
+    results = {}
+    for cache_fields in (False, True):
+        serializer_class = get_serializer_class(model, cache_fields)
+        serializer_class()  # warm up, the first instance builds fields anyway
+        seconds = timeit.timeit(serializer_class, number=args.number)
+        results[cache_fields] = seconds / args.number * 1e6
+        print(f"cache_fields={cache_fields!s:<5} {results[cache_fields]:9.1f} us per instance")
+    print(f"speedup: {results[False] / results[True]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure validation of a list of objects with `Serializer(many=True).is_valid()`, the main cost of write requests.
+Compares marshmallow's load with compiled one (`compile_load = True`), with and without copying of data.
+
+    python -m benchmarks.serializer_load [--items 5000] [--number 5]
+"""
+import argparse
+import timeit
+
+import sqlalchemy as sa
+from aiohttp import web
+
+from aiohttp_rest_framework import setup_rest_framework
+from aiohttp_rest_framework.serializers import ModelSerializer
+
+model = sa.Table(
+    "benchmark", sa.MetaData(),
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("name", sa.Text, nullable=False),
+    sa.Column("email", sa.Text, nullable=False),
+    sa.Column("age", sa.Integer, nullable=True),
+    sa.Column("is_active", sa.Boolean, nullable=False, default=True),
+    sa.Column("note", sa.Text, nullable=True),
+)
+
+
+def get_serializer_class(compile_load: bool) -> type:
+    meta = type("Meta", (), {"model": model, "fields": "__all__", "compile_load": compile_load})
+    return type("BenchmarkSerializer", (ModelSerializer,), {"Meta": meta})
+
+
+def get_items(amount: int):
+    return [
+        {"name": f"name {i}", "email": f"{i}@mail.com", "age": i % 100, "is_active": bool(i % 2), "note": None}
+        for i in range(amount)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_rest_framework(web.Application())
+    items = get_items(args.items)
+    results = {}
+    for compile_load, copy_data in ((False, True), (False, False), (True, False)):
+        serializer_class = get_serializer_class(compile_load)
+        seconds = timeit.timeit(
+            lambda: serializer_class(data=items, many=True, copy_data=copy_data).is_valid(raise_exception=True),
+            number=args.number,
+        )
+        results[compile_load, copy_data] = seconds / args.number * 1e3
+        print(
+            f"compile_load={compile_load!s:<5} copy_data={copy_data!s:<5} "
+            f"{results[compile_load, copy_data]:8.1f} ms per {args.items} items"
+        )
+    print(f"speedup: {results[False, True] / results[True, False]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ setup(
     long_description_content_type="text/markdown",
     keywords=("restframework rest_framework aiohttp"
               " serializers asyncio rest aiohttp_rest_framework"),
-    packages=find_packages(exclude=("tests", "tests.*")),
+    packages=find_packages(exclude=("tests", "tests.*", "benchmarks", "benchmarks.*")),
     python_requires=">=3.6",
     install_requires=[
         "aiohttp",
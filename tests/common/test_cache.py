@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from aiohttp_rest_framework.cache import ResponseCache, SingleFlight
+
+HEADERS = {"Content-Type": "application/json; charset=utf-8"}
+
+
+def test_cache_hit_and_miss():
+    cache = ResponseCache()
+    assert cache.get("key") is None
+    cache.set_list("key", b"[]", HEADERS, "users")
+    entry = cache.get("key")
+    assert entry.body == b"[]"
+    assert entry.headers == HEADERS
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1, "size": 2}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_size=10)
+    cache.set_object("first", b"1234", HEADERS, "users", 1)
+    cache.set_object("second", b"1234", HEADERS, "users", 2)
+    cache.get("first")  # "second" becomes least recently used
+    cache.set_object("third", b"1234", HEADERS, "users", 3)
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.evictions == 1
+    assert cache.size == 8
+
+    cache.set_object("too big", b"12345678901", HEADERS, "users", 4)
+    assert cache.get("too big") is None, "entry bigger than the cache was stored"
+
+
+def test_cache_ttl():
+    cache = ResponseCache(ttl=60)
+    cache.set_list("expired", b"[]", HEADERS, "users", ttl=0)
+    cache.set_list("alive", b"[]", HEADERS, "users")
+    time.sleep(0.001)
+    assert cache.get("expired") is None
+    assert cache.get("alive") is not None
+    assert cache.size == 2
+
+
+def test_cache_invalidate():
+    cache = ResponseCache()
+    cache.set_list("users", b"[]", HEADERS, "users")
+    cache.set_object("user 1", b"{}", HEADERS, "users", 1)
+    cache.set_object("user 2", b"{}", HEADERS, "users", 2)
+    cache.set_list("companies", b"[]", HEADERS, "companies")
+
+    cache.invalidate("users", [1])
+    assert cache.get("users") is None
+    assert cache.get("user 1") is None
+    assert cache.get("user 2") is not None
+    assert cache.get("companies") is not None
+
+    cache.invalidate("users")
+    assert cache.get("user 2") is None
+    assert cache.get("companies") is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_cache_invalidate_related():
+    cache = ResponseCache()
+    cache.set_list("companies", b"[]", HEADERS, "companies", related_tables=["users"])
+    cache.set_object("company 1", b"{}", HEADERS, "companies", 1, related_tables=["users"])
+    cache.set_object("company 2", b"{}", HEADERS, "companies", 2)
+
+    cache.invalidate("users", [1])
+    assert cache.get("companies") is None, "response with related objects wasn't invalidated"
+    assert cache.get("company 1") is None, "response with related objects wasn't invalidated"
+    assert cache.get("company 2") is not None
+
+
+async def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    results = await asyncio.gather(*(single_flight.do("key", func) for _ in range(5)))
+    assert results == [1] * 5, "concurrent calls weren't coalesced"
+    assert single_flight.in_flight() == 0
+    assert await single_flight.do("key", func) == 2, "finished call was reused"
+
+
+async def test_single_flight_error():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(*(single_flight.do("key", func) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.in_flight() == 0
+
+
+async def test_single_flight_cancellation():
+    single_flight = SingleFlight()
+    started = []
+
+    async def func():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(single_flight.do("key", func))
+    second = asyncio.ensure_future(single_flight.do("key", func))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "done", "cancelled caller cancelled the call for others"
+
+    third = asyncio.ensure_future(single_flight.do("key", func))
+    await asyncio.sleep(0.01)
+    third.cancel()
+    await asyncio.sleep(0)
+    assert single_flight.in_flight() == 0, "call without callers wasn't cancelled"
+    assert await single_flight.do("key", func) == "done"
+    assert len(started) == 3
@@ -0,0 +1,27 @@
+import gzip
+import zlib
+
+import pytest
+
+from aiohttp_rest_framework.compression import DEFLATE, GZIP, compress, select_coding
+
+
+@pytest.mark.parametrize("accept_encoding, coding", (
+    (None, None),
+    ("identity", None),
+    ("br", None),
+    ("gzip", GZIP),
+    ("deflate, gzip", GZIP),
+    ("gzip;q=0.5, deflate", DEFLATE),
+    ("*", GZIP),
+    ("gzip;q=0, *", DEFLATE),
+    ("gzip;q=0, deflate;q=0, *", None),
+))
+def test_select_coding(accept_encoding, coding):
+    assert select_coding(accept_encoding) == coding
+
+
+def test_compress():
+    body = b'{"name": "value"}' * 100
+    assert gzip.decompress(compress(body, GZIP)) == body
+    assert zlib.decompress(compress(body, DEFLATE)) == body
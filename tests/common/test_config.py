@@ -3,6 +3,7 @@ import asyncio
 import pytest
 
 from aiohttp_rest_framework import APP_CONFIG_KEY
+from aiohttp_rest_framework.filters import check_views_indexes
 from aiohttp_rest_framework.settings import DEFAULT_APP_CONN_PROP, PG_SA
 from tests.base_app import get_base_app
 
@@ -56,3 +57,12 @@ def test_invalid_schema_type():
     rest_config = {"schema_type": "invalid"}
     with pytest.raises(AssertionError, match="`schema_type` has to be one of"):
         get_base_app(rest_config)
+
+
+async def test_filter_and_ordering_fields_without_index_warning(caplog):
+    app = get_base_app()
+    await check_views_indexes(app)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("`created_at`" in message for message in messages), "no warning for column without index"
+    assert not any("`email`" in message for message in messages), "unique column is indexed"
+    assert any("orders by `phone`" in message for message in messages), "no warning for ordering column"
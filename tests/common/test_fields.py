@@ -3,10 +3,11 @@ import enum
 
 import marshmallow as ma
 import pytest
+import sqlalchemy as sa
 
 from aiohttp_rest_framework import fields
 from aiohttp_rest_framework.serializers import Serializer
-from aiohttp_rest_framework.utils import safe_issubclass
+from aiohttp_rest_framework.utils import ClassLookupDict, safe_issubclass
 
 
 class MyEnum(enum.Enum):
@@ -134,3 +135,32 @@ def test_ma_fields_patched_write_read_only():
     serializer = ReadWriteOnlyFieldsSerializer()
     assert serializer.fields["write"].load_only is True
     assert serializer.fields["read"].dump_only is True
+
+
+def test_class_lookup_dict_cache():
+    lookup = ClassLookupDict({sa.Integer: ma.fields.Integer})
+    assert lookup[sa.BigInteger()] is ma.fields.Integer
+    assert sa.Text() not in lookup
+    assert sa.BigInteger in lookup._cache and sa.Text in lookup._cache
+
+    lookup[sa.BigInteger] = ma.fields.Float
+    lookup[sa.Text] = ma.fields.String
+    assert lookup[sa.BigInteger()] is ma.fields.Float, "cache isn't invalidated"
+    assert lookup[sa.Text()] is ma.fields.String, "cache isn't invalidated"
+
+
+def test_register_field_mapping(monkeypatch):
+    class Money(sa.Numeric):
+        pass
+
+    class Price(Money):
+        pass
+
+    monkeypatch.setattr(fields, "sa_ma_pg_field_mapping", dict(fields.sa_ma_pg_field_mapping))
+    monkeypatch.setattr(fields, "sa_ma_pg_field_lookup", ClassLookupDict(fields.sa_ma_pg_field_mapping))
+    monkeypatch.setattr(fields.SAFieldBuilder, "field_lookup", fields.sa_ma_pg_field_lookup)
+    assert fields.sa_ma_pg_field_lookup[Price()] is fields.sa_ma_pg_field_mapping[sa.Numeric]
+
+    fields.register_field_mapping(Money, fields.Str)
+    assert fields.sa_ma_pg_field_lookup[Price()] is fields.Str
+    assert fields.SAFieldBuilder.field_lookup[Price()] is fields.Str
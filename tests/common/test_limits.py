@@ -0,0 +1,24 @@
+import asyncio
+
+from aiohttp_rest_framework.limits import ConcurrencyLimiter
+
+
+async def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(1, max_queue=1)
+    assert await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+    assert not await limiter.acquire(), "request over the queue limit wasn't shed"
+
+    limiter.release()
+    assert await waiting, "queued request wasn't admitted"
+    limiter.release()
+    assert limiter.stats() == {"active": 0, "waiting": 0, "admitted": 2, "queued": 1, "shed": 1}
+
+
+async def test_concurrency_limiter_queue_timeout():
+    limiter = ConcurrencyLimiter(1, max_queue=1, queue_timeout=0.01)
+    assert await limiter.acquire()
+    assert not await limiter.acquire(), "request waited longer than timeout"
+    assert limiter.stats() == {"active": 1, "waiting": 0, "admitted": 1, "queued": 0, "shed": 1}
@@ -0,0 +1,67 @@
+import pytest
+import sqlalchemy as sa
+
+from aiohttp_rest_framework.relations import Prefetch, SelectRelated
+from tests import models
+from tests.serializers import UserSerializer, UserWithCompanySerializer
+
+meta = sa.MetaData()
+
+people = sa.Table(
+    "people", meta,
+    sa.Column("id", sa.Integer, primary_key=True),
+)
+
+messages = sa.Table(
+    "messages", meta,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("sender_id", sa.ForeignKey("people.id")),
+    sa.Column("recipient_id", sa.ForeignKey("people.id")),
+)
+
+
+def test_prefetch_foreign_key():
+    foreign_key = Prefetch("users", models.users).get_foreign_key(models.companies)
+    assert foreign_key.parent is models.users.c.company_id
+    assert foreign_key.column is models.companies.c.id
+
+
+def test_prefetch_foreign_key_choice():
+    foreign_key = Prefetch("sent", messages, fk="sender_id").get_foreign_key(people)
+    assert foreign_key.parent is messages.c.sender_id
+
+
+@pytest.mark.parametrize("prefetch, parent", (
+    (Prefetch("messages", messages), people),
+    (Prefetch("companies", models.companies), models.users),
+))
+def test_prefetch_foreign_key_not_found(prefetch, parent):
+    with pytest.raises(AssertionError):
+        prefetch.get_foreign_key(parent)
+
+
+def test_select_related_from_field():
+    relation = SelectRelated.from_field(UserWithCompanySerializer, "company")
+    assert relation.table is models.companies
+    assert relation.get_foreign_key(models.users).parent is models.users.c.company_id
+
+
+def test_select_related_from_not_nested_field():
+    with pytest.raises(AssertionError):
+        SelectRelated.from_field(UserSerializer, "company_id")
+
+
+def test_select_related_join():
+    relation = SelectRelated("sender", people, fk="sender_id")
+    query = relation.join(sa.select([messages]), messages)
+    assert "LEFT OUTER JOIN people AS messages_sender ON messages_sender.id = messages.sender_id" in str(query)
+    assert "sender__id" in query.selected_columns.keys()
+
+
+@pytest.mark.parametrize("row, related", (
+    ({"id": 1, "sender__id": 2}, {"id": 2}),
+    ({"id": 1, "sender__id": None}, None),
+))
+def test_select_related_split(row, related):
+    SelectRelated("sender", people).split(row)
+    assert row == {"id": 1, "sender": related}
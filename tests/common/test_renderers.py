@@ -0,0 +1,153 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import marshmallow as ma
+import pytest
+
+from aiohttp_rest_framework.exceptions import ValidationError
+from aiohttp_rest_framework.parsers import CSVParser, JSONParser, NDJSONParser
+from aiohttp_rest_framework.renderers import (
+    NATIVE_TYPES,
+    CSVRenderer,
+    JSONRenderer,
+    NDJSONRenderer,
+    json_dumps,
+    select_renderer,
+)
+from aiohttp_rest_framework.serializers import Serializer
+from tests.base_app import get_base_app
+
+
+class TypesSerializer(Serializer):
+    datetime = ma.fields.DateTime()
+    date = ma.fields.Date()
+    time = ma.fields.Time()
+    formatted_date = ma.fields.Date(format="%d.%m.%Y")
+    uuid = ma.fields.UUID()
+    decimal = ma.fields.Decimal()
+    rounded_decimal = ma.fields.Decimal(places=1)
+    timedelta = ma.fields.TimeDelta()
+    minutes = ma.fields.TimeDelta(precision=ma.fields.TimeDelta.MINUTES)
+    stringified_uuid = ma.fields.UUID()
+
+
+OBJ = {
+    "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5, 678),
+    "date": datetime.date(2020, 1, 2),
+    "time": datetime.time(3, 4, 5),
+    "formatted_date": datetime.date(2020, 1, 2),
+    "uuid": uuid.uuid4(),
+    "decimal": decimal.Decimal("1.25"),
+    "rounded_decimal": decimal.Decimal("1.25"),
+    "timedelta": datetime.timedelta(minutes=2, seconds=3),
+    "minutes": datetime.timedelta(minutes=2, seconds=3),
+    "stringified_uuid": str(uuid.uuid4()),
+}
+
+
+def test_native_types_rendered_as_serialized():
+    renderer = JSONRenderer()
+    native_data = TypesSerializer(OBJ, native_types=NATIVE_TYPES).data
+    assert native_data["datetime"] is OBJ["datetime"], "native value was serialized by field"
+    assert native_data["uuid"] is OBJ["uuid"], "native value was serialized by field"
+    assert native_data["formatted_date"] == "02.01.2020"
+    assert json.loads(renderer.render(native_data)) == json.loads(json_dumps(TypesSerializer(OBJ).data))
+
+
+def test_native_subclass_values_dumped_as_is():
+    class DriverUUID(uuid.UUID):  # like asyncpg's uuid
+        pass
+
+    value = DriverUUID(str(uuid.uuid4()))
+    date_time = datetime.datetime(2020, 1, 2, 3, 4, 5)
+    data = TypesSerializer({**OBJ, "uuid": value, "date": date_time}, native_types=NATIVE_TYPES).data
+    assert data["uuid"] is value, "native subclass value was serialized by field"
+    assert data["date"] == "2020-01-02", "datetime was dumped as is by date field"
+
+
+def test_custom_dumps_native_types_are_opt_in():
+    assert JSONRenderer().native_types == NATIVE_TYPES
+    assert JSONRenderer(dumps=json.dumps).native_types == ()
+    data = TypesSerializer(OBJ, native_types=JSONRenderer(dumps=json.dumps).native_types).data
+    assert data["uuid"] == str(OBJ["uuid"]), "value unknown to custom dumps was dumped as is"
+
+
+class EpochDateTime(ma.fields.DateTime):
+    def _serialize(self, value, attr, obj, **kwargs):
+        return int(value.timestamp())
+
+
+class ShortUUID(ma.fields.UUID):
+    def _serialize(self, value, attr, obj, **kwargs):
+        return value.hex[:8]
+
+
+def test_fields_overriding_serialization_are_not_native():
+    class CustomSerializer(Serializer):
+        datetime = EpochDateTime()
+        uuid = ShortUUID()
+
+    data = CustomSerializer(OBJ, native_types=NATIVE_TYPES).data
+    assert data["datetime"] == int(OBJ["datetime"].timestamp()), "overridden serialization was skipped"
+    assert data["uuid"] == OBJ["uuid"].hex[:8], "overridden serialization was skipped"
+
+
+def test_renderer_with_str_dumps():
+    renderer = JSONRenderer(dumps=json.dumps, native_types=())
+    assert renderer.render({"a": 1}) == b'{"a": 1}'
+    assert renderer.content_type == "application/json; charset=utf-8"
+
+
+@pytest.mark.parametrize("accept, media_type", (
+    (None, "application/json"),
+    ("*/*", "application/json"),
+    ("text/html", "application/json"),
+    ("text/*", "text/csv"),
+    ("application/x-ndjson", "application/x-ndjson"),
+    ("application/x-ndjson;q=0.5, text/csv", "text/csv"),
+    ("*/*;q=0.8, text/csv;q=0.9", "text/csv"),
+    ("text/csv;q=0, */*", "application/json"),
+))
+def test_select_renderer(accept, media_type):
+    renderers = (JSONRenderer(), NDJSONRenderer(), CSVRenderer())
+    assert select_renderer(accept, renderers).media_type == media_type
+
+
+def test_stream_renderers():
+    data = [{"a": 1, "b": {"c": None}}, {"a": None, "b": True}]
+    for renderer in (JSONRenderer(), NDJSONRenderer(), CSVRenderer()):
+        streamed = b"".join((
+            renderer.render_stream_start(["a", "b"]),
+            renderer.render_stream_chunk(data[:1], ["a", "b"], first=True),
+            renderer.render_stream_chunk(data[1:], ["a", "b"], first=False),
+            renderer.render_stream_end(),
+        ))
+        assert streamed == renderer.render(data), f"{renderer.__class__.__name__} streams differently"
+    assert NDJSONRenderer().render(data) == b'{"a":1,"b":{"c":null}}\n{"a":null,"b":true}\n'
+    assert CSVRenderer().render(data) == b'a,b\r\n1,"{""c"": null}"\r\n,true\r\n'
+    assert CSVRenderer().render({"date": OBJ["date"]}) == b"date\r\n2020-01-02\r\n"
+
+
+def test_json_parser():
+    parser = JSONParser()
+    assert parser.parse(b'{"a": [1]}') == {"a": [1]}
+    for body in (b"", b"{", b"\xff"):
+        with pytest.raises(ValidationError):
+            parser.parse(body)
+
+
+def test_ndjson_and_csv_parsers():
+    assert NDJSONParser().parse(b'{"a": 1}\n\n{"a": 2}\n') == [{"a": 1}, {"a": 2}]
+    with pytest.raises(ValidationError):
+        NDJSONParser().parse(b'{"a": 1}\n{')
+    assert CSVParser().parse(b'a,b\r\n1,"x\ny"\r\n,2\r\n') == [{"a": "1", "b": "x\ny"}, {"b": "2"}]
+    with pytest.raises(ValidationError):
+        CSVParser().parse(b"a,b\r\n1\r\n")
+
+
+@pytest.mark.parametrize("option", ("renderers", "parsers"))
+def test_wrong_renderers_and_parsers_config_setup(option):
+    with pytest.raises(AssertionError, match=f"`{option}` have to be instances of"):
+        get_base_app({option: [json.dumps]})
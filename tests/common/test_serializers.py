@@ -1,7 +1,11 @@
+import datetime
+import uuid
+
 import marshmallow as ma
 import pytest
 
 from aiohttp_rest_framework import fields
+from aiohttp_rest_framework.renderers import NATIVE_TYPES
 from aiohttp_rest_framework.serializers import ModelSerializer, Serializer
 from tests import models
 from tests.base_app import get_base_app
@@ -118,3 +122,166 @@ def test_serializer_fields_all_and_custom_field():
     serializer = Ser()
     assert "custom" in serializer.fields
     assert len(models.users.columns) + 1 == len(serializer.fields)
+
+
+def test_model_serializer_fields_cache():
+    get_base_app()
+
+    class Ser(ModelSerializer):
+        custom = fields.Str()
+
+        class Meta:
+            model = models.users
+            fields = "__all__"
+            dump_only = ("created_at",)
+
+    first, second = Ser(), Ser()
+    assert len(Ser._fields_cache) == 1
+    assert list(first.fields) == list(second.fields)
+    assert list(first.dump_fields) == list(second.dump_fields)
+    assert list(first.load_fields) == list(second.load_fields)
+    for name, field in second.fields.items():
+        assert field is not first.fields[name], "fields are shared between instances"
+        assert type(field) is type(first.fields[name])
+        assert field.parent is second
+
+    partial = Ser(only=("id", "name"), load_only=("name",))
+    assert list(partial.fields) == ["id", "name"]
+    assert list(partial.dump_fields) == ["id"]
+    assert len(Ser._fields_cache) == 2
+    assert not Ser().fields["name"].load_only, "options of one instance leak to others"
+
+
+def test_model_serializer_fields_cache_disabled():
+    get_base_app()
+
+    class Ser(ModelSerializer):
+        class Meta:
+            model = models.users
+            fields = "__all__"
+            cache_fields = False
+
+    Ser()
+    assert not Ser._fields_cache
+
+
+class CompiledDumpSerializer(ModelSerializer):
+    password = fields.Str(load_only=True)
+    constant = fields.Method("get_constant")
+    email = fields.Str(data_key="mail")
+
+    class Meta:
+        model = models.users
+        fields = "__all__"
+        compile_dump = True
+
+    def get_constant(self, obj):
+        return 1
+
+
+class GenericDumpSerializer(CompiledDumpSerializer):
+    class Meta(CompiledDumpSerializer.Meta):
+        compile_dump = False
+
+
+class DriverUUID(uuid.UUID):  # like asyncpg's uuid
+    pass
+
+
+@pytest.mark.parametrize("kwargs", ({}, {"native_types": NATIVE_TYPES}, {"only": ("id", "email")}))
+def test_model_serializer_compiled_dump(kwargs):
+    get_base_app()
+    instances = [
+        {
+            "id": uuid.uuid4(), "name": "Name", "email": "test@test.com", "phone": 123, "password": "pwd",
+            "created_at": datetime.datetime.now(), "company_id": None,
+        },
+        {"id": str(uuid.uuid4()), "name": None, "email": "test@test.com", "created_at": None},  # some keys missing
+        {"id": DriverUUID(str(uuid.uuid4())), "name": "Name", "email": "test@test.com", "created_at": None},
+    ]
+    serializer = CompiledDumpSerializer(instances, many=True, **kwargs)
+    data = serializer.data
+    assert serializer._compiled_dump, "dump isn't compiled"
+    expected = GenericDumpSerializer(instances, many=True, **kwargs).data
+    assert data == expected
+    assert [list(item) for item in data] == [list(item) for item in expected], "order of keys differs"
+    assert CompiledDumpSerializer(instances[0], **kwargs).data == GenericDumpSerializer(instances[0], **kwargs).data
+
+
+def test_model_serializer_compiled_dump_with_hooks():
+    get_base_app()
+
+    class Ser(CompiledDumpSerializer):
+        @ma.post_dump
+        def add_field(self, data, **kwargs):
+            data["added"] = True
+            return data
+
+    serializer = Ser({"id": "1", "email": "test@test.com"})
+    assert serializer.data["added"]
+    assert serializer._compiled_dump is False, "serializer with hooks is compiled"
+
+
+class CompiledLoadSerializer(ModelSerializer):
+    password = fields.Str(load_only=True)
+    age = fields.Int(required=False, validate=ma.validate.Range(min=0))
+    is_active = fields.Bool(required=False, missing=True)
+    nickname = fields.Str(required=False, allow_none=True, data_key="nick")
+
+    class Meta:
+        model = models.users
+        fields = ("id", "name", "email", "phone", "password", "age", "is_active", "nickname")
+        compile_load = True
+
+
+class GenericLoadSerializer(CompiledLoadSerializer):
+    class Meta(CompiledLoadSerializer.Meta):
+        compile_load = False
+
+
+@pytest.mark.parametrize("data", (
+    {"name": "Name", "email": "test@test.com", "password": "pwd", "age": 10, "nick": None},
+    {"name": None, "email": 1, "password": "pwd", "phone": 123, "age": -1, "is_active": "yes", "nick": "nick"},
+    {"age": "10", "is_active": True, "id": "not id"},
+    "not a mapping",
+))
+@pytest.mark.parametrize("kwargs", ({}, {"partial": True}))
+def test_serializer_compiled_load(data, kwargs):
+    get_base_app()
+    for many in (False, True):
+        load_data = [data, data] if many else data
+        serializer = CompiledLoadSerializer(data=load_data, many=many, **kwargs)
+        expected = GenericLoadSerializer(data=load_data, many=many, **kwargs)
+        assert serializer.is_valid() == expected.is_valid()
+        assert serializer._compiled_load, "load isn't compiled"
+        assert serializer.errors == expected.errors
+        assert serializer.validated_data == expected.validated_data
+
+
+def test_serializer_compiled_load_many_not_collection():
+    get_base_app()
+    serializer = CompiledLoadSerializer(data={"name": "Name"}, many=True)
+    assert not serializer.is_valid()
+    expected = GenericLoadSerializer(data={"name": "Name"}, many=True)
+    expected.is_valid()
+    assert serializer.errors == expected.errors == {"_schema": ["Invalid input type."]}
+
+
+def test_serializer_compiled_load_with_hooks():
+    get_base_app()
+
+    class Ser(CompiledLoadSerializer):
+        @ma.validates("name")
+        def validate_name(self, value, **kwargs):
+            raise ma.ValidationError("Invalid name")
+
+    serializer = Ser(data={"name": "Name", "email": "test@test.com", "password": "pwd"})
+    assert not serializer.is_valid()
+    assert serializer.errors == {"name": ["Invalid name"]}
+    assert serializer._compiled_load is False, "serializer with hooks is compiled"
+
+
+def test_serializer_copy_data():
+    data = {"test": 1}
+    assert DataAttrSerializer(data=data).get_initial() is not data
+    assert DataAttrSerializer(data=data, copy_data=False).get_initial() is data
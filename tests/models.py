@@ -27,6 +27,10 @@ companies = sa.Table(
     "companies", meta,
     sa.Column("id", UUID, primary_key=True, default=uuid4),
     sa.Column("name", sa.Text),
+    sa.Column(
+        "updated_at", sa.DateTime, nullable=False,
+        default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow,
+    ),
 )
 
 
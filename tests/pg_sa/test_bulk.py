@@ -0,0 +1,226 @@
+import asyncio
+import json
+
+import sqlalchemy as sa
+from aiohttp.test_utils import TestClient
+
+from tests import models
+from tests.config import db
+from tests.pg_sa.utils import (
+    async_engine_connection,
+    create_data_fixtures,
+    create_db,
+    create_tables,
+    drop_db,
+    drop_tables,
+)
+
+
+def setup_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_db(db_name=db["database"]))
+    loop.close()
+
+
+def teardown_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(drop_db(db_name=db["database"]))
+    loop.close()
+
+
+def setup_function():
+    create_tables()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_data_fixtures())
+    loop.close()
+
+
+def teardown_function():
+    drop_tables()
+
+
+async def get_users_count() -> int:
+    async with async_engine_connection() as conn:
+        return await conn.fetch_val(sa.select([sa.func.count()]).select_from(models.users))
+
+
+def get_users_data(count: int):
+    return [{"name": f"User {i}", "email": f"user{i}@mail.com", "password": "pwd"} for i in range(count)]
+
+
+async def test_bulk_create(client: TestClient):
+    users_data = get_users_data(5)
+    response = await client.post("/bulk/users", json=users_data)
+    assert response.status == 201, "invalid response status code"
+    data = await response.json()
+    assert [user["email"] for user in data] == [user["email"] for user in users_data], "wrong order of created users"
+    assert all(user["id"] and user["created_at"] for user in data), "defaults weren't applied"
+    assert "password" not in data[0]
+    assert await get_users_count() == 8
+
+
+async def test_ingest_ndjson(client: TestClient):
+    users_data = get_users_data(5)
+    users_data[2]["name"] = None  # invalid
+    users_data[4]["email"] = "john@mail.com"  # already exists, fails COPY of the whole batch
+    lines = [json.dumps(user).encode() + b"\n" for user in users_data]
+    lines.insert(2, b"{not json\n")
+
+    async def body():
+        # chunks are split in the middle of lines
+        data = b"".join(lines)
+        for start in range(0, len(data), 7):
+            yield data[start:start + 7]
+
+    response = await client.post("/bulk/users", data=body(), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status == 200, "invalid response status code"
+    data = await response.json()
+    assert data["inserted"] == 2
+    assert data["rejected"] == 4
+    assert data["errors"]["2"] == {"error": "invalid json"}
+    assert "name" in data["errors"]["3"]
+    assert "error" in data["errors"]["4"], "object of failed batch isn't rejected"
+    assert len(data["errors"]) == 3, "amount of rejection details isn't limited"
+    assert await get_users_count() == 5
+
+    async with async_engine_connection() as conn:
+        user = await conn.fetch_one(models.users.select().where(models.users.c.email == "user0@mail.com"))
+    assert user["id"] and user["created_at"], "defaults weren't applied"
+
+
+async def test_ingest_csv(client: TestClient):
+    body = (
+        b"name,email,password,phone\r\n"
+        b'"Multi\nLine",csv0@mail.com,pwd,123\r\n'
+        b"No Phone,csv1@mail.com,pwd,\r\n"
+        b"Wrong,csv2@mail.com\r\n"
+    )
+    response = await client.post("/bulk/users", data=body, headers={"Content-Type": "text/csv"})
+    assert response.status == 200, "invalid response status code"
+    data = await response.json()
+    assert data == {"inserted": 2, "rejected": 1, "errors": {"2": {"error": "expected 4 values, got 2"}}}
+
+    async with async_engine_connection() as conn:
+        users = await conn.fetch_all(models.users.select().where(models.users.c.email.startswith("csv")))
+    assert sorted((user["name"], user["phone"]) for user in users) == [("Multi\nLine", "123"), ("No Phone", "")]
+
+
+async def test_bulk_create_partial(client: TestClient):
+    users_data = get_users_data(5)
+    users_data[1]["name"] = None  # invalid
+    users_data[3]["email"] = "john@mail.com"  # already exists, fails in database
+    response = await client.post("/bulk/users", json=users_data)
+    assert response.status == 207, "invalid response status code"
+    data = await response.json()
+    assert set(data["errors"]) == {"1", "3"}
+    assert "name" in data["errors"]["1"]
+    assert "error" in data["errors"]["3"]
+    assert [user and user["email"] for user in data["results"]] == [
+        "user0@mail.com", None, "user2@mail.com", None, "user4@mail.com",
+    ]
+    assert await get_users_count() == 6
+
+
+async def test_bulk_create_all_invalid(client: TestClient):
+    response = await client.post("/bulk/users", json=[{"name": "No Email"}, "not an object"])
+    assert response.status == 400, "invalid response status code"
+    data = await response.json()
+    assert set(data) == {"0", "1"}
+    assert await get_users_count() == 3
+
+
+async def test_bulk_create_atomic_invalid(client: TestClient):
+    users_data = get_users_data(3)
+    users_data[2].pop("email")
+    response = await client.post("/bulk-atomic/users", json=users_data)
+    assert response.status == 400, "invalid response status code"
+    data = await response.json()
+    assert set(data) == {"2"}
+    assert await get_users_count() == 3
+
+
+async def test_bulk_create_atomic_database_error(client: TestClient):
+    users_data = get_users_data(3)
+    users_data[2]["email"] = "john@mail.com"  # fails in the second batch
+    response = await client.post("/bulk-atomic/users", json=users_data)
+    assert response.status == 400, "invalid response status code"
+    data = await response.json()
+    assert "error" in data
+    assert await get_users_count() == 3, "first batch wasn't rolled back"
+
+
+async def test_bulk_create_not_allowed(client: TestClient):
+    response = await client.post("/users", json=get_users_data(2))
+    assert response.status == 400, "invalid response status code"
+    assert await get_users_count() == 3
+
+
+async def get_users() -> dict:
+    async with async_engine_connection() as conn:
+        return {str(user["id"]): user for user in await conn.fetch_all(models.users.select())}
+
+
+async def test_bulk_update(client: TestClient):
+    users = list((await get_users()).values())
+    missing_id = "f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"
+    response = await client.patch("/bulk/users", json=[
+        {"id": str(users[0]["id"]), "name": "First"},
+        {"id": str(users[1]["id"]), "name": "Second", "phone": "+111"},
+        {"id": missing_id, "name": "Missing"},
+    ])
+    assert response.status == 200, "invalid response status code"
+    data = await response.json()
+    assert data["updated"] == 2
+    assert data["not_found"] == [missing_id]
+    assert {user["name"] for user in data["results"]} == {"First", "Second"}
+
+    updated_users = await get_users()
+    assert updated_users[str(users[0]["id"])]["name"] == "First"
+    assert updated_users[str(users[0]["id"])]["phone"] == users[0]["phone"], "not passed field was updated"
+    assert updated_users[str(users[1]["id"])]["phone"] == "+111"
+    assert updated_users[str(users[2]["id"])]["name"] == users[2]["name"]
+
+
+async def test_bulk_update_invalid(client: TestClient):
+    user_id = next(iter(await get_users()))
+    response = await client.patch("/bulk/users", json=[
+        {"id": user_id, "name": "First"},
+        {"name": "No Id"},
+        {"id": user_id, "name": "Duplicate"},
+        {"id": "f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"},  # nothing to update
+    ])
+    assert response.status == 400, "invalid response status code"
+    data = await response.json()
+    assert set(data) == {"1", "2", "3"}
+    assert (await get_users())[user_id]["name"] != "First"
+
+
+async def test_bulk_update_database_error(client: TestClient):
+    users = list((await get_users()).values())
+    response = await client.patch("/bulk/users", json=[
+        {"id": str(users[0]["id"]), "name": "First"},
+        {"id": str(users[1]["id"]), "email": users[2]["email"]},  # unique violation
+    ])
+    assert response.status == 400, "invalid response status code"
+    assert (await get_users())[str(users[0]["id"])]["name"] == users[0]["name"], "update wasn't rolled back"
+
+
+async def test_bulk_destroy(client: TestClient):
+    user_ids = list(await get_users())
+    missing_id = "f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"
+    response = await client.delete("/bulk/users", json={"ids": user_ids[:2] + [missing_id]})
+    assert response.status == 200, "invalid response status code"
+    data = await response.json()
+    assert data == {"deleted": 2, "not_found": [missing_id]}
+    assert set(await get_users()) == set(user_ids[2:])
+
+
+async def test_bulk_destroy_invalid(client: TestClient):
+    response = await client.delete("/bulk/users", json={"ids": [next(iter(await get_users())), "invalid"]})
+    assert response.status == 400, "invalid response status code"
+    data = await response.json()
+    assert set(data["ids"]) == {"1"}
+    assert await get_users_count() == 3
+
+    response = await client.delete("/bulk/users", json={"ids": []})
+    assert response.status == 400, "invalid response status code"
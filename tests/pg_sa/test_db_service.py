@@ -4,7 +4,7 @@ import uuid
 import pytest
 
 from aiohttp_rest_framework.db import op
-from aiohttp_rest_framework.db.pg_sa import PGSAService
+from aiohttp_rest_framework.db.pg_sa import PGSARepository, PGSAService
 from aiohttp_rest_framework.exceptions import FieldValidationError, ObjectNotFound
 from tests import models
 from tests.config import db
@@ -113,3 +113,60 @@ async def test_foreign_key_object_not_found(get_db_service, user):
     service: PGSAService = await get_db_service(models.users)
     with pytest.raises(ObjectNotFound):
         await service.update(user, dict(company_id=str(uuid.uuid4())))
+
+
+async def test_db_get_only_columns(get_db_service, user):
+    service: PGSAService = await get_db_service(models.users)
+    user_from_db = await service.get({"id": user["id"]}, columns=["id", "name"])
+    assert dict(user_from_db) == {"id": user["id"], "name": user["name"]}
+
+
+@pytest.mark.run_loop
+async def test_db_batch_load(get_db_service, monkeypatch):
+    service: PGSAService = await get_db_service(models.users)
+    users = await service.all()
+    queries = []
+    get_many = PGSARepository.get_many
+
+    async def counted_get_many(self, values, key=None):
+        queries.append(list(values))
+        return await get_many(self, values, key)
+
+    monkeypatch.setattr(PGSARepository, "get_many", counted_get_many)
+    missing_id = uuid.uuid4()
+    results = await asyncio.gather(
+        *(service.load(user["id"]) for user in users),
+        service.load(users[0]["id"]),
+        service.load(missing_id),
+        return_exceptions=True,
+    )
+    assert [row["id"] for row in results[:len(users) + 1]] == [user["id"] for user in users] + [users[0]["id"]]
+    assert isinstance(results[-1], ObjectNotFound)
+    assert len(queries) == 1, "lookups weren't merged"
+    assert len(queries[0]) == len(users) + 1, "duplicate values weren't merged"
+
+    # invalid value doesn't fail lookups of other values
+    queries.clear()
+    results = await asyncio.gather(service.load(users[0]["id"]), service.load("invalid"), return_exceptions=True)
+    assert results[0]["id"] == users[0]["id"]
+    assert isinstance(results[1], ObjectNotFound)
+    assert len(queries) == 3
+
+
+@pytest.mark.run_loop
+async def test_db_batch_load_max_size(get_db_service, monkeypatch):
+    service: PGSAService = await get_db_service(models.users)
+    users = await service.all()
+    monkeypatch.setattr(PGSAService, "batch_max_size", 2)
+    monkeypatch.setattr(PGSAService, "batch_window", 0.01)
+    queries = []
+    get_many = PGSARepository.get_many
+
+    async def counted_get_many(self, values, key=None):
+        queries.append(list(values))
+        return await get_many(self, values, key)
+
+    monkeypatch.setattr(PGSARepository, "get_many", counted_get_many)
+    results = await asyncio.gather(*(service.load(user["email"], "email") for user in users))
+    assert [row["id"] for row in results] == [user["id"] for user in users]
+    assert [len(values) for values in queries] == [2, len(users) - 2]
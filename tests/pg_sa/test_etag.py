@@ -0,0 +1,157 @@
+import asyncio
+
+import sqlalchemy as sa
+from aiohttp import hdrs
+from aiohttp.test_utils import TestClient
+
+from aiohttp_rest_framework.views import GenericAPIView
+from tests import models
+from tests.config import db
+from tests.pg_sa.utils import (
+    async_engine_connection,
+    create_data_fixtures,
+    create_db,
+    create_tables,
+    drop_db,
+    drop_tables,
+)
+
+
+def setup_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_db(db_name=db["database"]))
+    loop.close()
+
+
+def teardown_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(drop_db(db_name=db["database"]))
+    loop.close()
+
+
+def setup_function():
+    create_tables()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_data_fixtures())
+    loop.close()
+
+
+def teardown_function():
+    drop_tables()
+
+
+async def get_company(company_id=None):
+    query = models.companies.select().limit(1)
+    if company_id is not None:
+        query = query.where(models.companies.c.id == company_id)
+    async with async_engine_connection() as conn:
+        return await conn.fetch_one(query)
+
+
+async def test_etag_from_body(client: TestClient, user):
+    for url in ("/etag/users", f"/etag/users/{user['id']}"):
+        response = await client.get(url)
+        assert response.status == 200, "invalid response"
+        etag = response.headers[hdrs.ETAG]
+
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+        assert response.status == 304, "matching etag wasn't respected"
+        assert response.headers[hdrs.ETAG] == etag
+        assert await response.read() == b""
+
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: f'"other", W/{etag}'})
+        assert response.status == 304, "etags list with weak etag wasn't respected"
+
+        async with async_engine_connection() as conn:
+            await conn.execute(models.users.update().where(models.users.c.id == user["id"]), {"name": url})
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+        assert response.status == 200, "changed data wasn't sent"
+        assert response.headers[hdrs.ETAG] != etag
+
+
+async def test_etag_sparse_fields(client: TestClient, user):
+    response = await client.get(f"/etag/users/{user['id']}")
+    etag = response.headers[hdrs.ETAG]
+    response = await client.get(f"/etag/users/{user['id']}?fields=id", headers={hdrs.IF_NONE_MATCH: etag})
+    assert response.status == 200, "etag of other representation matched"
+
+
+async def test_etag_from_version_column(client: TestClient):
+    company_id = (await get_company())["id"]
+    for url in ("/etag/companies", f"/etag/companies/{company_id}"):
+        company = await get_company(company_id)
+        response = await client.get(url)
+        assert response.status == 200, "invalid response"
+        etag = response.headers[hdrs.ETAG]
+
+        # version column isn't changed, so the data is considered the same
+        async with async_engine_connection() as conn:
+            query = models.companies.update().where(models.companies.c.id == company["id"])
+            await conn.execute(query.values(name=url, updated_at=company["updated_at"]))
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+        assert response.status == 304, "etag wasn't taken from version column"
+
+        response = await client.patch(f"/etag/companies/{company['id']}", json={"name": "Updated"})
+        assert response.status == 200, "invalid response"
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+        assert response.status == 200, "changed data wasn't sent"
+        assert response.headers[hdrs.ETAG] != etag
+
+
+async def test_version_queried_only_for_conditional_requests(client: TestClient, monkeypatch):
+    calls = []
+    original_get_version_etag = GenericAPIView.get_version_etag
+
+    async def get_version_etag(self):
+        calls.append(self.request.path)
+        return await original_get_version_etag(self)
+
+    monkeypatch.setattr(GenericAPIView, "get_version_etag", get_version_etag)
+    company_id = (await get_company())["id"]
+    urls = (
+        "/etag/companies",
+        f"/etag/companies/{company_id}",
+        f"/etag/companies/{company_id}?fields=name",
+        "/etag-paginated/companies?limit=1",
+    )
+    for url in urls:
+        response = await client.get(url)
+        assert response.status == 200, "invalid response"
+        etag = response.headers[hdrs.ETAG]
+        assert calls == [], "version was queried without If-None-Match"
+
+        response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+        assert response.status == 304, "etag of fetched objects differs from etag of conditional request"
+        assert len(calls) == 1
+        calls.clear()
+
+
+async def test_paginated_list_etag_changes_with_page(client: TestClient):
+    url = "/etag-paginated/companies?limit=1"
+    response = await client.get(url)
+    etag = response.headers[hdrs.ETAG]
+    company = (await response.json())["results"][0]
+    response = await client.patch(f"/etag/companies/{company['id']}", json={"name": "Updated"})
+    assert response.status == 200, "invalid response"
+    response = await client.get(url, headers={hdrs.IF_NONE_MATCH: etag})
+    assert response.status == 200, "changed page wasn't sent"
+    assert response.headers[hdrs.ETAG] != etag
+
+
+async def test_list_etag_from_version_column_changes_on_delete(client: TestClient):
+    response = await client.get("/etag/companies")
+    etag = response.headers[hdrs.ETAG]
+    async with async_engine_connection() as conn:
+        not_used = ~models.companies.c.id.in_(sa.select([models.users.c.company_id]))
+        company = await conn.fetch_one(sa.select([models.companies]).where(not_used))
+        await conn.execute(models.companies.delete().where(models.companies.c.id == company["id"]))
+    response = await client.get("/etag/companies", headers={hdrs.IF_NONE_MATCH: etag})
+    assert response.status == 200, "deletion wasn't noticed"
+    assert len(await response.json()) == 1
+
+
+async def test_etag_not_found(client: TestClient):
+    url = "/etag/companies/f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"
+    response = await client.get(url, headers={hdrs.IF_NONE_MATCH: "*"})
+    assert response.status == 404, "invalid response"
+    assert hdrs.ETAG not in response.headers
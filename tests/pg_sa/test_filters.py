@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+
+from aiohttp.test_utils import TestClient
+from yarl import URL
+
+from tests import models
+from tests.config import db
+from tests.pg_sa.utils import (
+    async_engine_connection,
+    create_data_fixtures,
+    create_db,
+    create_tables,
+    drop_db,
+    drop_tables,
+)
+
+
+def setup_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_db(db_name=db["database"]))
+    loop.close()
+
+
+def teardown_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(drop_db(db_name=db["database"]))
+    loop.close()
+
+
+def setup_function():
+    create_tables()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_data_fixtures())
+    loop.close()
+
+
+def teardown_function():
+    drop_tables()
+
+
+async def test_filter_eq(client: TestClient, user):
+    response = await client.get("/filter/users", params={"email": user["email"]})
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert [u["id"] for u in data] == [str(user["id"])]
+
+
+async def test_filter_in(client: TestClient):
+    response = await client.get("/filter/users", params={"email__in": "john@mail.com,mark@mail.com"})
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert sorted(u["email"] for u in data) == ["john@mail.com", "mark@mail.com"]
+
+
+async def test_filter_range(client: TestClient):
+    now = datetime.datetime.utcnow()
+    async with async_engine_connection() as conn:
+        query = models.users.update().where(models.users.c.email == "john@mail.com")
+        await conn.execute(query, {"created_at": now - datetime.timedelta(days=10)})
+
+    params = {"created_at__lt": (now - datetime.timedelta(days=1)).isoformat()}
+    response = await client.get("/filter/users", params=params)
+    data = await response.json()
+    assert [u["email"] for u in data] == ["john@mail.com"]
+
+    params = {
+        "created_at__gte": (now - datetime.timedelta(days=1)).isoformat(),
+        "created_at__lt": (now + datetime.timedelta(days=1)).isoformat(),
+    }
+    response = await client.get("/filter/users", params=params)
+    data = await response.json()
+    assert sorted(u["email"] for u in data) == ["mark@mail.com", "o.twist@mail.com"]
+
+
+async def test_filter_isnull_and_startswith(client: TestClient):
+    response = await client.get("/filter/users", params={"company_id__isnull": "true"})
+    assert await response.json() == [], "all users have company"
+
+    response = await client.get("/filter/users", params={"company_id__isnull": "false", "name__startswith": "Mar"})
+    data = await response.json()
+    assert [u["name"] for u in data] == ["Mark Twain"]
+
+
+async def test_filter_not_declared_param_ignored(client: TestClient):
+    response = await client.get("/filter/users", params={"phone": "nothing like this"})
+    assert response.status == 200, "invalid response"
+    assert len(await response.json()) == 3
+
+
+async def test_filter_invalid_value(client: TestClient):
+    response = await client.get("/filter/users", params={"created_at__gte": "not a date"})
+    assert response.status == 400, "invalid response"
+    data = await response.json()
+    assert "created_at__gte" in data
+
+
+async def test_default_ordering(client: TestClient):
+    response = await client.get("/ordering/users")
+    assert response.status == 200, "invalid response"
+    names = [u["name"] for u in await response.json()]
+    assert names == sorted(names, reverse=True), "view's default ordering isn't applied"
+
+    response = await client.get("/users")
+    ids = [u["id"] for u in await response.json()]
+    assert ids == sorted(ids), "list isn't ordered by primary key by default"
+
+
+async def test_ordering_param(client: TestClient):
+    response = await client.get("/ordering/users", params={"ordering": "name"})
+    names = [u["name"] for u in await response.json()]
+    assert names == sorted(names)
+
+    # two users have the same phone, ties are broken by primary key
+    response = await client.get("/ordering/users", params={"ordering": "-phone"})
+    data = await response.json()
+    assert [u["phone"] for u in data] == ["+987654321", "+987654321", "+123456789"]
+    assert data[0]["id"] < data[1]["id"], "ties aren't ordered by primary key"
+
+
+async def test_ordering_param_not_allowed_field(client: TestClient):
+    response = await client.get("/ordering/users", params={"ordering": "email"})
+    assert response.status == 400, "invalid response"
+
+
+async def test_ordering_with_keyset_pagination(client: TestClient):
+    names = []
+    params = {"ordering": "-phone,name"}  # mixed directions
+    url = URL("/ordering-keyset/users").with_query(params)
+    while url is not None:
+        response = await client.get(url.path_qs)
+        assert response.status == 200, "invalid response"
+        data = await response.json()
+        names.extend(u["name"] for u in data["results"])
+        url = URL(data["next"]) if data["next"] else None
+    assert names == ["Mark Twain", "Oliver Twist", "John Doe"]
+
+
+async def test_ordering_with_streaming(client: TestClient):
+    response = await client.get("/stream/users", params={"ordering": "-name"})
+    names = [u["name"] for u in await response.json()]
+    assert names == ["Oliver Twist", "Mark Twain", "John Doe"]
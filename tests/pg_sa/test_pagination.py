@@ -0,0 +1,178 @@
+import asyncio
+from collections import OrderedDict
+
+from aiohttp.test_utils import TestClient
+from yarl import URL
+
+from aiohttp_rest_framework.db.pg_sa import PGSAService
+from tests import models
+from tests.config import db
+from tests.pg_sa.utils import (
+    async_engine_connection,
+    create_data_fixtures,
+    create_db,
+    create_tables,
+    drop_db,
+    drop_tables,
+    get_async_engine,
+)
+
+
+def setup_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_db(db_name=db["database"]))
+    loop.close()
+
+
+def teardown_module():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(drop_db(db_name=db["database"]))
+    loop.close()
+
+
+def setup_function():
+    create_tables()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_data_fixtures())
+    loop.close()
+
+
+def teardown_function():
+    drop_tables()
+
+
+async def test_keyset_pagination(client: TestClient):
+    response = await client.get("/keyset/users")
+    assert response.status == 200, "invalid response"
+    first_page = await response.json()
+    assert len(first_page["results"]) == 2, "wrong page size"
+    assert first_page["next"], "next page link is missing"
+
+    response = await client.get(URL(first_page["next"]).path_qs)
+    assert response.status == 200, "invalid response"
+    second_page = await response.json()
+    assert len(second_page["results"]) == 1
+    assert second_page["next"] is None, "last page has next page link"
+
+    ids = [user["id"] for user in first_page["results"] + second_page["results"]]
+    assert ids == sorted(ids), "users aren't ordered by primary key"
+    assert len(set(ids)) == 3, "pages overlap"
+
+
+async def test_keyset_pagination_page_size_param(client: TestClient):
+    response = await client.get("/keyset/users", params={"page_size": 5})
+    data = await response.json()
+    assert len(data["results"]) == 3
+    assert data["next"] is None
+
+
+async def test_keyset_pagination_link_header(client: TestClient):
+    response = await client.get("/keyset-link/users")
+    assert response.status == 200, "invalid response"
+    first_page = await response.json()
+    assert len(first_page) == 2, "wrong page size"
+    assert "next" in response.links, "next page link is missing in headers"
+
+    response = await client.get(response.links["next"]["url"].path_qs)
+    second_page = await response.json()
+    assert len(second_page) == 1
+    assert "next" not in response.links
+
+    created = [user["created_at"] for user in first_page + second_page]
+    assert created == sorted(created, reverse=True), "users aren't ordered by `-created_at`"
+
+
+async def test_keyset_pagination_sparse_fields(client: TestClient):
+    response = await client.get("/keyset-link/users", params={"fields": "name"})
+    assert response.status == 200, "invalid response"
+    first_page = await response.json()
+    assert first_page and all(list(user) == ["name"] for user in first_page)
+
+    response = await client.get(response.links["next"]["url"].path_qs)
+    assert response.status == 200, "invalid response"
+    second_page = await response.json()
+    assert len(second_page) == 1 and list(second_page[0]) == ["name"]
+
+
+async def test_keyset_pagination_invalid_cursor(client: TestClient):
+    for cursor in ("not a cursor", "WyJub3QgdXVpZCJd"):  # the latter is `["not uuid"]`
+        response = await client.get("/keyset/users", params={"cursor": cursor})
+        assert response.status == 400, "invalid response"
+        data = await response.json()
+        assert data["error"] == "Invalid cursor"
+
+
+async def test_limit_offset_pagination(client: TestClient):
+    response = await client.get("/limit-offset/users")
+    assert response.status == 200, "invalid response"
+    first_page = await response.json()
+    assert first_page["count"] == 3, "wrong exact count"
+    assert len(first_page["results"]) == 2, "wrong default limit"
+    assert first_page["previous"] is None
+    assert first_page["next"], "next page link is missing"
+
+    response = await client.get(URL(first_page["next"]).path_qs)
+    second_page = await response.json()
+    assert len(second_page["results"]) == 1
+    assert second_page["next"] is None, "last page has next page link"
+    assert second_page["previous"], "previous page link is missing"
+
+    ids = [user["id"] for user in first_page["results"] + second_page["results"]]
+    assert len(set(ids)) == 3, "pages overlap"
+
+
+async def test_limit_offset_pagination_params(client: TestClient):
+    response = await client.get("/limit-offset/users", params={"limit": 1, "offset": 1})
+    data = await response.json()
+    assert len(data["results"]) == 1
+    assert URL(data["next"]).query["offset"] == "2"
+    assert URL(data["previous"]).query["offset"] == "0"
+
+
+async def test_limit_offset_pagination_estimated_count(client: TestClient):
+    async with async_engine_connection() as conn:
+        await conn.execute("ANALYZE users")
+    response = await client.get("/estimated-count/users")
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert data["count"] == 3, "wrong estimated count"
+
+    async with async_engine_connection() as conn:
+        await conn.execute(models.users.delete())
+        await conn.execute("ANALYZE users")
+    response = await client.get("/estimated-count/users")
+    data = await response.json()
+    assert data["count"] == 3, "estimated count isn't cached"
+    assert data["results"] == []
+
+
+async def test_limit_offset_pagination_no_count(client: TestClient):
+    response = await client.get("/no-count/users")
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert data["count"] is None
+    assert len(data["results"]) == 2
+    assert data["next"]
+
+
+async def test_estimated_count_of_filtered_query(user):
+    service = PGSAService(models.users, await get_async_engine())
+    query = service.get_all_query().where(models.users.c.email == user["email"])
+    assert await service.estimate_count(query) >= 1
+    assert await service.count(query) == 1
+
+
+async def test_estimated_counts_cache_is_bounded(user, monkeypatch):
+    service = PGSAService(models.users, await get_async_engine())
+    monkeypatch.setattr(service.repo, "_estimated_counts", OrderedDict())
+    monkeypatch.setattr(service.repo, "estimated_counts_max_size", 2)
+    emails = ["a@example.com", "b@example.com", "c@example.com"]
+    for email in emails:
+        query = service.get_all_query().where(models.users.c.email == email)
+        await service.estimate_count(query, cache_ttl=60)
+    assert len(service.repo._estimated_counts) == 2, "least recently used count isn't evicted"
+
+    for cache_key, (_, count) in service.repo._estimated_counts.items():
+        service.repo._estimated_counts[cache_key] = (0, count)
+    await service.estimate_count(query)
+    assert len(service.repo._estimated_counts) == 1, "expired count isn't evicted on read"
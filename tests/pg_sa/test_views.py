@@ -1,9 +1,23 @@
 import asyncio
+import csv
+import io
+import json
 
 from aiohttp.test_utils import TestClient
 
+from aiohttp_rest_framework import APP_CONFIG_KEY
+from aiohttp_rest_framework.db.pg_sa import PGSARepository, PGSAService
+from tests import models
 from tests.config import db
-from tests.pg_sa.utils import create_data_fixtures, create_db, create_tables, drop_db, drop_tables
+from tests.pg_sa.utils import (
+    async_engine_connection,
+    create_data_fixtures,
+    create_db,
+    create_tables,
+    drop_db,
+    drop_tables,
+)
+from tests.views import LimitedView, UsersCoalescedRetrieveView, UsersSingleQueryView
 
 
 def setup_module():
@@ -39,6 +53,98 @@ async def test_list_view(client: TestClient):
     assert user.get("password") is None, "read only field is in serializer data"
 
 
+async def test_streaming_list_view(client: TestClient):
+    response = await client.get("/stream/users")
+    assert response.status == 200, "invalid response"
+    assert response.content_type == "application/json"
+    assert response.headers.get("Transfer-Encoding") == "chunked", "response is not streamed"
+    data = await response.json()
+    regular_response = await client.get("/users")
+    assert data == await regular_response.json(), "streamed data differs from regular list"
+
+
+async def test_streaming_list_view_empty(client: TestClient):
+    async with async_engine_connection() as conn:
+        await conn.execute(models.users.delete())
+    response = await client.get("/stream/users")
+    assert response.status == 200, "invalid response"
+    assert await response.json() == []
+
+
+async def test_list_view_export_renderers(client: TestClient):
+    regular_response = await client.get("/users")
+    users = await regular_response.json()
+
+    # streamed regardless of pagination
+    response = await client.get("/limit-offset/users", headers={"Accept": "application/x-ndjson"})
+    assert response.status == 200, "invalid response"
+    assert response.content_type == "application/x-ndjson"
+    assert response.headers.get("Transfer-Encoding") == "chunked", "response is not streamed"
+    lines = (await response.text()).splitlines()
+    assert [json.loads(line) for line in lines] == users, "streamed data differs from regular list"
+
+    params = {"fields": "id,name,created_at"}
+    response = await client.get("/export/users", params=params, headers={"Accept": "text/csv"})
+    assert response.status == 200, "invalid response"
+    assert response.content_type == "text/csv"
+    rows = list(csv.reader(io.StringIO(await response.text())))
+    assert rows[0] == ["id", "name", "created_at"]
+    assert rows[1:] == [[user["id"], user["name"], user["created_at"]] for user in users]
+    assert response.headers["Vary"] == "Accept", "negotiated response doesn't vary by accept"
+
+    response = await client.get("/export/users")
+    assert response.content_type == "application/json"
+    assert response.headers["Vary"] == "Accept"
+
+
+async def test_list_view_export_renderers_are_opt_in(client: TestClient):
+    response = await client.get("/users", headers={"Accept": "text/csv"})
+    assert response.status == 200, "invalid response"
+    assert response.content_type == "application/json", "list is exported without opt-in"
+    assert "Vary" not in response.headers
+
+
+async def test_list_view_export_renderers_empty(client: TestClient):
+    async with async_engine_connection() as conn:
+        await conn.execute(models.users.delete())
+    response = await client.get("/export/users", params={"fields": "id,name"}, headers={"Accept": "text/csv"})
+    assert response.status == 200, "invalid response"
+    assert await response.text() == "id,name\r\n"
+    response = await client.get("/export/users", headers={"Accept": "application/x-ndjson"})
+    assert await response.text() == ""
+
+
+async def test_list_view_sparse_fields(client: TestClient):
+    response = await client.get("/users", params={"fields": "name,email"})
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert data, "response data is empty"
+    assert all(list(user) == ["name", "email"] for user in data), "wrong fields dumped"
+
+    response = await client.get("/users", params={"exclude": "email,company_id"})
+    data = await response.json()
+    assert all("email" not in user and "company_id" not in user and "name" in user for user in data)
+
+
+async def test_retrieve_view_sparse_fields(client: TestClient, user):
+    response = await client.get(f"/users/{user['id']}", params={"fields": "id,phone"})
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert data == {"id": str(user["id"]), "phone": user["phone"]}
+
+
+async def test_sparse_fields_invalid(client: TestClient):
+    # `password` is a model column, but it's write only
+    for fields in ("name,unknown", "password"):
+        response = await client.get("/users", params={"fields": fields})
+        assert response.status == 400, "invalid response"
+        data = await response.json()
+        assert "fields" in data["error"]
+
+    response = await client.get("/users", params={"exclude": "unknown"})
+    assert response.status == 400, "invalid response"
+
+
 async def test_retrieve_view(client: TestClient, user):
     response = await client.get(f"/users/{user['id']}")
     assert response.status == 200, "invalid response"
@@ -89,6 +195,218 @@ async def test_create_with_null_value_that_must_not_be_null(client: TestClient,
     assert "password" in data["error"] and "null" in data["error"], "caught wrong error"
 
 
+async def test_view_renderers_and_parsers(client: TestClient):
+    user_data = b'{"name": "Renderer", "email": "renderer@test.com", "phone": 1.5, "password": "pwd"}'
+    # the first parser is used for unknown content type
+    response = await client.post("/custom-renderer/users", data=user_data, headers={"Content-Type": "text/plain"})
+    assert response.status == 201, "invalid response"
+    assert response.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert (await response.text()).startswith('{\n  "'), "view's renderer wasn't used"
+    data = await response.json()
+    assert data["phone"] == "1.5", "view's parser wasn't used"
+
+    response = await client.get("/custom-renderer/users")
+    assert response.status == 200, "invalid response"
+    users = await response.json()
+    created = next(user for user in users if user["id"] == data["id"])
+    assert created["created_at"] == data["created_at"]
+
+
+async def test_compressed_list_view(client: TestClient):
+    regular_response = await client.get("/users")
+    users = await regular_response.json()
+    cache = client.app[APP_CONFIG_KEY].response_cache
+    cache.clear()
+
+    response = await client.get("/compressed/users", headers={"Accept-Encoding": "gzip"})
+    assert response.status == 200, "invalid response"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding, Accept"
+    assert await response.json() == users
+    assert all(entry.body.startswith(b"\x1f\x8b") for entry in cache._entries.values()), "compressed form isn't cached"
+
+    response = await client.get("/compressed/users", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert await response.json() == users
+    assert cache.hits == 1
+
+    response = await client.get("/compressed/users", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert await response.json() == users
+
+    # below threshold
+    response = await client.get("/compressed/users", params={"fields": "id"}, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+    # streamed
+    response = await client.get("/compressed/users", headers={"Accept-Encoding": "deflate", "Accept": "text/csv"})
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert len((await response.text()).splitlines()) == len(users) + 1
+
+
+async def test_compression_in_executor(client: TestClient):
+    client.app[APP_CONFIG_KEY].compression_executor_size = 0
+    response = await client.get("/compressed/users", headers={"Accept-Encoding": "deflate"})
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert await response.json()
+
+
+async def test_concurrency_limit(client: TestClient):
+    LimitedView.release = asyncio.Event()
+    config = client.app[APP_CONFIG_KEY]
+    admitted = asyncio.ensure_future(client.get("/limited"))
+    while not config.concurrency_limiters:
+        await asyncio.sleep(0.01)
+
+    response = await client.get("/limited")
+    assert response.status == 503, "request over the limit wasn't shed"
+    assert response.headers["Retry-After"] == "5"
+    LimitedView.release.set()
+    assert (await admitted).status == 200
+    assert config.get_concurrency_stats() == {
+        "LimitedView": {"active": 0, "waiting": 0, "admitted": 1, "queued": 0, "shed": 1},
+    }
+
+
+async def test_coalesced_retrieve(client: TestClient, user):
+    UsersCoalescedRetrieveView.fetched = 0
+    responses = await asyncio.gather(*(client.get(f"/coalesced/users/{user['id']}") for _ in range(5)))
+    assert [response.status for response in responses] == [200] * 5
+    data = [await response.json() for response in responses]
+    assert all(item == data[0] for item in data) and data[0]["id"] == str(user["id"])
+    assert UsersCoalescedRetrieveView.fetched == 1, "concurrent requests weren't coalesced"
+
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    responses = await asyncio.gather(*(client.get(f"/coalesced/users/{missing_id}") for _ in range(3)))
+    assert [response.status for response in responses] == [404] * 3
+    assert [await response.json() for response in responses] == [{"error": "Not found"}] * 3
+    assert UsersCoalescedRetrieveView.fetched == 2
+
+
+async def test_overridden_get_object_without_columns(client: TestClient, user):
+    response = await client.get(f"/overridden/users/{user['id']}")
+    assert response.status == 200, "get_object() without `columns` isn't supported"
+    assert (await response.json())["id"] == str(user["id"])
+
+
+async def test_batch_lookups(client: TestClient):
+    response = await client.get("/users")
+    users = await response.json()
+    ids = [user["id"] for user in users] + ["00000000-0000-0000-0000-000000000000", "invalid"]
+    responses = await asyncio.gather(*(client.get(f"/batch/users/{user_id}") for user_id in ids))
+    assert [response.status for response in responses] == [200] * len(users) + [404, 404]
+    assert [await response.json() for response in responses[:len(users)]] == users
+
+    response = await client.get(f"/batch/users/{users[0]['id'].upper()}")
+    assert response.status == 200, "non-canonical lookup value isn't matched"
+    assert await response.json() == users[0]
+
+
+async def test_prefetch_related(client: TestClient, monkeypatch):
+    companies = await (await client.get("/etag/companies")).json()
+    users = await (await client.get("/users")).json()
+    # all the fixture users belong to one company, move them to the other one
+    empty_company_id = users[0]["company_id"]
+    company_id = next(company["id"] for company in companies if company["id"] != empty_company_id)
+    for user in users:
+        response = await client.patch(f"/users/{user['id']}", json={"company_id": company_id})
+        assert response.status == 200, "invalid response"
+
+    queries = []
+    original_all = PGSAService.all
+
+    async def all_(self, query=None):
+        queries.append(self.model.name)
+        return await original_all(self, query)
+
+    monkeypatch.setattr(PGSAService, "all", all_)
+    response = await client.get("/prefetch/companies")
+    assert response.status == 200, "invalid response"
+    data = {company["id"]: company for company in await response.json()}
+    # one query of companies and one of their users
+    assert queries == ["companies", "users"]
+    assert sorted(user["id"] for user in data[company_id]["users"]) == sorted(user["id"] for user in users)
+    assert all("password" not in user for user in data[company_id]["users"])
+    assert data[empty_company_id]["users"] == []
+
+    response = await client.get(f"/prefetch/companies/{company_id}?fields=id,users")
+    assert response.status == 200, "invalid response"
+    company = await response.json()
+    assert set(company) == {"id", "users"}
+    assert len(company["users"]) == len(users)
+
+    queries.clear()
+    response = await client.get("/prefetch/companies?exclude=users")
+    assert "users" not in (await response.json())[0]
+    assert queries == ["companies"], "excluded relation is fetched"
+
+
+async def test_prefetch_related_cache_and_etag(client: TestClient):
+    response = await client.get("/prefetch-cached/companies")
+    etag = response.headers["ETag"]
+    companies = await response.json()
+    user = next(user for company in companies for user in company["users"])
+
+    response = await client.patch(f"/users/{user['id']}", json={"name": "Renamed"})
+    assert response.status == 200, "invalid response"
+    response = await client.get("/prefetch-cached/companies", headers={"If-None-Match": etag})
+    assert response.status == 200, "change of related object wasn't noticed"
+    names = {user["id"]: user["name"] for company in await response.json() for user in company["users"]}
+    assert names[user["id"]] == "Renamed", "cached response with stale related object was returned"
+
+
+async def test_select_related(client: TestClient, monkeypatch):
+    companies = {company["id"]: company for company in await (await client.get("/etag/companies")).json()}
+    users = await (await client.get("/users")).json()
+
+    queries = []
+    original_fetchall, original_fetchone = PGSARepository._fetchall, PGSARepository._fetchone
+
+    async def fetchall(self, query, params=None):
+        queries.append(query)
+        return await original_fetchall(self, query, params)
+
+    async def fetchone(self, query, params=None):
+        queries.append(query)
+        return await original_fetchone(self, query, params)
+
+    monkeypatch.setattr(PGSARepository, "_fetchall", fetchall)
+    monkeypatch.setattr(PGSARepository, "_fetchone", fetchone)
+    response = await client.get("/related/users")
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    assert len(queries) == 1, "related objects aren't joined"
+    assert [user["id"] for user in data] == [user["id"] for user in users]
+    for user in data:
+        assert user["company"] == companies[user["company_id"]]
+
+    response = await client.get(f"/related/users/{users[0]['id']}?fields=id,company")
+    assert response.status == 200, "invalid response"
+    assert await response.json() == {"id": users[0]["id"], "company": companies[users[0]["company_id"]]}
+    assert len(queries) == 2
+
+    response = await client.get("/related/users", headers={"Accept": "application/x-ndjson"})
+    streamed = [json.loads(line) for line in (await response.read()).splitlines()]
+    assert streamed == data
+
+    response = await client.get("/related/users?exclude=company")
+    assert all("company" not in user for user in await response.json())
+    assert "JOIN" not in str(queries[-1]), "excluded relation is joined"
+
+    response = await client.get("/related/users/00000000-0000-0000-0000-000000000000")
+    assert response.status == 404, "invalid response"
+
+
+async def test_select_related_missing(client: TestClient):
+    user_data = {"name": "Name", "email": "no-company@mail.com", "password": "1234"}
+    response = await client.post("/users", json=user_data)
+    assert response.status == 201, "invalid response"
+    user = await response.json()
+    response = await client.get(f"/related/users/{user['id']}")
+    assert response.status == 200, "invalid response"
+    assert (await response.json())["company"] is None
+
+
 async def test_invalid_json(client: TestClient):
     user_data = '{"name": "My Name", "email": "test@email.com", "phone": "123",}'
     response = await client.post("/users", data=user_data, headers={"Content-Type": "application/json"})
@@ -127,3 +445,98 @@ async def test_destroy_view(client: TestClient, user, get_user_by_id):
 async def test_destroy_non_existent_user(client: TestClient):
     response = await client.delete("/users/123")
     assert response.status == 404, "invalid response"
+
+
+async def test_single_query_update_view(client: TestClient, user, get_user_by_id):
+    response = await client.patch(f"/single-query/users/{user['id']}", json={"name": "Updated Name"})
+    assert response.status == 200, "invalid response"
+    data = await response.json()
+    updated_user = await get_user_by_id(user["id"])
+    assert data["name"] == updated_user["name"] == "Updated Name"
+    assert data["email"] == updated_user["email"] == user["email"], "wrong field updated"
+    assert data["id"] == str(user["id"])
+
+
+async def test_single_query_update_non_existent_user(client: TestClient):
+    for user_id in ("123", "f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"):
+        response = await client.patch(f"/single-query/users/{user_id}", json={"name": "Updated Name"})
+        assert response.status == 404, "invalid response"
+
+
+async def test_single_query_update_requires_instance(client: TestClient, user, get_user_by_id):
+    response = await client.patch(f"/single-query-instance/users/{user['id']}", json={"name": "Updated Name"})
+    assert response.status == 200, "instance wasn't fetched for the serializer"
+    assert (await get_user_by_id(user["id"]))["name"] == "Updated Name"
+
+
+async def test_single_query_destroy_view(client: TestClient, user, get_user_by_id):
+    UsersSingleQueryView.destroyed.clear()
+    response = await client.delete(f"/single-query/users/{user['id']}")
+    assert response.status == 204, "invalid response"
+    assert await get_user_by_id(user["id"]) is None, "user wasn't deleted"
+    deleted_user, = UsersSingleQueryView.destroyed
+    assert dict(deleted_user) == {"id": user["id"], "email": user["email"]}, "hook got wrong object"
+
+
+async def test_single_query_destroy_non_existent_user(client: TestClient):
+    UsersSingleQueryView.destroyed.clear()
+    for user_id in ("123", "f6e0b7a3-5e7c-4a53-9a3b-8c3a1a9d1d6b"):
+        response = await client.delete(f"/single-query/users/{user_id}")
+        assert response.status == 404, "invalid response"
+    assert not UsersSingleQueryView.destroyed
+
+
+async def test_cached_views(client: TestClient, user):
+    cache = client.app[APP_CONFIG_KEY].response_cache
+    async with async_engine_connection() as conn:
+        # changes made bypassing the views aren't seen until cache is invalidated
+        update_name = models.users.update().where(models.users.c.id == user["id"])
+        for url in ("/cached/users", f"/cached/users/{user['id']}", f"/cached/users/{user['id']}?fields=id,name"):
+            await conn.execute(update_name.values(name="Original"))
+            response = await client.get(url)
+            assert response.status == 200, "invalid response"
+            original = await response.json()
+            await conn.execute(update_name.values(name="Changed"))
+            response = await client.get(url)
+            assert await response.json() == original, "response wasn't cached"
+            assert response.headers["Content-Type"].startswith("application/json")
+    assert cache.hits == 3
+    assert cache.misses == 3
+
+    response = await client.patch(f"/users/{user['id']}", json={"name": "Updated"})
+    assert response.status == 200, "invalid response"
+    for url in ("/cached/users", f"/cached/users/{user['id']}"):
+        response = await client.get(url)
+        data = await response.json()
+        names = [item["name"] for item in data] if isinstance(data, list) else [data["name"]]
+        assert "Updated" in names, "cache wasn't invalidated"
+    assert cache.stats()["entries"] == 2
+
+
+async def test_cached_views_invalidated_by_create_and_delete(client: TestClient, user):
+    response = await client.get("/cached/users")
+    count = len(await response.json())
+    await client.get(f"/cached/users/{user['id']}")
+
+    response = await client.post("/users", json={"email": "new@mail.com", "password": "pwd"})
+    assert response.status == 201, "invalid response"
+    response = await client.get("/cached/users")
+    assert len(await response.json()) == count + 1, "list cache wasn't invalidated by create"
+
+    response = await client.delete(f"/users/{user['id']}")
+    assert response.status == 204, "invalid response"
+    response = await client.get(f"/cached/users/{user['id']}")
+    assert response.status == 404, "object cache wasn't invalidated by delete"
+
+
+async def test_select_related_cache_and_etag(client: TestClient):
+    response = await client.get("/related-cached/users")
+    etag = response.headers["ETag"]
+    company_id = (await response.json())[0]["company"]["id"]
+
+    response = await client.patch(f"/etag/companies/{company_id}", json={"name": "Renamed"})
+    assert response.status == 200, "invalid response"
+    response = await client.get("/related-cached/users", headers={"If-None-Match": etag})
+    assert response.status == 200, "change of related object wasn't noticed"
+    companies = {user["company"]["id"]: user["company"] for user in await response.json()}
+    assert companies[company_id]["name"] == "Renamed", "cached response with stale related object was returned"
@@ -7,6 +7,39 @@ from tests import views
 def setup_routes(app: web.Application):
     app.router.add_view("/users", views.UsersListCreateView)
     app.router.add_view("/users/{id}", views.UsersRetrieveUpdateDestroyView)
+    app.router.add_view("/export/users", views.UsersExportListView)
+    app.router.add_view("/stream/users", views.UsersStreamingListView)
+    app.router.add_view("/keyset/users", views.UsersKeysetPaginatedListView)
+    app.router.add_view("/keyset-link/users", views.UsersKeysetLinkPaginatedListView)
+    app.router.add_view("/limit-offset/users", views.UsersLimitOffsetPaginatedListView)
+    app.router.add_view("/estimated-count/users", views.UsersEstimatedCountListView)
+    app.router.add_view("/no-count/users", views.UsersNoCountListView)
+    app.router.add_view("/filter/users", views.UsersFilteredListView)
+    app.router.add_view("/ordering/users", views.UsersOrderedListView)
+    app.router.add_view("/ordering-keyset/users", views.UsersOrderedKeysetListView)
+    app.router.add_view("/bulk/users", views.UsersBulkView)
+    app.router.add_view("/bulk-atomic/users", views.UsersAtomicBulkView)
+    app.router.add_view("/single-query/users/{id}", views.UsersSingleQueryView)
+    app.router.add_view("/single-query-instance/users/{id}", views.UsersSingleQueryWithInstanceView)
+    app.router.add_view("/cached/users", views.UsersCachedListView)
+    app.router.add_view("/cached/users/{id}", views.UsersCachedRetrieveView)
+    app.router.add_view("/etag/users", views.UsersETagListView)
+    app.router.add_view("/etag/users/{id}", views.UsersETagRetrieveView)
+    app.router.add_view("/etag/companies", views.CompaniesETagListView)
+    app.router.add_view("/etag/companies/{id}", views.CompaniesETagRetrieveUpdateView)
+    app.router.add_view("/etag-paginated/companies", views.CompaniesETagPaginatedListView)
+    app.router.add_view("/custom-renderer/users", views.UsersCustomRendererView)
+    app.router.add_view("/compressed/users", views.UsersCompressedListView)
+    app.router.add_view("/limited", views.LimitedView)
+    app.router.add_view("/coalesced/users/{id}", views.UsersCoalescedRetrieveView)
+    app.router.add_view("/overridden/users/{id}", views.UsersOverriddenGetObjectView)
+    app.router.add_view("/batch/users/{id}", views.UsersBatchRetrieveView)
+    app.router.add_view("/prefetch/companies", views.CompaniesPrefetchListView)
+    app.router.add_view("/prefetch/companies/{id}", views.CompaniesPrefetchRetrieveView)
+    app.router.add_view("/prefetch-cached/companies", views.CompaniesPrefetchCachedListView)
+    app.router.add_view("/related/users", views.UsersSelectRelatedListView)
+    app.router.add_view("/related/users/{id}", views.UsersSelectRelatedRetrieveView)
+    app.router.add_view("/related-cached/users", views.UsersSelectRelatedCachedListView)
 
     cors = aiohttp_cors.setup(app, defaults={
         "*": aiohttp_cors.ResourceOptions(
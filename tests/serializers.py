@@ -1,4 +1,7 @@
+import marshmallow as ma
+
 from aiohttp_rest_framework import fields
+from aiohttp_rest_framework.relations import Prefetch
 from aiohttp_rest_framework.serializers import ModelSerializer
 from tests import models
 
@@ -11,3 +14,34 @@ class UserSerializer(ModelSerializer):
         model = models.users
         fields = "__all__"
         dump_only = ("created_at",)
+
+
+class UserWithInstanceSerializer(UserSerializer):
+    @ma.validates_schema
+    def validate_instance(self, data, **kwargs):
+        if self.instance is None:
+            raise ma.ValidationError("Instance is required")
+
+    class Meta(UserSerializer.Meta):
+        requires_instance = True
+
+
+class CompanySerializer(ModelSerializer):
+    class Meta:
+        model = models.companies
+        fields = "__all__"
+        dump_only = ("updated_at",)
+
+
+class CompanyWithUsersSerializer(CompanySerializer):
+    users = fields.Nested(UserSerializer, many=True, dump_only=True)
+
+    class Meta(CompanySerializer.Meta):
+        prefetch_related = (Prefetch("users", models.users),)
+
+
+class UserWithCompanySerializer(UserSerializer):
+    company = fields.Nested(CompanySerializer, dump_only=True)
+
+    class Meta(UserSerializer.Meta):
+        select_related = ("company",)
@@ -1,5 +1,21 @@
-from aiohttp_rest_framework import views
-from tests.serializers import UserSerializer
+import asyncio
+import json
+from functools import partial
+
+from aiohttp import web
+
+from aiohttp_rest_framework import pagination, views
+from aiohttp_rest_framework.parsers import JSONParser
+from aiohttp_rest_framework.renderers import CSVRenderer, JSONRenderer, NDJSONRenderer, encode_default
+from tests.serializers import (
+    CompanySerializer,
+    CompanyWithUsersSerializer,
+    UserSerializer,
+    UserWithCompanySerializer,
+    UserWithInstanceSerializer,
+)
+
+EXPORT_RENDERERS = (NDJSONRenderer(), CSVRenderer())
 
 
 class UsersListCreateView(views.ListCreateAPIView):
@@ -8,3 +24,212 @@ class UsersListCreateView(views.ListCreateAPIView):
 
 class UsersRetrieveUpdateDestroyView(views.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
+
+
+class UsersExportListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    export_renderers = EXPORT_RENDERERS
+
+
+class UsersStreamingListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    streaming = True
+    streaming_chunk_size = 2
+    ordering_fields = ("name",)
+
+
+class UsersKeysetPagination(pagination.KeysetPagination):
+    page_size = 2
+
+
+class UsersKeysetPaginatedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    pagination_class = UsersKeysetPagination
+
+
+class UsersKeysetLinkPagination(pagination.KeysetPagination):
+    page_size = 2
+    ordering = ("-created_at",)
+    link_header = True
+
+
+class UsersKeysetLinkPaginatedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    pagination_class = UsersKeysetLinkPagination
+
+
+class UsersLimitOffsetPagination(pagination.LimitOffsetPagination):
+    default_limit = 2
+
+
+class UsersLimitOffsetPaginatedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    pagination_class = UsersLimitOffsetPagination
+    export_renderers = EXPORT_RENDERERS
+
+
+class UsersEstimatedCountListView(UsersLimitOffsetPaginatedListView):
+    count_mode = pagination.COUNT_ESTIMATE
+
+
+class UsersNoCountListView(UsersLimitOffsetPaginatedListView):
+    count_mode = None
+
+
+class UsersFilteredListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    filter_fields = {
+        "email": ["eq", "in"],
+        "created_at": ["gte", "lt"],
+        "company_id": ["isnull"],
+        "name": ["startswith"],
+    }
+
+
+class UsersOrderedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    ordering_fields = ("name", "phone", "created_at")
+    ordering = ("-name",)
+
+
+class UsersOrderedKeysetListView(UsersOrderedListView):
+    pagination_class = UsersKeysetPagination
+
+
+class UsersBulkView(views.ListCreateBulkUpdateDestroyAPIView):
+    serializer_class = UserSerializer
+    allow_bulk_create = True
+    bulk_create_batch_size = 2
+    allow_ingest = True
+    ingest_batch_size = 2
+    ingest_max_rejection_details = 3
+
+
+class UsersAtomicBulkView(UsersBulkView):
+    bulk_create_atomic = True
+
+
+class UsersSingleQueryView(views.RetrieveUpdateDestroyAPIView):
+    serializer_class = UserSerializer
+    single_query_update = True
+    single_query_destroy = True
+    destroy_returning_columns = ("email",)
+    # deleted users passed to `post_destroy()`
+    destroyed = []
+
+    async def post_destroy(self, instance):
+        self.destroyed.append(instance)
+
+
+class UsersSingleQueryWithInstanceView(UsersSingleQueryView):
+    serializer_class = UserWithInstanceSerializer
+
+
+class UsersCachedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    cache_responses = True
+
+
+class UsersCachedRetrieveView(views.RetrieveAPIView):
+    serializer_class = UserSerializer
+    cache_responses = True
+
+
+class UsersETagListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    use_etags = True
+
+
+class UsersETagRetrieveView(views.RetrieveAPIView):
+    serializer_class = UserSerializer
+    use_etags = True
+
+
+class CompaniesETagListView(views.ListAPIView):
+    serializer_class = CompanySerializer
+    use_etags = True
+
+
+class CompaniesETagPaginatedListView(CompaniesETagListView):
+    pagination_class = UsersLimitOffsetPagination
+
+
+class CompaniesETagRetrieveUpdateView(views.RetrieveUpdateAPIView):
+    serializer_class = CompanySerializer
+    use_etags = True
+
+
+class UsersCustomRendererView(views.ListCreateAPIView):
+    serializer_class = UserSerializer
+    renderers = (JSONRenderer(dumps=partial(json.dumps, indent=2, default=encode_default)),)
+    parsers = (JSONParser(loads=partial(json.loads, parse_float=str)),)
+
+
+class UsersCompressedListView(views.ListAPIView):
+    serializer_class = UserSerializer
+    export_renderers = EXPORT_RENDERERS
+    compression = True
+    compression_min_size = 200
+    cache_responses = True
+
+
+class LimitedView(views.APIView):
+    max_concurrency = 1
+    retry_after = 5
+    # requests wait for the event to be set
+    release: asyncio.Event = None
+
+    async def get(self):
+        await self.release.wait()
+        return web.json_response({})
+
+
+class UsersCoalescedRetrieveView(views.RetrieveAPIView):
+    serializer_class = UserSerializer
+    coalesce_requests = True
+    # amount of objects fetched from database
+    fetched = 0
+
+    async def get_object(self, columns=None):
+        UsersCoalescedRetrieveView.fetched += 1
+        await asyncio.sleep(0.05)  # let concurrent requests join
+        return await super().get_object(columns)
+
+
+class UsersOverriddenGetObjectView(views.RetrieveAPIView):
+    serializer_class = UserSerializer
+
+    async def get_object(self):
+        return await super().get_object()
+
+
+class UsersBatchRetrieveView(views.RetrieveAPIView):
+    serializer_class = UserSerializer
+    batch_lookups = True
+
+
+class CompaniesPrefetchListView(views.ListAPIView):
+    serializer_class = CompanyWithUsersSerializer
+
+
+class CompaniesPrefetchRetrieveView(views.RetrieveAPIView):
+    serializer_class = CompanyWithUsersSerializer
+
+
+class CompaniesPrefetchCachedListView(CompaniesPrefetchListView):
+    cache_responses = True
+    use_etags = True
+
+
+class UsersSelectRelatedListView(views.ListAPIView):
+    serializer_class = UserWithCompanySerializer
+    export_renderers = EXPORT_RENDERERS
+
+
+class UsersSelectRelatedCachedListView(UsersSelectRelatedListView):
+    cache_responses = True
+    use_etags = True
+
+
+class UsersSelectRelatedRetrieveView(views.RetrieveAPIView):
+    serializer_class = UserWithCompanySerializer